@@ -103,15 +103,14 @@ export const updateOrderStatus = async (req: Request, res: Response, next: NextF
       });
     }
 
-    // Find and update order status
-    const updatedOrder = await Order.findOneAndUpdate(
-      { id },
-      { $set: { status } },
-      { new: true }
-    );
+    // Update the order status, then read the order back. A plain update rather than
+    // findOneAndUpdate also works when the orders are seeded into a time-series collection
+    const result = await Order.updateOne({ id }, { $set: { status } });
 
     // If order is not found
-    if (!updatedOrder) return res.status(404).json({ message: 'Order not found' });
+    if (result.matchedCount === 0) return res.status(404).json({ message: 'Order not found' });
+
+    const updatedOrder = await Order.findOne({ id });
 
     res.status(200).json({
       success: true,
@@ -0,0 +1,51 @@
+import { Request, Response, NextFunction } from 'express';
+import Asset from '../models/Asset';
+
+// Image fields that may hold an "asset:<sha256>" reference instead of a base64 image
+const IMAGE_FIELDS = ['image', 'profile_picture'];
+const ASSET_REFERENCE_PREFIX = 'asset:';
+
+// Asset bytes come back from lean() queries as a BSON Binary rather than a Buffer
+const assetBytes = (data: any): Buffer => Buffer.isBuffer(data) ? data : Buffer.from(data.buffer ?? data);
+
+const isAssetReference = (value: unknown): value is string =>
+  typeof value === 'string' && value.startsWith(ASSET_REFERENCE_PREFIX);
+
+// Path the backend serves an asset's bytes from
+const ASSET_URL_PREFIX = '/api/assets/';
+
+// An asset URL sent back by the frontend, relative or absolute
+const ASSET_URL_PATTERN = /\/api\/assets\/([0-9a-f]{64})$/;
+
+// JSON replacer sending the asset references of image fields as the URLs serving
+// them, so responses stay small and images load (and are cached) on their own
+export const assetReferenceReplacer = (key: string, value: unknown): unknown =>
+  IMAGE_FIELDS.includes(key) && isAssetReference(value)
+    ? ASSET_URL_PREFIX + value.slice(ASSET_REFERENCE_PREFIX.length)
+    : value;
+
+// Turn the asset URLs of a request's image fields back into references,
+// so saving an unchanged image does not store its URL in place of the reference
+export const storeAssetReferences = (req: Request, res: Response, next: NextFunction): void => {
+  if (req.body && typeof req.body === 'object') {
+    for (const field of IMAGE_FIELDS) {
+      const match = typeof req.body[field] === 'string' ? req.body[field].match(ASSET_URL_PATTERN) : null;
+      if (match) req.body[field] = ASSET_REFERENCE_PREFIX + match[1];
+    }
+  }
+  next();
+};
+
+// GET /api/assets/:sha256 serves an asset's bytes; its content never changes for a given hash
+export const serveAsset = async (req: Request, res: Response, next: NextFunction) => {
+  try {
+    const asset = await Asset.findById(req.params.sha256).lean();
+    if (!asset) return res.status(404).json({ message: 'Asset not found' });
+
+    res.set('Content-Type', asset.content_type || 'image/jpeg');
+    res.set('Cache-Control', 'public, max-age=31536000, immutable');
+    res.send(assetBytes(asset.data));
+  } catch (error) {
+    next(error);
+  }
+};
@@ -0,0 +1,44 @@
+import mongoose, { Document } from 'mongoose';
+
+// Images stored once by the db-scripts in 'assets' image storage mode, keyed by
+// the SHA-256 of their bytes; products and admins reference them as "asset:<sha256>"
+export interface IAsset extends Document {
+  _id: string;
+  sha256: string;
+  content_type: string;
+  size: number;
+  data: Buffer;
+  createdAt?: Date;
+}
+
+const AssetSchema = new mongoose.Schema<IAsset>({
+  _id: {
+    type: String,
+    required: true
+  },
+  sha256: {
+    type: String,
+    required: true
+  },
+  content_type: {
+    type: String,
+    default: 'image/jpeg'
+  },
+  size: {
+    type: Number
+  },
+  data: {
+    type: Buffer,
+    required: true
+  },
+  createdAt: {
+    type: Date
+  }
+}, {
+  collection: 'assets',
+  versionKey: false
+});
+
+const Asset = mongoose.model<IAsset>('Asset', AssetSchema);
+
+export default Asset;
@@ -5,13 +5,17 @@ interface OrderProduct {
   product_name: string;
   product_id: string;
   product_quantity: number;
+  price?: number;
 }
 
 interface IOrder extends Document {
   _id: string;
   id: string;
+  customer_id?: string;
   customer: string;
-  date: string;
+  // 'YYYY-MM-DD' string, or a Date for orders seeded or migrated to BSON dates;
+  // either way it is serialized as 'YYYY-MM-DD'
+  date: string | Date;
   total: number;
   status: string;
   products: OrderProduct[];
@@ -30,13 +34,16 @@ const OrderSchema = new mongoose.Schema<IOrder>({
     required: true,
     default: () => `ORDER-${uuidv4()}`
   },
+  customer_id: {
+    type: String
+  },
   customer: {
     type: String,
     required: true,
     trim: true
   },
   date: {
-    type: String,
+    type: mongoose.Schema.Types.Mixed,
     required: true
   },
   total: {
@@ -63,11 +70,23 @@ const OrderSchema = new mongoose.Schema<IOrder>({
       type: Number,
       required: true,
       min: 0
+    },
+    price: {
+      type: Number,
+      min: 0
     }
   }]
 }, {
   timestamps: true,
-  versionKey: '__v'
+  versionKey: '__v',
+  toJSON: {
+    // Orders dated with a BSON date are sent as 'YYYY-MM-DD' like the string-dated ones,
+    // so the dashboard shows every order date the same way
+    transform: (_doc, ret) => {
+      if (ret.date instanceof Date) ret.date = ret.date.toISOString().slice(0, 10);
+      return ret;
+    }
+  }
 });
 
 const Order = mongoose.model<IOrder>('Order', OrderSchema);
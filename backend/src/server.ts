@@ -9,6 +9,7 @@ import authRoutes from './routes/authRoutes';
 import { auth } from './middleware/auth';
 import connectDB from './config/database';
 import errorHandler from './middleware/errorHandler';
+import { assetReferenceReplacer, storeAssetReferences, serveAsset } from './middleware/assets';
 
 // Load environment variables from project root
 dotenv.config({ path: path.resolve(__dirname, '../../.env') });
@@ -27,6 +28,15 @@ app.use(cors());
 app.use(express.json({ limit: '10mb' }));
 app.use(express.urlencoded({ limit: '10mb', extended: true }));
 
+// Images seeded in 'assets' storage mode are referenced as "asset:<sha256>";
+// responses carry the /api/assets/<sha256> URL instead, and requests sending
+// that URL back store the reference again
+app.set('json replacer', assetReferenceReplacer);
+app.use('/api', storeAssetReferences);
+
+// Assets by content hash, for <img> tags that cannot send a token
+app.get('/api/assets/:sha256', serveAsset);
+
 // Public routes
 app.use('/api/auth', authRoutes);
 
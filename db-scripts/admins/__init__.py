@@ -0,0 +1 @@
+# Admins seeding package
@@ -4,15 +4,24 @@ import sys
 # Add parent directory to Python path BEFORE any local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import uuid
+import time
 import random
-import bcrypt
-import base64
-from pymongo import MongoClient
+import argparse
 from dotenv import load_dotenv
 from datetime import datetime, timezone
-from reference.malaysian_names import FIRST_NAMES, LAST_NAMES
 from reference.malaysian_addresses import STREET_NAMES, STREET_TYPES, STATES_AND_DISTRICTS
+from common.parallel import add_parallel_args, derive_seed, random_uuid, resolve_seed
+from common.incremental import batches_done, documents_to_write, add_incremental_args
+from common.connection import get_client, add_connection_args, connection_from_args, print_connection_stats
+from common.pipeline import write_batches, add_pipeline_args, pipeline_from_args
+from common.populate import run_populate
+from common.snapshots import record_batches, fingerprint, add_snapshot_args
+from common.instrumentation import stage, add_instrumentation_args, instrumentation_from_args, write_report
+from common.identities import IdentityGenerator, first_free_round, add_identity_args
+from common.assets import load_file_asset, image_field_value, add_image_storage_args
+from common.passwords import (
+    DEFAULT_BCRYPT_ROUNDS, hash_passwords, timed_hash_passwords, compare_hash_strategies, add_hashing_args
+)
 
 # Get project root directory in a device-agnostic way
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -32,46 +41,52 @@ ADMIN_ROLES = [
     'Admin Applicant', 
 ]
 
-def generate_phone_number():
+# Id of the admin that can always access the dashboard
+MASTER_ADMIN_ID = "ADMIN-MASTER"
+
+# Default number of random admins to generate (the master admin is added on top)
+DEFAULT_NUM_ADMINS = 50
+
+# Number of admins generated and written per batch
+DEFAULT_BATCH_SIZE = 1000
+
+# Profile picture given to every seeded admin
+PROFILE_PICTURE_PATH = os.path.join(PROJECT_ROOT, 'db-scripts', 'reference', 'blank-profile-picture-973460_1280.jpg')
+
+# Password given to every seeded admin
+DEFAULT_PASSWORD = 'password'
+
+def generate_phone_number(rng=random):
     """Generate a random Malaysian phone number"""
     # Malaysian mobile prefixes
     prefixes = ['010', '011', '012', '013', '014', '015', '016', '017', '018', '019']
     
-    prefix = random.choice(prefixes)
+    prefix = rng.choice(prefixes)
     # Generate 7 more digits to make it a 10-digit number
-    rest_of_number = ''.join([str(random.randint(0, 9)) for _ in range(7)])
+    rest_of_number = ''.join([str(rng.randint(0, 9)) for _ in range(7)])
     
     return f"+60{prefix}{rest_of_number}"
 
-def generate_address():
+def generate_address(rng=random):
     """Generate a random Malaysian address"""
     
     # Randomly select a state and its district
-    state = random.choice(list(STATES_AND_DISTRICTS.keys()))
-    city = random.choice(STATES_AND_DISTRICTS[state])
+    state = rng.choice(list(STATES_AND_DISTRICTS.keys()))
+    city = rng.choice(STATES_AND_DISTRICTS[state])
     
-    return f"{random.randint(1, 999)} {random.choice(STREET_NAMES)} {random.choice(STREET_TYPES)}, {city}, {state}, {random.randint(10000, 99999)}"
-
-def hash_password(password):
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return f"{rng.randint(1, 999)} {rng.choice(STREET_NAMES)} {rng.choice(STREET_TYPES)}, {city}, {state}, {rng.randint(10000, 99999)}"
 
 def get_default_profile_picture():
-    """Get the default profile picture as base64 string"""
+    """Get the default profile picture as base64 string, read and encoded once per process"""
     try:
-        image_path = os.path.join(PROJECT_ROOT, 'db-scripts', 'reference', 'blank-profile-picture-973460_1280.jpg')
-        with open(image_path, 'rb') as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+        return load_file_asset(PROFILE_PICTURE_PATH).base64
     except Exception as e:
         print(f"Error reading default profile picture: {e}")
         return None
 
-def generate_admins(num_admins=50):
-    """Generate a list of admin dictionaries"""
-    admins = []
-    
-    # Add the master admin first
-    master_admin_id = "ADMIN-MASTER"
+def generate_master_admin(profile_picture=None):
+    """Generate the master admin that can always access the dashboard"""
+    master_admin_id = MASTER_ADMIN_ID
     master_admin = {
         '_id': master_admin_id,
         'id': master_admin_id,
@@ -82,34 +97,50 @@ def generate_admins(num_admins=50):
         'first_name': "None", 
         'last_name': "None", 
         'address': "None", 
-        'password': hash_password('password'),
-        'profile_picture': get_default_profile_picture(),
+        'password': DEFAULT_PASSWORD, # Hashed by generate_admins
+        'profile_picture': profile_picture or get_default_profile_picture(),
         'createdAt': datetime.now(timezone.utc),
         'updatedAt': datetime.now(timezone.utc),
         '__v': 0
     }
-    admins.append(master_admin)
+    return master_admin
+
+def build_admins(num_admins=DEFAULT_NUM_ADMINS, rng=random, include_master=True, profile_picture=None,
+                 identities=None, first_position=0):
+    """
+    Generate a list of admin dictionaries whose passwords are not hashed yet.
+    Names, usernames and emails come from identities at first_position onwards,
+    so admins built over distinct positions never share a username or email.
+    """
+    admins = []
+    identities = identities or IdentityGenerator()
+    
+    # Every admin shares the same picture, inline or as an asset reference
+    profile_picture = profile_picture or get_default_profile_picture()
+    
+    # Add the master admin first
+    if include_master:
+        admins.append(generate_master_admin(profile_picture))
     
     # Generate other random admins
-    for _ in range(num_admins):
-        first_name = random.choice(FIRST_NAMES)
-        last_name = random.choice(LAST_NAMES)
+    for position in range(first_position, first_position + num_admins):
+        first_name, last_name, username, email = identities.identity(position)
         
-        admin_id = "ADMIN-" + str(uuid.uuid4())
+        admin_id = "ADMIN-" + random_uuid(rng)
         current_time = datetime.now(timezone.utc)
         
         admin = {
             '_id': admin_id,
             'id': admin_id,
-            'username': f"{first_name.lower()}_{last_name.lower()}",
-            'email': f"{first_name.lower()}.{last_name.lower()}@gmail.com",
-            'phone_number': generate_phone_number(),
-            'role': random.choice(ADMIN_ROLES),
+            'username': username,
+            'email': email,
+            'phone_number': generate_phone_number(rng),
+            'role': rng.choice(ADMIN_ROLES),
             'first_name': first_name,
             'last_name': last_name,
-            'address': generate_address(),
-            'password': hash_password('password'),  # Default password
-            'profile_picture': get_default_profile_picture(),
+            'address': generate_address(rng),
+            'password': DEFAULT_PASSWORD,  # Default password, hashed below
+            'profile_picture': profile_picture,
             'createdAt': current_time,
             'updatedAt': current_time,
             '__v': 0
@@ -119,31 +150,192 @@ def generate_admins(num_admins=50):
     
     return admins
 
-def populate_admins():
-    """Populate the admins collection in MongoDB"""
+def generate_admins(num_admins=DEFAULT_NUM_ADMINS, rng=random, include_master=True,
+                    hash_strategy='serial', bcrypt_rounds=DEFAULT_BCRYPT_ROUNDS, hash_workers=None,
+                    profile_picture=None, identities=None, first_position=0):
+    """Generate a list of admin dictionaries"""
+    admins = build_admins(num_admins, rng, include_master, profile_picture, identities, first_position)
+    
+    # Hash every password in one go so the chosen strategy can batch or share the work
+    hashes = timed_hash_passwords(
+        [admin['password'] for admin in admins], hash_strategy, bcrypt_rounds, hash_workers
+    )
+    for admin, password_hash in zip(admins, hashes):
+        admin['password'] = password_hash
+    
+    return admins
+
+def insert_admin_shard(shard, hash_strategy='serial', bcrypt_rounds=DEFAULT_BCRYPT_ROUNDS, hash_workers=None,
+                       profile_picture=None, client=None, batch_size=DEFAULT_BATCH_SIZE, upsert=False, checkpoint=None,
+                       include_master=True, pipeline=None, snapshot_dir=None, identities=None, identity_offset=0):
+    """
+    Generate and insert one shard of admins in batches, over the given client or the shared client of the process.
+    The shard's admins take the identities at identity_offset + their position in the run.
+    With a checkpoint, batches already written are skipped and progress is recorded after every batch.
+    With pipeline options, hashing the next batches overlaps with writing the previous ones.
+    With a snapshot_dir, every hashed batch is also recorded there.
+    """
+    client = client or get_client(MONGO_URI)
+    db = client[DB_NAME]
+    collection = db[ADMINS_COLLECTION]
+    
+    # Each shard draws from its own RNG so the dataset is reproducible
+    rng = random.Random(shard.seed)
+    start_batch = batches_done(checkpoint, shard.index)
+    
+    hashing = {'hashed': 0, 'time': 0.0}
+    
+    def batches():
+        for batch_number, batch_start in enumerate(range(0, max(shard.count, 1), batch_size)):
+            # Only the first batch of the first shard adds the master admin
+            admins = build_admins(
+                min(batch_size, shard.count - batch_start), rng=rng,
+                include_master=include_master and shard.index == 0 and batch_number == 0, profile_picture=profile_picture,
+                identities=identities, first_position=identity_offset + shard.start + batch_start
+            )
+            
+            # Batches written before an interruption only advance the RNG, without hashing
+            if batch_number < start_batch or not admins:
+                continue
+            
+            start_time = time.perf_counter()
+            with stage('admins.hash_passwords'):
+                hashes = hash_passwords([admin['password'] for admin in admins], hash_strategy, bcrypt_rounds, hash_workers)
+            hashing['time'] += time.perf_counter() - start_time
+            hashing['hashed'] += len(hashes)
+            for admin, password_hash in zip(admins, hashes):
+                admin['password'] = password_hash
+            
+            yield batch_number, admins
+    
+    numbered_batches = batches()
+    if snapshot_dir:
+        numbered_batches = record_batches(numbered_batches, snapshot_dir, shard.index)
+    
+    inserted = write_batches(collection, numbered_batches, upsert=upsert, checkpoint=checkpoint,
+                             shard_index=shard.index, pipeline=pipeline, uri=MONGO_URI)
+    
+    hashed, hash_time = hashing['hashed'], hashing['time']
+    rate = hashed / hash_time if hash_time > 0 else 0
+    print(f"Hashed {hashed} passwords with the '{hash_strategy}' strategy (cost {bcrypt_rounds}) in {hash_time:.2f}s ({rate:,.1f} passwords/sec)")
+    return inserted
+
+def populate_admins(num_admins=DEFAULT_NUM_ADMINS, workers=1, seed=None,
+                    hash_strategy='serial', bcrypt_rounds=DEFAULT_BCRYPT_ROUNDS, hash_workers=None,
+                    image_storage='inline', client=None, batch_size=DEFAULT_BATCH_SIZE,
+                    mode='replace', resume=False, fast_reset=False, pipeline=None, snapshot=False, identity_vocabularies=None):
+    """
+    Populate the admins collection in MongoDB and return how many admins were written,
+    or None when the run failed.
+    mode replaces the collection, appends num_admins admins or tops it up to num_admins
+    random admins plus the master admin; resume continues an interrupted run from its checkpoint.
+    Usernames and emails are unique without a lookup per admin: appended admins take
+    numbered suffixes above those of the admins already there, read once up front.
+    Words from identity_vocabularies are combined with the names to delay numbered suffixes.
+    With snapshot, a fresh replace loads a saved copy of the same admins, hashes included, or saves one.
+    """
     try:
         # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
+        client = client or get_client(MONGO_URI)
         db = client[DB_NAME]
         collection = db[ADMINS_COLLECTION]
         
-        # Generate admins
-        admins = generate_admins()
+        # Encode the profile picture once and share it with every worker,
+        # either inline or as a reference to its single stored copy
+        profile_picture = None
+        try:
+            with stage('admins.encode_image'):
+                profile_picture = image_field_value(db, load_file_asset(PROFILE_PICTURE_PATH), image_storage)
+        except OSError as e:
+            print(f"Error reading default profile picture: {e}")
         
-        # Insert admins
-        if admins:
-            # Delete existing admins before inserting new ones
-            collection.delete_many({})
-            
-            # Insert new admins
-            result = collection.insert_many(admins)
-            
-            print(f"Successfully inserted {len(result.inserted_ids)} admins")
+        # Appending or topping up only adds the master admin when it is missing
+        include_master = mode == 'replace' or collection.count_documents({'_id': MASTER_ADMIN_ID}) == 0
+        
+        # The top-up target counts random admins, the master admin comes on top
+        count = num_admins
+        if mode == 'top-up':
+            count = max(0, documents_to_write(collection, num_admins + 1, mode) - int(include_master))
         
-        client.close()
+        # Appended admins start at a round of numbered suffixes none of the admins already there reach
+        identity_round = 0
+        if mode != 'replace':
+            identity_round = first_free_round(
+                name for admin in collection.find({'_id': {'$ne': MASTER_ADMIN_ID}}, {'username': 1, 'email': 1})
+                for name in (admin.get('username'), admin.get('email')) if name
+            )
+        
+        # A resumed run regenerates the same admins from the settings it was started with
+        settings = {
+            'mode': mode,
+            'count': count,
+            'include_master': include_master,
+            'seed': resolve_seed(seed),
+            'workers': workers,
+            'batch_size': batch_size,
+            'identity_round': identity_round,
+            'identity_vocabularies': list(identity_vocabularies or []),
+        }
+        
+        # Every shard shares one generator, so their identities never collide.
+        # Identities are laid out by the run's seed, not a shard's: runs of the
+        # same seed and round give every admin the same username and email
+        def shard_kwargs(settings):
+            identities = IdentityGenerator(derive_seed(settings['seed'], 'identities', ADMINS_COLLECTION),
+                                           settings.get('identity_vocabularies'))
+            return {
+                'hash_strategy': hash_strategy, 'bcrypt_rounds': bcrypt_rounds, 'hash_workers': hash_workers,
+                'profile_picture': profile_picture, 'include_master': settings['include_master'],
+                'identities': identities, 'identity_offset': identities.first_position(settings.get('identity_round', 0)),
+            }
+        
+        # A snapshot keeps the password hashes, so it also depends on the password and hashing cost
+        return run_populate(db, ADMINS_COLLECTION, settings, insert_admin_shard, shard_kwargs,
+                            client=client, uri=MONGO_URI, resume=resume, fast_reset=fast_reset,
+                            pipeline=pipeline, snapshot=snapshot, snapshot_key={
+                                'bcrypt_rounds': bcrypt_rounds, 'password': fingerprint(DEFAULT_PASSWORD),
+                                'profile_picture': fingerprint(profile_picture),
+                            })
     
     except Exception as e:
         print(f"An error occurred: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the admins collection with sample admins")
+    parser.add_argument('--count', type=int, default=DEFAULT_NUM_ADMINS,
+                        help=f"Number of random admins to generate besides the master admin (default: {DEFAULT_NUM_ADMINS})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Number of admins per write (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--compare-hash-strategies', action='store_true',
+                        help="Time every hashing strategy on --count passwords instead of seeding")
+    add_hashing_args(parser)
+    add_identity_args(parser)
+    add_image_storage_args(parser)
+    add_incremental_args(parser)
+    add_connection_args(parser)
+    add_pipeline_args(parser)
+    add_snapshot_args(parser)
+    add_instrumentation_args(parser)
+    add_parallel_args(parser)
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    populate_admins()
\ No newline at end of file
+    args = parse_args()
+    instrumentation_from_args(args)
+    connection_from_args(args)
+    if args.compare_hash_strategies:
+        compare_hash_strategies(args.count, DEFAULT_PASSWORD, args.bcrypt_rounds, args.hash_workers)
+    else:
+        inserted = populate_admins(
+            num_admins=args.count, workers=args.workers, seed=args.seed,
+            hash_strategy=args.hash_strategy, bcrypt_rounds=args.bcrypt_rounds, hash_workers=args.hash_workers,
+            image_storage=args.image_storage, batch_size=args.batch_size,
+            mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+            pipeline=pipeline_from_args(args), snapshot=args.snapshot,
+            identity_vocabularies=args.identity_vocabularies
+        )
+        print_connection_stats()
+        if args.report:
+            write_report(args.report)
+        sys.exit(0 if inserted is not None else 1)
@@ -0,0 +1 @@
+# Asset maintenance package
@@ -0,0 +1,80 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+from dotenv import load_dotenv
+from common.connection import get_client
+from common.assets import backfill_inline_images, restore_inline_images
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+
+# Image fields holding inline base64 images, per collection
+IMAGE_FIELDS = {
+    'products': 'image',
+    'admins': 'profile_picture',
+}
+
+def backfill_assets(collections=None, batch_size=500):
+    """Replace inline images with references to the assets collection"""
+    try:
+        # Connect to MongoDB
+        client = get_client(MONGO_URI)
+        db = client[DB_NAME]
+        
+        for collection_name in collections or IMAGE_FIELDS:
+            field = IMAGE_FIELDS[collection_name]
+            start_time = time.perf_counter()
+            converted, assets = backfill_inline_images(db, collection_name, field, batch_size)
+            elapsed = time.perf_counter() - start_time
+            print(f"Converted {converted} {collection_name} to {assets} distinct assets in {elapsed:.2f}s")
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def restore_assets(collections=None, batch_size=500):
+    """Put the images referenced from the assets collection back inline"""
+    try:
+        # Connect to MongoDB
+        client = get_client(MONGO_URI)
+        db = client[DB_NAME]
+        
+        for collection_name in collections or IMAGE_FIELDS:
+            field = IMAGE_FIELDS[collection_name]
+            start_time = time.perf_counter()
+            restored, missing = restore_inline_images(db, collection_name, field, batch_size)
+            elapsed = time.perf_counter() - start_time
+            print(f"Restored {restored} inline {collection_name} images in {elapsed:.2f}s"
+                  + (f", {missing} reference missing assets and were left as they are" if missing else ''))
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Move inline base64 images into the content-hashed assets collection")
+    parser.add_argument('--collections', nargs='+', choices=list(IMAGE_FIELDS), default=None,
+                        help="Collections to convert (default: all)")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Documents updated per bulk write (default: 500)")
+    parser.add_argument('--restore-inline', action='store_true',
+                        help="Put the referenced images back into the documents instead")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.restore_inline:
+        restore_assets(collections=args.collections, batch_size=args.batch_size)
+    else:
+        backfill_assets(collections=args.collections, batch_size=args.batch_size)
@@ -0,0 +1,326 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import json
+import time
+import random
+import argparse
+import platform
+import bson
+import contextlib
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+from common.incremental import write_batch
+from common.passwords import MIN_BCRYPT_ROUNDS
+from common.instrumentation import peak_rss_mb
+from products.populate_products import generate_products, DEFAULT_BATCH_SIZE
+from admins.populate_admins import generate_admins, generate_address
+from common.catalog import ProductCatalog
+from orders.populate_orders import generate_orders, generate_orders_vectorized, generate_date, OrderEncoder
+
+# mongomock is optional; without it benchmarks need a local mongod
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details; benchmarks only ever write to their own database
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+BENCHMARK_DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard') + '_benchmark'
+
+BENCHMARK_TARGETS = ['auto', 'mongomock', 'mongod']
+DEFAULT_SCALES = [1000, 100000, 1000000]
+DEFAULT_THRESHOLD = 0.10
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'db-scripts', '.cache', 'benchmarks')
+
+# Products the order benchmarks draw from
+BENCHMARK_NUM_PRODUCTS = 500
+
+def mongod_available(timeout_ms=500):
+    """Whether a mongod answers at MONGO_URI"""
+    try:
+        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=timeout_ms)
+        client.admin.command('ping')
+        client.close()
+        return True
+    except PyMongoError:
+        return False
+
+def resolve_target(target='auto'):
+    """Pick the database the insert benchmarks write to"""
+    if target == 'auto':
+        if mongod_available():
+            return 'mongod'
+        if mongomock is None:
+            raise RuntimeError("No local mongod answers and the mongomock fallback is not installed "
+                               "(pip install -r requirements-dev.txt)")
+        return 'mongomock'
+    if target == 'mongomock' and mongomock is None:
+        raise RuntimeError("The mongomock target needs mongomock installed (pip install -r requirements-dev.txt)")
+    return target
+
+def benchmark_client(target):
+    """A client for the benchmark target"""
+    if target == 'mongomock':
+        return mongomock.MongoClient()
+    return MongoClient(MONGO_URI)
+
+def benchmark_catalog(rng):
+    """Catalog of the products the order benchmarks draw from"""
+    return ProductCatalog.from_products(generate_products(BENCHMARK_NUM_PRODUCTS, rng=rng, default_image='benchmark'))
+
+def timed_batches(batches):
+    """Yield each batch of a generator together with the time spent producing it"""
+    while True:
+        start_time = time.perf_counter()
+        batch = next(batches, None)
+        elapsed = time.perf_counter() - start_time
+        if batch is None:
+            return
+        yield batch, elapsed
+
+def in_batches(scale, batch_size=DEFAULT_BATCH_SIZE):
+    """Sizes of the batches that make up scale documents"""
+    for batch_start in range(0, scale, batch_size):
+        yield min(batch_size, scale - batch_start)
+
+def bench_generate_date(scale, rng, target):
+    start_time = time.perf_counter()
+    for _ in range(scale):
+        generate_date(rng)
+    return {'generate_date': time.perf_counter() - start_time}
+
+def bench_generate_address(scale, rng, target):
+    start_time = time.perf_counter()
+    for _ in range(scale):
+        generate_address(rng)
+    return {'generate_address': time.perf_counter() - start_time}
+
+def bench_generate_products(scale, rng, target):
+    start_time = time.perf_counter()
+    for size in in_batches(scale):
+        generate_products(size, rng=rng, default_image='benchmark')
+    return {'generate_products': time.perf_counter() - start_time}
+
+def bench_build_catalog(scale, rng, target):
+    # Only the catalog build is timed, not generating the product documents it is built from
+    elapsed = 0.0
+    for size in in_batches(scale):
+        products = generate_products(size, rng=rng, default_image='benchmark')
+        start_time = time.perf_counter()
+        ProductCatalog.from_products(products)
+        elapsed += time.perf_counter() - start_time
+    return {'build_catalog': elapsed}
+
+def bench_generate_admins(scale, rng, target):
+    # Hash the shared password once at the minimum cost, so the case measures
+    # document generation rather than bcrypt (see compare_hash_strategies for that)
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for size in in_batches(scale):
+            generate_admins(size, rng=rng, include_master=False, hash_strategy='shared', bcrypt_rounds=MIN_BCRYPT_ROUNDS)
+    return {'generate_admins': time.perf_counter() - start_time}
+
+def bench_generate_orders(scale, rng, target):
+    catalog = benchmark_catalog(rng)
+    elapsed = sum(seconds for _, seconds in timed_batches(generate_orders(scale, catalog=catalog, rng=rng)))
+    return {'generate_orders': elapsed}
+
+def bench_generate_orders_vectorized(scale, rng, target):
+    catalog = benchmark_catalog(rng)
+    batches = generate_orders_vectorized(scale, catalog=catalog, rng=np.random.default_rng(rng.getrandbits(64)))
+    return {'generate_orders_vectorized': sum(seconds for _, seconds in timed_batches(batches))}
+
+def bench_encode_orders_dict(scale, rng, target):
+    # Order dicts encoded the way pymongo encodes them on insert_many
+    catalog = benchmark_catalog(rng)
+    generate_time = 0.0
+    encode_time = 0.0
+    for batch, seconds in timed_batches(generate_orders(scale, catalog=catalog, rng=rng)):
+        generate_time += seconds
+        start_time = time.perf_counter()
+        for order in batch:
+            bson.encode(order)
+        encode_time += time.perf_counter() - start_time
+    return {'generate_orders': generate_time, 'bson.encode': encode_time}
+
+def bench_encode_orders_raw(scale, rng, target):
+    # Orders encoded straight from rows, ready to insert as they are
+    catalog = benchmark_catalog(rng)
+    batches = generate_orders(scale, catalog=catalog, rng=rng, encoder=OrderEncoder(catalog))
+    return {'generate_orders(raw)': sum(seconds for _, seconds in timed_batches(batches))}
+
+def bench_insert_orders(scale, rng, target):
+    client = benchmark_client(target)
+    db = client[BENCHMARK_DB_NAME]
+    db.drop_collection('orders')
+    collection = db['orders']
+    
+    generate_time = 0.0
+    write_time = 0.0
+    try:
+        catalog = benchmark_catalog(rng)
+        for batch, seconds in timed_batches(generate_orders(scale, catalog=catalog, rng=rng)):
+            generate_time += seconds
+            start_time = time.perf_counter()
+            write_batch(collection, batch)
+            write_time += time.perf_counter() - start_time
+    finally:
+        client.drop_database(BENCHMARK_DB_NAME)
+        client.close()
+    
+    return {'generate_orders': generate_time, 'write_batch': write_time}
+
+# Benchmark cases: each takes (scale, rng, target) and returns seconds spent per function
+BENCHMARKS = {
+    'generate_date': bench_generate_date,
+    'generate_address': bench_generate_address,
+    'generate_products': bench_generate_products,
+    'build_catalog': bench_build_catalog,
+    'generate_admins': bench_generate_admins,
+    'generate_orders': bench_generate_orders,
+    'generate_orders_vectorized': bench_generate_orders_vectorized,
+    'encode_orders_dict': bench_encode_orders_dict,
+    'encode_orders_raw': bench_encode_orders_raw,
+    'insert_orders': bench_insert_orders,
+}
+
+def run_case(case, scale, target, seed):
+    """Run one benchmark case and return its result; meant to run in a fresh process"""
+    rng = random.Random(seed)
+    start_time = time.perf_counter()
+    functions = BENCHMARKS[case](scale, rng, target)
+    elapsed = time.perf_counter() - start_time
+    peak_rss = peak_rss_mb()
+    
+    return {
+        'case': case,
+        'scale': scale,
+        'seconds': round(elapsed, 4),
+        'docs_per_sec': round(scale / elapsed, 1) if elapsed > 0 else None,
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+        'functions': {name: round(seconds, 4) for name, seconds in functions.items()},
+    }
+
+def run_benchmarks(cases=None, scales=None, target='auto', seed=0):
+    """
+    Run every case at every scale, each in a process of its own so peak RSS
+    belongs to that case alone, and return the results document
+    """
+    target = resolve_target(target)
+    cases = cases or [case for case in BENCHMARKS if case != 'generate_orders_vectorized' or np is not None]
+    scales = scales or DEFAULT_SCALES
+    
+    results = []
+    for scale in scales:
+        for case in cases:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_case, case, scale, target, seed).result()
+            results.append(result)
+            print(f"{case:<28}{scale:>10,}{result['docs_per_sec'] or 0:>14,.0f} docs/sec"
+                  f"{result['peak_rss_mb'] or 0:>10.1f} MB  {result['seconds']:.2f}s")
+    
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'target': target,
+        'seed': seed,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__ if np is not None else None,
+        'results': results,
+    }
+
+def save_results(report, output=None):
+    """Write the results document as JSON and return its path"""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    return output
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def find_regressions(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare docs/sec of the cases both reports ran, print the change of each
+    and return the (case, scale, slowdown) entries slower than threshold.
+    Peak RSS and per-function times are saved but not compared.
+    """
+    previous = {(result['case'], result['scale']): result for result in baseline['results']}
+    
+    regressions = []
+    print("\nRegressions are judged on docs/sec only; peak RSS and per-function times are not compared")
+    print(f"\n{'Case':<28}{'Scale':>10}{'Baseline':>14}{'Current':>14}{'Change':>9}")
+    for result in current['results']:
+        before = previous.get((result['case'], result['scale']))
+        if not before or not before['docs_per_sec'] or not result['docs_per_sec']:
+            continue
+        
+        # Slowdown is how much longer the same work takes now
+        slowdown = before['docs_per_sec'] / result['docs_per_sec'] - 1
+        flag = '  REGRESSION' if slowdown > threshold else ''
+        print(f"{result['case']:<28}{result['scale']:>10,}{before['docs_per_sec']:>14,.0f}"
+              f"{result['docs_per_sec']:>14,.0f}{-slowdown:>+9.1%}{flag}")
+        if slowdown > threshold:
+            regressions.append((result['case'], result['scale'], slowdown))
+    
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the data generators and the insert path")
+    parser.add_argument('--cases', nargs='+', choices=list(BENCHMARKS), default=None,
+                        help="Benchmark cases to run (default: all available)")
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES,
+                        help="Documents generated per case (default: 1000 100000 1000000)")
+    parser.add_argument('--target', choices=BENCHMARK_TARGETS, default='auto',
+                        help="Database for the insert benchmarks; 'auto' uses a local mongod when one answers (default: auto)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed of every case, so runs generate the same data (default: 0)")
+    parser.add_argument('--output', default=None,
+                        help="JSON file for the results (default: .cache/benchmarks/benchmark-<time>.json)")
+    parser.add_argument('--baseline', default=None,
+                        help="Results file to compare docs/sec against; exits with status 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Slowdown that counts as a regression, e.g. 0.1 for 10%% (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), default=None,
+                        help="Compare two saved results files instead of running benchmarks")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.compare:
+        baseline, current = (load_results(path) for path in args.compare)
+    else:
+        current = run_benchmarks(args.cases, args.scales, args.target, args.seed)
+        print(f"\nSaved results to {save_results(current, args.output)}")
+        baseline = load_results(args.baseline) if args.baseline else None
+    
+    if baseline is not None:
+        regressions = find_regressions(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0%}")
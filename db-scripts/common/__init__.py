@@ -0,0 +1 @@
+# Shared seeding utilities package
@@ -0,0 +1,296 @@
+import os
+import json
+import base64
+import hashlib
+import requests
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+from bson.binary import Binary
+from pymongo import UpdateOne
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from common.connection import write_count
+from common.instrumentation import count
+
+# Collection holding each distinct image once, keyed by the SHA-256 of its bytes
+ASSETS_COLLECTION = 'assets'
+
+# Documents in 'assets' mode carry "asset:<sha256>" instead of the base64 image
+ASSET_REFERENCE_PREFIX = 'asset:'
+
+# How seeded documents store their images
+# - inline: the base64 image is embedded in every document (what the dashboard reads today)
+# - assets: the image is stored once in the assets collection and documents reference it
+IMAGE_STORAGE_MODES = ['inline', 'assets']
+
+# On-disk cache of downloaded images, stored by content hash, with an index of their source URLs
+ASSET_CACHE_DIR = os.getenv(
+    'ASSET_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'assets')
+)
+ASSET_CACHE_INDEX = 'index.json'
+
+# (connect, read) timeouts for image downloads, in seconds
+DOWNLOAD_TIMEOUT = (3.05, 15)
+
+# An encoded image: content hash, MIME type, raw bytes and base64 text
+Asset = namedtuple('Asset', ['sha256', 'content_type', 'data', 'base64'])
+
+# Assets already encoded in this process, keyed by content hash
+_asset_cache = {}
+
+def asset_from_bytes(data, content_type='image/jpeg'):
+    """
+    Build the asset for some image bytes, encoding each distinct image only once
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    asset = _asset_cache.get(digest)
+    if asset is None:
+        asset = Asset(digest, content_type, data, base64.b64encode(data).decode('utf-8'))
+        _asset_cache[digest] = asset
+    return asset
+
+def asset_from_base64(value, content_type='image/jpeg'):
+    """
+    Build the asset for a base64 image, accepting 'data:<type>;base64,' URLs as well
+    """
+    if value.startswith('data:') and ',' in value:
+        header, value = value.split(',', 1)
+        content_type = header[len('data:'):].split(';', 1)[0] or content_type
+    return asset_from_bytes(base64.b64decode(value), content_type)
+
+@lru_cache(maxsize=None)
+def load_file_asset(path, content_type='image/jpeg'):
+    """
+    Read and encode an image file once per process
+    """
+    with open(path, 'rb') as image_file:
+        return asset_from_bytes(image_file.read(), content_type)
+
+def _cache_path(digest):
+    """
+    Location of a cached asset, fanned out by the first two hex digits of its hash
+    """
+    return os.path.join(ASSET_CACHE_DIR, digest[:2], digest)
+
+def _load_cache_index():
+    try:
+        with open(os.path.join(ASSET_CACHE_DIR, ASSET_CACHE_INDEX), 'r', encoding='utf-8') as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache_index(index):
+    os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+    index_path = os.path.join(ASSET_CACHE_DIR, ASSET_CACHE_INDEX)
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, indent=2, sort_keys=True)
+    os.replace(temp_path, index_path)
+
+def read_cached_asset(digest, content_type='image/jpeg'):
+    """
+    Load an asset from the on-disk cache, or None when it is missing or corrupted
+    """
+    try:
+        with open(_cache_path(digest), 'rb') as cached_file:
+            data = cached_file.read()
+    except OSError:
+        return None
+    
+    if hashlib.sha256(data).hexdigest() != digest:
+        return None
+    return asset_from_bytes(data, content_type)
+
+def write_cached_asset(asset, url=None):
+    """
+    Save an asset to the on-disk cache and remember which URL it came from
+    """
+    path = _cache_path(asset.sha256)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as cached_file:
+            cached_file.write(asset.data)
+        os.replace(temp_path, path)
+    
+    if url:
+        index = _load_cache_index()
+        index[url] = {'sha256': asset.sha256, 'content_type': asset.content_type}
+        _save_cache_index(index)
+
+@lru_cache(maxsize=None)
+def get_http_session():
+    """
+    Pooled HTTP session with retries, shared by every download in the process
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = 'ecommerce-admin-dashboard-db-scripts'
+    return session
+
+def fetch_url_asset(url, fallback_paths=(), offline=False, timeout=DOWNLOAD_TIMEOUT):
+    """
+    Get the image at url, from the on-disk cache when it was fetched before.
+    Offline, the bundled fallback files are preferred and the network is never used.
+    When the download fails the first bundled file is cached for url instead,
+    so later runs do not wait on the network again. Returns None when no source is available.
+    """
+    bundled = [path for path in fallback_paths if os.path.exists(path)]
+    if offline and bundled:
+        return load_file_asset(bundled[0])
+    
+    entry = _load_cache_index().get(url)
+    if entry:
+        asset = read_cached_asset(entry['sha256'], entry.get('content_type', 'image/jpeg'))
+        if asset:
+            return asset
+    
+    if not offline:
+        try:
+            response = get_http_session().get(url, timeout=timeout)
+            if response.raw is not None and response.raw.retries is not None:
+                count('http.retries', len(response.raw.retries.history))
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', 'image/jpeg').split(';', 1)[0]
+            asset = asset_from_bytes(response.content, content_type)
+            write_cached_asset(asset, url)
+            return asset
+        except requests.RequestException as e:
+            count('http.failed_downloads')
+            print(f"Error downloading {url}: {e}")
+    
+    if bundled:
+        asset = load_file_asset(bundled[0])
+        if not offline:
+            write_cached_asset(asset, url)
+        return asset
+    return None
+
+def asset_reference(asset):
+    """
+    Reference stored in a document in place of the image itself
+    """
+    return ASSET_REFERENCE_PREFIX + asset.sha256
+
+def is_asset_reference(value):
+    """
+    Tell whether an image field already holds an asset reference
+    """
+    return isinstance(value, str) and value.startswith(ASSET_REFERENCE_PREFIX)
+
+def store_asset(db, asset):
+    """
+    Store an asset in the assets collection unless an identical one is already there
+    """
+    db[ASSETS_COLLECTION].update_one(
+        {'_id': asset.sha256},
+        {'$setOnInsert': {
+            'sha256': asset.sha256,
+            'content_type': asset.content_type,
+            'size': len(asset.data),
+            'data': Binary(asset.data),
+            'createdAt': datetime.now(timezone.utc),
+        }},
+        upsert=True
+    )
+
+def image_field_value(db, asset, storage='inline'):
+    """
+    Value to put in a document's image field for the given storage mode,
+    storing the asset first when documents will only reference it
+    """
+    if storage not in IMAGE_STORAGE_MODES:
+        raise ValueError(f"Unknown image storage '{storage}', expected one of {IMAGE_STORAGE_MODES}")
+    
+    if storage == 'assets':
+        store_asset(db, asset)
+        return asset_reference(asset)
+    return asset.base64
+
+def backfill_inline_images(db, collection_name, field, batch_size=500):
+    """
+    Move the inline base64 images of a collection into the assets collection,
+    replacing them with references. Returns (documents converted, distinct assets).
+    """
+    collection = db[collection_name]
+    stored = set()
+    converted = 0
+    updates = []
+    
+    # Only inline images are selected: no references and no plain URLs
+    query = {field: {'$type': 'string', '$not': {'$regex': f'^({ASSET_REFERENCE_PREFIX}|https?://)'}, '$ne': ''}}
+    
+    for document in collection.find(query, {field: 1}, batch_size=batch_size):
+        try:
+            asset = asset_from_base64(document[field])
+        except (ValueError, TypeError) as e:
+            print(f"Skipping {collection_name} {document['_id']}: {e}")
+            continue
+        
+        if asset.sha256 not in stored:
+            store_asset(db, asset)
+            stored.add(asset.sha256)
+            
+            # Keep only the hash once the asset is stored so the cache does not grow with the backfill
+            _asset_cache.pop(asset.sha256, None)
+        
+        updates.append(UpdateOne({'_id': document['_id']}, {'$set': {field: asset_reference(asset)}}))
+        if len(updates) >= batch_size:
+            converted += write_count(collection.bulk_write(updates, ordered=False), len(updates), 'modified_count')
+            updates = []
+    
+    if updates:
+        converted += write_count(collection.bulk_write(updates, ordered=False), len(updates), 'modified_count')
+    
+    return converted, len(stored)
+
+def restore_inline_images(db, collection_name, field, batch_size=500):
+    """
+    Put the base64 images back into the documents of a collection that reference
+    the assets collection, undoing backfill_inline_images. References to missing
+    assets are left as they are. Returns (documents restored, missing references).
+    """
+    collection = db[collection_name]
+    images = {}
+    restored = 0
+    missing = 0
+    updates = []
+    
+    query = {field: {'$regex': f'^{ASSET_REFERENCE_PREFIX}'}}
+    
+    for document in collection.find(query, {field: 1}, batch_size=batch_size):
+        digest = document[field][len(ASSET_REFERENCE_PREFIX):]
+        if digest not in images:
+            stored = db[ASSETS_COLLECTION].find_one({'_id': digest}, {'data': 1})
+            images[digest] = base64.b64encode(bytes(stored['data'])).decode('utf-8') if stored else None
+        
+        if images[digest] is None:
+            missing += 1
+            continue
+        
+        # Match the reference it replaces so documents updated meanwhile are left alone
+        updates.append(UpdateOne({'_id': document['_id'], field: document[field]}, {'$set': {field: images[digest]}}))
+        if len(updates) >= batch_size:
+            restored += write_count(collection.bulk_write(updates, ordered=False), len(updates), 'modified_count')
+            updates = []
+    
+    if updates:
+        restored += write_count(collection.bulk_write(updates, ordered=False), len(updates), 'modified_count')
+    
+    return restored, missing
+
+def add_image_storage_args(parser):
+    """
+    Add the --image-storage option to a populate script's argument parser
+    """
+    parser.add_argument('--image-storage', choices=IMAGE_STORAGE_MODES, default='inline',
+                        help="Embed images in every document or store them once in the "
+                             f"'{ASSETS_COLLECTION}' collection and reference them (default: inline). "
+                             "Referenced images need a backend that resolves them; "
+                             "assets/backfill_assets.py --restore-inline puts them back inline")
+    return parser
@@ -0,0 +1,97 @@
+import zlib
+import random
+from array import array
+
+from common.sampling import AliasSampler, np
+
+# Share of orders holding 1, 2, 3, ... distinct products
+DEFAULT_BASKET_SIZE_WEIGHTS = [0.50, 0.25, 0.12, 0.07, 0.04, 0.02]
+
+# Exponent s of the Zipf popularity: the product of rank r is drawn in proportion
+# to 1 / r^s, so a few products are hot and the rest form a long tail (0 = uniform)
+DEFAULT_ZIPF_EXPONENT = 1.0
+
+# Times a product already in the basket is redrawn before the line is dropped
+MAX_REDRAWS = 8
+
+def popularity_ranks(product_ids):
+    """
+    Rank of every product, from a hash of its id: the same products are hot in
+    every run and worker, whatever order the catalog was fetched in
+    """
+    hashes = array('I', (zlib.crc32(str(product_id).encode('utf-8')) for product_id in product_ids))
+    ranks = array('I', bytes(hashes.itemsize * len(hashes)))
+    for rank, index in enumerate(sorted(range(len(hashes)), key=hashes.__getitem__)):
+        ranks[index] = rank
+    return ranks
+
+class BasketSampler:
+    """
+    Draws the catalog indices of the products of an order: a basket size from the
+    size weights, then that many distinct products following a Zipf popularity over
+    the catalog. Both draws use alias tables, so each costs O(1) whatever the size
+    of the catalog.
+    """
+    
+    def __init__(self, catalog, size_weights=None, zipf_exponent=DEFAULT_ZIPF_EXPONENT):
+        if not catalog:
+            raise ValueError("BasketSampler needs at least one product")
+        size_weights = list(size_weights or DEFAULT_BASKET_SIZE_WEIGHTS)
+        
+        self.product_count = len(catalog)
+        # What the sampler was built from, e.g. to key checkpoints and snapshots by it
+        self.settings = {'size_weights': size_weights, 'zipf_exponent': zipf_exponent}
+        self.sizes = AliasSampler(size_weights)
+        self.popularity = AliasSampler([1.0 / (rank + 1) ** zipf_exponent for rank in popularity_ranks(catalog.ids)])
+    
+    def sample(self, rng=random):
+        """
+        Draw the product indices of one basket
+        """
+        size = min(self.sizes.sample(rng) + 1, self.product_count)
+        basket = []
+        for _ in range(size):
+            for _ in range(MAX_REDRAWS + 1):
+                index = self.popularity.sample(rng)
+                if index not in basket:
+                    basket.append(index)
+                    break
+        return basket
+    
+    def sample_many(self, count, rng):
+        """
+        Draw count baskets with a numpy Generator, as the size of every basket
+        and the product indices of all their lines, basket after basket
+        """
+        sizes = np.minimum(self.sizes.sample_many(count, rng) + 1, self.product_count)
+        basket_of_line = np.repeat(np.arange(count), sizes)
+        lines = self.popularity.sample_many(int(sizes.sum()), rng)
+        
+        # Redraw lines repeating a product already earlier in their basket, then drop what is left
+        for redraw in range(MAX_REDRAWS + 1):
+            _, first = np.unique(basket_of_line * self.product_count + lines, return_index=True)
+            repeated = np.ones(len(lines), dtype=bool)
+            repeated[first] = False
+            if not repeated.any():
+                break
+            if redraw < MAX_REDRAWS:
+                lines[repeated] = self.popularity.sample_many(int(repeated.sum()), rng)
+            else:
+                lines = lines[~repeated]
+                basket_of_line = basket_of_line[~repeated]
+                sizes = np.bincount(basket_of_line, minlength=count)
+        
+        return sizes, lines
+
+def add_basket_args(parser):
+    """
+    Add the basket size and product popularity options used to build a BasketSampler
+    """
+    parser.add_argument('--basket-sizes', type=lambda value: [float(weight) for weight in value.split(',')],
+                        default=DEFAULT_BASKET_SIZE_WEIGHTS,
+                        help="Comma-separated weights of baskets of 1, 2, 3, ... distinct products "
+                             f"(default: {','.join(str(weight) for weight in DEFAULT_BASKET_SIZE_WEIGHTS)})")
+    parser.add_argument('--zipf-exponent', type=float, default=DEFAULT_ZIPF_EXPONENT,
+                        help="Skew of product popularity, 0 for uniform; higher makes the top products hotter "
+                             f"(default: {DEFAULT_ZIPF_EXPONENT})")
+    return parser
@@ -0,0 +1,247 @@
+import os
+import pickle
+import hashlib
+from array import array
+
+# On-disk copies of loaded catalogs, reused while the products collection is unchanged
+CATALOG_CACHE_DIR = os.getenv(
+    'CATALOG_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'catalog')
+)
+
+# Products per cursor batch when loading a catalog; large batches mean few round trips
+CATALOG_BATCH_SIZE = 10000
+
+# The only product fields order generation needs
+CATALOG_FIELDS = {'_id': 1, 'name': 1, 'price': 1, 'category': 1, 'stock': 1}
+
+# Bump when the cached catalog layout changes
+CATALOG_FORMAT = 1
+
+# Length of a canonical UUID string such as 1b4e28ba-2fa1-11d2-883f-0016d3cca427
+UUID_LENGTH = 36
+
+class PackedIds:
+    """
+    Product ids kept as bytes rather than one str object each. Ids made of a
+    shared prefix and a UUID, as populate_products writes them (PRODUCT-<uuid>),
+    take 16 bytes each; as soon as one id does not fit that form, every id is
+    stored as UTF-8 back to back with an array of offsets.
+    """
+    
+    def __init__(self):
+        self.prefix = None
+        self.uuids = bytearray()
+        self.data = None
+        self.offsets = None
+        self.count = 0
+    
+    def _as_uuid(self, product_id):
+        """The 16 bytes of an id in prefix + UUID form, or None"""
+        if not isinstance(product_id, str) or len(product_id) < UUID_LENGTH:
+            return None
+        if self.prefix is None:
+            self.prefix = product_id[:-UUID_LENGTH]
+        text = product_id[-UUID_LENGTH:]
+        if len(product_id) != len(self.prefix) + UUID_LENGTH or not product_id.startswith(self.prefix):
+            return None
+        if text[8] != '-' or text[13] != '-' or text[18] != '-' or text[23] != '-':
+            return None
+        digits = text.replace('-', '')
+        try:
+            packed = bytes.fromhex(digits)
+        except ValueError:
+            return None
+        # Only canonical lowercase UUIDs survive the round trip unchanged
+        return packed if len(packed) == 16 and packed.hex() == digits else None
+    
+    def _unpack_uuids(self):
+        ids = [self[index] for index in range(self.count)]
+        self.data = bytearray()
+        self.offsets = array('q', [0])
+        self.uuids = bytearray()
+        for product_id in ids:
+            self._append_text(product_id)
+    
+    def _append_text(self, product_id):
+        self.data += str(product_id).encode('utf-8')
+        self.offsets.append(len(self.data))
+    
+    def append(self, product_id):
+        if self.data is None:
+            packed = self._as_uuid(product_id)
+            if packed is not None:
+                self.uuids += packed
+                self.count += 1
+                return
+            self._unpack_uuids()
+        self._append_text(product_id)
+        self.count += 1
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, index):
+        if self.data is None:
+            digits = self.uuids[16 * index:16 * index + 16].hex()
+            return f"{self.prefix}{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+    
+    def __iter__(self):
+        return (self[index] for index in range(self.count))
+    
+    def buffers(self):
+        """The raw storage, to fingerprint or measure it"""
+        if self.data is None:
+            return [(self.prefix or '').encode('utf-8'), bytes(self.uuids)]
+        return [bytes(self.data), self.offsets.tobytes()]
+
+class InternedStrings:
+    """
+    A column of strings that repeat a lot (product names, categories), stored as
+    an array of codes into a table holding every distinct value once
+    """
+    
+    def __init__(self):
+        self.values = []
+        self.codes = array('I')
+        self._lookup = {}
+    
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+    
+    def __getstate__(self):
+        # The lookup is only needed while appending and is rebuilt from the values
+        return {'values': self.values, 'codes': self.codes}
+    
+    def __setstate__(self, state):
+        self.values = state['values']
+        self.codes = state['codes']
+        self._lookup = {value: code for code, value in enumerate(self.values)}
+
+class ProductCatalog:
+    """
+    The products orders are drawn from, as compact columns indexed by product
+    position: packed ids, interned names and categories, prices and stock in
+    typed arrays. A catalog of millions of products takes tens of megabytes,
+    where a list of product dicts takes gigabytes.
+    """
+    
+    def __init__(self):
+        self.ids = PackedIds()
+        self.names = InternedStrings()
+        self.categories = InternedStrings()
+        self.prices = array('d')
+        self.stock = array('q')
+    
+    @classmethod
+    def from_products(cls, products):
+        """A catalog of product documents already in memory"""
+        catalog = cls()
+        for product in products:
+            catalog.append(product)
+        return catalog
+    
+    def append(self, product):
+        self.ids.append(product['_id'])
+        self.names.append(product.get('name'))
+        self.categories.append(product.get('category'))
+        self.prices.append(float(product.get('price') or 0))
+        self.stock.append(int(product.get('stock') or 0))
+    
+    def __len__(self):
+        return len(self.prices)
+    
+    def product(self, index):
+        """The product at index as a dict, for code that wants a whole product"""
+        return {
+            '_id': self.ids[index],
+            'name': self.names[index],
+            'price': self.prices[index],
+            'category': self.categories[index],
+            'stock': self.stock[index],
+        }
+    
+    def nbytes(self):
+        """Approximate memory held by the catalog's columns"""
+        columns = self.ids.buffers() + [
+            self.names.codes.tobytes(), self.categories.codes.tobytes(), self.prices.tobytes(), self.stock.tobytes()
+        ]
+        return sum(len(column) for column in columns) + sum(
+            len(value or '') + 50 for value in self.names.values + self.categories.values
+        )
+    
+    def fingerprint(self, include_stock=False):
+        """SHA-256 of everything orders copy from the products, and of their stock when it is tracked"""
+        digest = hashlib.sha256()
+        columns = self.ids.buffers() + [
+            repr(self.names.values).encode('utf-8'), self.names.codes.tobytes(),
+            repr(self.categories.values).encode('utf-8'), self.categories.codes.tobytes(),
+            self.prices.tobytes(),
+        ]
+        if include_stock:
+            columns.append(self.stock.tobytes())
+        for column in columns:
+            digest.update(len(column).to_bytes(8, 'little'))
+            digest.update(column)
+        return digest.hexdigest()
+
+def catalog_cache_path(collection):
+    """
+    Where the cached catalog of a products collection lives. The path changes
+    whenever the collection gains or loses products or one of them is updated,
+    as long as writers keep updatedAt current. Both are read from metadata and
+    the updatedAt index, so computing the path never scans the products.
+    """
+    latest = next(iter(collection.find({}, {'updatedAt': 1}).sort('updatedAt', -1).limit(1)), {})
+    key = hashlib.sha256(repr((
+        CATALOG_FORMAT, collection.database.name, collection.name,
+        collection.estimated_document_count(), str(latest.get('updatedAt')),
+    )).encode('utf-8')).hexdigest()
+    return os.path.join(CATALOG_CACHE_DIR, f"{collection.name}-{key[:16]}.pickle")
+
+def load_catalog(collection, batch_size=CATALOG_BATCH_SIZE, cache=False):
+    """
+    Stream a products collection into a ProductCatalog with a cursor of large
+    batches. With cache, the catalog is read from or saved to CATALOG_CACHE_DIR.
+    """
+    path = catalog_cache_path(collection) if cache else None
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Ignoring unreadable catalog cache {path}: {e}")
+    
+    catalog = ProductCatalog()
+    for product in collection.find({}, CATALOG_FIELDS, batch_size=batch_size):
+        catalog.append(product)
+    
+    if path:
+        os.makedirs(CATALOG_CACHE_DIR, exist_ok=True)
+        # Written under a temporary name so a crash never leaves half a cache behind
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+    
+    return catalog
+
+def add_catalog_args(parser):
+    """
+    Add the product catalog options to a script's argument parser
+    """
+    parser.add_argument('--catalog-cache', action='store_true',
+                        help="Reuse the product catalog saved on disk by an earlier run while the products are unchanged")
+    parser.add_argument('--catalog-batch-size', type=int, default=CATALOG_BATCH_SIZE,
+                        help=f"Products per cursor batch when loading the catalog (default: {CATALOG_BATCH_SIZE})")
+    return parser
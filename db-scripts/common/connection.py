@@ -0,0 +1,266 @@
+import os
+import threading
+from collections import namedtuple
+from pymongo import MongoClient, monitoring
+
+# Settings of the shared client; None keeps the driver default.
+# w and journal are the write concern of every write: seeding data that can be
+# regenerated does not need to wait for a majority or the journal.
+ConnectionOptions = namedtuple('ConnectionOptions', [
+    'pool_size', 'w', 'journal', 'compressors', 'retry_writes', 'server_timeout_ms'
+])
+
+DEFAULT_WRITE_W = '1'
+DEFAULT_SERVER_TIMEOUT_MS = 10000
+
+# Wire compressors in order of preference; zstd and snappy need an extra package
+COMPRESSOR_MODULES = {
+    'zstd': 'zstandard',
+    'snappy': 'snappy',
+    'zlib': 'zlib',
+}
+
+def available_compressors():
+    """The wire compressors whose Python package is installed, best first"""
+    available = []
+    for name, module in COMPRESSOR_MODULES.items():
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+def parse_compressors(value):
+    """
+    Compressors from the command line: 'none', 'auto' (every available one)
+    or a comma-separated list such as 'zstd,zlib'
+    """
+    if value is None or value == 'none':
+        return None
+    if value == 'auto':
+        return ','.join(available_compressors())
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in COMPRESSOR_MODULES]
+    if unknown:
+        raise ValueError(f"Unknown compressors {unknown}, expected some of {list(COMPRESSOR_MODULES)}")
+    return ','.join(names)
+
+class ConnectionStats(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """
+    Connections opened and closed and round trips per command of this process's
+    clients, with their total and slowest duration
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        # command name -> [round trips, total ms, slowest ms, failures]
+        self.commands = {}
+    
+    def _round_trip(self, event, failed):
+        milliseconds = event.duration_micros / 1000
+        with self.lock:
+            command = self.commands.get(event.command_name)
+            if command is None:
+                command = self.commands[event.command_name] = [0, 0.0, 0.0, 0]
+            command[0] += 1
+            command[1] += milliseconds
+            command[2] = max(command[2], milliseconds)
+            command[3] += failed
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        self._round_trip(event, False)
+    
+    def failed(self, event):
+        self._round_trip(event, True)
+    
+    def connection_created(self, event):
+        with self.lock:
+            self.connections_created += 1
+    
+    def connection_closed(self, event):
+        with self.lock:
+            self.connections_closed += 1
+    
+    def connection_checked_out(self, event):
+        with self.lock:
+            self.checkouts += 1
+    
+    # Pool events the stats do not need
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_check_out_started(self, event):
+        pass
+    
+    def connection_check_out_failed(self, event):
+        pass
+    
+    def connection_checked_in(self, event):
+        pass
+    
+    def snapshot(self):
+        with self.lock:
+            return {
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'checkouts': self.checkouts,
+                'commands': {name: list(command) for name, command in self.commands.items()},
+            }
+    
+    def merge(self, snapshot):
+        """Add the stats of a worker process"""
+        with self.lock:
+            self.connections_created += snapshot['connections_created']
+            self.connections_closed += snapshot['connections_closed']
+            self.checkouts += snapshot['checkouts']
+            for name, (round_trips, total_ms, slowest_ms, failures) in snapshot['commands'].items():
+                command = self.commands.setdefault(name, [0, 0.0, 0.0, 0])
+                command[0] += round_trips
+                command[1] += total_ms
+                command[2] = max(command[2], slowest_ms)
+                command[3] += failures
+
+# The connection settings and stats of this process; worker processes get the
+# settings and send their stats back through run_sharded
+CONNECTION_OPTIONS = ConnectionOptions(None, DEFAULT_WRITE_W, False, None, None, DEFAULT_SERVER_TIMEOUT_MS)
+CONNECTION_STATS = ConnectionStats()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def configure_connection(options):
+    """Set the options of the clients get_client creates from now on"""
+    global CONNECTION_OPTIONS
+    CONNECTION_OPTIONS = options
+
+def connection_options():
+    return CONNECTION_OPTIONS
+
+def client_options(options=None):
+    """Keyword arguments for MongoClient (or motor's client) from connection options"""
+    options = options or CONNECTION_OPTIONS
+    kwargs = {'event_listeners': [CONNECTION_STATS]}
+    if options.w is not None:
+        kwargs['w'] = int(options.w) if str(options.w).isdigit() else options.w
+    if options.journal is not None:
+        kwargs['journal'] = options.journal
+    if options.pool_size is not None:
+        kwargs['maxPoolSize'] = options.pool_size
+    if options.compressors:
+        kwargs['compressors'] = options.compressors
+    if options.retry_writes is not None:
+        kwargs['retryWrites'] = options.retry_writes
+    if options.server_timeout_ms is not None:
+        kwargs['serverSelectionTimeoutMS'] = options.server_timeout_ms
+    return kwargs
+
+def get_client(uri):
+    """
+    The shared client of this process for uri, created on first use. Every
+    script, stage and in-process shard writes through it, so its connection
+    pool is reused; a forked worker process gets a client of its own.
+    """
+    key = (os.getpid(), uri)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = MongoClient(uri, **client_options())
+        return client
+
+def write_count(result, sent, *counts):
+    """
+    Sum the given counts of a write result, e.g. 'upserted_count' and 'matched_count'.
+    Unacknowledged writes (--write-w 0) report no counts, so the number of
+    documents or operations sent is returned for them instead.
+    """
+    if not result.acknowledged:
+        return sent
+    return sum(getattr(result, name) for name in counts)
+
+def close_clients():
+    """Close every shared client of this process"""
+    with _clients_lock:
+        for (pid, _), client in list(_clients.items()):
+            if pid == os.getpid():
+                client.close()
+        _clients.clear()
+
+def connection_summary():
+    """Connection and round-trip totals of this process and its workers"""
+    snapshot = CONNECTION_STATS.snapshot()
+    round_trips = sum(command[0] for command in snapshot['commands'].values())
+    total_ms = sum(command[1] for command in snapshot['commands'].values())
+    return {
+        'connections_created': snapshot['connections_created'],
+        'checkouts': snapshot['checkouts'],
+        'round_trips': round_trips,
+        'mean_round_trip_ms': round(total_ms / round_trips, 2) if round_trips else None,
+        'commands': {
+            name: {
+                'round_trips': round_trips,
+                'mean_ms': round(total_ms / round_trips, 2),
+                'slowest_ms': round(slowest_ms, 2),
+                'failures': failures,
+            }
+            for name, (round_trips, total_ms, slowest_ms, failures) in sorted(snapshot['commands'].items())
+        },
+    }
+
+def print_connection_stats():
+    """Print the connection and round-trip totals, if anything went over the wire"""
+    summary = connection_summary()
+    if not summary['round_trips']:
+        return
+    print(f"\nMongoDB: {summary['connections_created']} connections opened, {summary['round_trips']} round trips "
+          f"(mean {summary['mean_round_trip_ms']:.2f} ms)")
+    for name, command in summary['commands'].items():
+        failures = f", {command['failures']} failed" if command['failures'] else ''
+        print(f"  {name:<20}{command['round_trips']:>8} round trips, mean {command['mean_ms']:.2f} ms, "
+              f"slowest {command['slowest_ms']:.2f} ms{failures}")
+
+def connection_from_args(args):
+    """Apply the connection options given on the command line"""
+    configure_connection(ConnectionOptions(
+        args.pool_size, args.write_w, args.write_journal, parse_compressors(args.compressors),
+        False if args.no_retry_writes else None, args.server_timeout_ms
+    ))
+
+def add_connection_args(parser):
+    """
+    Add the shared client options to a script's argument parser
+    """
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help="Maximum connections per server of the shared client (default: driver default, 100)")
+    parser.add_argument('--write-w', default=DEFAULT_WRITE_W,
+                        help=f"Write concern w of every write, e.g. 0, 1 or majority (default: {DEFAULT_WRITE_W})")
+    parser.add_argument('--write-journal', type=lambda value: value.lower() in ('1', 'true', 'yes'), default=False,
+                        help="Whether writes wait for the journal, true or false (default: false)")
+    parser.add_argument('--compressors', default='none',
+                        help="Wire compression: none, auto (every available one) or a list such as zstd,zlib (default: none)")
+    parser.add_argument('--no-retry-writes', action='store_true',
+                        help="Do not retry a write once after a network error or failover")
+    parser.add_argument('--server-timeout-ms', type=int, default=DEFAULT_SERVER_TIMEOUT_MS,
+                        help=f"How long to wait for a reachable server before failing (default: {DEFAULT_SERVER_TIMEOUT_MS})")
+    return parser
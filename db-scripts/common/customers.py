@@ -0,0 +1,110 @@
+import hashlib
+import random
+
+from common.catalog import CATALOG_BATCH_SIZE, PackedIds, InternedStrings
+from common.baskets import popularity_ranks
+from common.sampling import AliasSampler
+
+# The only customer fields order generation needs
+CUSTOMER_FIELDS = {'_id': 1, 'name': 1}
+
+# Exponent s of the Zipf popularity of customers: the customer of rank r places
+# orders in proportion to 1 / r^s, so a core of repeat buyers places many orders
+# and most customers only a few (0 = every customer equally likely)
+DEFAULT_CUSTOMER_ZIPF_EXPONENT = 0.8
+
+class CustomerDirectory:
+    """
+    Ids and names of the customers orders are placed by, as packed ids and
+    interned names indexed by customer position, like a ProductCatalog
+    """
+    
+    def __init__(self):
+        self.ids = PackedIds()
+        self.names = InternedStrings()
+    
+    @classmethod
+    def from_customers(cls, customers):
+        """A directory of customer documents already in memory"""
+        directory = cls()
+        for customer in customers:
+            directory.append(customer)
+        return directory
+    
+    def append(self, customer):
+        self.ids.append(customer['_id'])
+        self.names.append(customer.get('name'))
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def fingerprint(self):
+        """SHA-256 of everything orders copy from the customers"""
+        digest = hashlib.sha256()
+        for column in self.ids.buffers() + [repr(self.names.values).encode('utf-8'), self.names.codes.tobytes()]:
+            digest.update(len(column).to_bytes(8, 'little'))
+            digest.update(column)
+        return digest.hexdigest()
+
+def load_customers(collection, batch_size=CATALOG_BATCH_SIZE):
+    """Stream a customers collection into a CustomerDirectory with a cursor of large batches"""
+    directory = CustomerDirectory()
+    for customer in collection.find({}, CUSTOMER_FIELDS, batch_size=batch_size):
+        directory.append(customer)
+    return directory
+
+class CustomerSampler:
+    """
+    Draws the customer placing each order following a Zipf popularity over a
+    CustomerDirectory, with an alias table so each draw costs O(1). Customers
+    are ranked by a hash of their id, so the same customers are the regulars in
+    every run and worker.
+    """
+    
+    def __init__(self, directory, zipf_exponent=DEFAULT_CUSTOMER_ZIPF_EXPONENT):
+        if not directory:
+            raise ValueError("CustomerSampler needs at least one customer")
+        self.directory = directory
+        self.settings = {'count': len(directory), 'zipf_exponent': zipf_exponent}
+        self.popularity = AliasSampler([1.0 / (rank + 1) ** zipf_exponent for rank in popularity_ranks(directory.ids)])
+    
+    def sample(self, rng=random):
+        """Draw the index of one customer"""
+        return self.popularity.sample(rng)
+    
+    def sample_many(self, count, rng):
+        """Draw count customer indices with a numpy Generator"""
+        return self.popularity.sample_many(count, rng)
+
+def customer_stats_pipeline(customers_collection='customers'):
+    """
+    Aggregation recomputing the order count, amount spent and last order date of
+    every customer from the orders referencing it, merged into the customers
+    """
+    return [
+        {'$match': {'customer_id': {'$exists': True}}},
+        {'$group': {
+            '_id': '$customer_id',
+            'order_count': {'$sum': 1},
+            'total_spent': {'$sum': '$total'},
+            'last_order_date': {'$max': '$date'},
+        }},
+        {'$merge': {'into': customers_collection, 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'discard'}},
+    ]
+
+def refresh_customer_stats(db, orders_collection='orders', customers_collection='customers'):
+    """
+    Bring the order statistics of every customer in line with the orders, in one
+    server-side pass; customers without orders are left at zero
+    """
+    db[customers_collection].update_many({}, {'$set': {'order_count': 0, 'total_spent': 0.0, 'last_order_date': None}})
+    db[orders_collection].aggregate(customer_stats_pipeline(customers_collection), allowDiskUse=True)
+
+def add_customer_args(parser):
+    """
+    Add the customer popularity option used to build a CustomerSampler
+    """
+    parser.add_argument('--customer-zipf-exponent', type=float, default=DEFAULT_CUSTOMER_ZIPF_EXPONENT,
+                        help="Skew of how often customers order, 0 for uniform; higher makes regulars order more "
+                             f"(default: {DEFAULT_CUSTOMER_ZIPF_EXPONENT})")
+    return parser
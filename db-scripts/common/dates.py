@@ -0,0 +1,277 @@
+import random
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import accumulate
+
+from common.sampling import AliasSampler, is_numpy_rng, np
+
+# Default range of generated dates (end is exclusive)
+DEFAULT_START_DATE = date(2020, 1, 1)
+DEFAULT_END_DATE = date(2025, 1, 1)
+
+# How order dates are stored: 'string' keeps the 'YYYY-MM-DD' strings the
+# dashboard has always used, 'datetime' stores BSON dates at midnight UTC
+DATE_TYPES = ['string', 'datetime']
+
+def parse_date(value):
+    """
+    Parse a 'YYYY-MM-DD' string into a date
+    """
+    return date.fromisoformat(value)
+
+@lru_cache(maxsize=None)
+def day_datetime(day):
+    """
+    The midnight UTC datetime of a 'YYYY-MM-DD' string; there are only a few
+    thousand distinct days, so each is converted once
+    """
+    return datetime(int(day[0:4]), int(day[5:7]), int(day[8:10]), tzinfo=timezone.utc)
+
+def date_value(day, date_type='string'):
+    """
+    The stored value of a 'YYYY-MM-DD' order date for a DATE_TYPES date type
+    """
+    return day_datetime(day) if date_type == 'datetime' else day
+
+def day_key(value):
+    """
+    The 'YYYY-MM-DD' day of a stored order date of either type
+    """
+    return value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value[:10]
+
+def next_month(month):
+    """
+    The 'YYYY-MM' month after a 'YYYY-MM' month
+    """
+    year, number = (int(part) for part in month.split('-'))
+    return f"{year + 1:04d}-01" if number == 12 else f"{year:04d}-{number + 1:02d}"
+
+def month_bounds(month, date_type='string'):
+    """
+    The half-open range [first day, first day of the next month) of a 'YYYY-MM'
+    month, as a query on stored dates of the given type
+    """
+    return {'$gte': date_value(f"{month}-01", date_type), '$lt': date_value(f"{next_month(month)}-01", date_type)}
+
+def month_filter(months, field='date'):
+    """
+    Query matching the dates of field in any of the given 'YYYY-MM' months, stored
+    as either type. Range queries only match values of their own BSON type, so each
+    month and type is one bounded scan of an index on field.
+    """
+    return {'$or': [{field: month_bounds(month, date_type)} for month in months for date_type in DATE_TYPES]}
+
+class CalendarSampler:
+    """
+    Samples dates from a precomputed calendar between start (inclusive) and end (exclusive).
+    
+    Every calendar month is equally likely by default. The optional weights then skew the
+    distribution: seasonality is 12 per-month multipliers (January first), weekend_weight
+    multiplies Saturdays and Sundays, and growth is an annual growth rate applied from start.
+    """
+    
+    def __init__(self, start=DEFAULT_START_DATE, end=DEFAULT_END_DATE, seasonality=None, weekend_weight=1.0, growth=0.0):
+        if end <= start:
+            raise ValueError("The end date must be after the start date")
+        if seasonality is not None and len(seasonality) != 12:
+            raise ValueError("Seasonality needs exactly 12 monthly weights")
+        
+        self.start = start
+        self.end = end
+        # What the distribution was built from, e.g. to key cached datasets by it
+        self.settings = {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'seasonality': list(seasonality) if seasonality is not None else None,
+            'weekend_weight': weekend_weight,
+            'growth': growth,
+        }
+        self.days = [start + timedelta(days=offset) for offset in range((end - start).days)]
+        self.date_strings = [day.isoformat() for day in self.days]
+        
+        # Index range [first, last) of the days belonging to each calendar month
+        self.month_keys = []
+        self.month_ranges = []
+        for index, day in enumerate(self.days):
+            key = day.isoformat()[:7]
+            if not self.month_keys or self.month_keys[-1] != key:
+                self.month_keys.append(key)
+                self.month_ranges.append([index, index])
+            self.month_ranges[-1][1] = index + 1
+        
+        weights = []
+        for first, last in self.month_ranges:
+            for day in self.days[first:last]:
+                weight = 1.0 / (last - first)
+                if seasonality is not None:
+                    weight *= seasonality[day.month - 1]
+                if day.weekday() >= 5:
+                    weight *= weekend_weight
+                if growth:
+                    weight *= (1.0 + growth) ** ((day - start).days / 365.25)
+                weights.append(weight)
+        
+        self.sampler = AliasSampler(weights)
+        self.cumulative = list(accumulate(weights))
+        self._cumulative_array = None
+    
+    def sample_index(self, rng=random):
+        """
+        Draw the index of one day
+        """
+        return self.sampler.sample(rng)
+    
+    def sample(self, rng=random):
+        """
+        Draw one 'YYYY-MM-DD' date string
+        """
+        return self.date_strings[self.sampler.sample(rng)]
+    
+    def sample_indices(self, size, rng=random):
+        """
+        Draw size day indices
+        """
+        return self.sampler.sample_many(size, rng)
+    
+    def sample_strings(self, size, rng=random):
+        """
+        Draw size 'YYYY-MM-DD' date strings
+        """
+        return self.to_strings(self.sample_indices(size, rng))
+    
+    def to_strings(self, indices):
+        """
+        Look up the date strings for a list or array of day indices
+        """
+        date_strings = self.date_strings
+        if not isinstance(indices, list):
+            indices = indices.tolist()
+        return [date_strings[index] for index in indices]
+    
+    def sample_in_months(self, months, rng=random):
+        """
+        Draw one day index inside each of the given month positions, following the day weights
+        """
+        cumulative = self.cumulative
+        
+        if is_numpy_rng(rng):
+            if self._cumulative_array is None:
+                self._cumulative_array = np.array(cumulative)
+            ranges = np.array(self.month_ranges, dtype=np.int64)[months]
+            low = np.where(ranges[:, 0] > 0, self._cumulative_array[ranges[:, 0] - 1], 0.0)
+            high = self._cumulative_array[ranges[:, 1] - 1]
+            points = low + rng.random(len(months)) * (high - low)
+            indices = np.searchsorted(self._cumulative_array, points, side='right')
+            return np.minimum(np.maximum(indices, ranges[:, 0]), ranges[:, 1] - 1)
+        
+        indices = []
+        for month in months:
+            first, last = self.month_ranges[month]
+            low = cumulative[first - 1] if first else 0.0
+            point = low + rng.random() * (cumulative[last - 1] - low)
+            indices.append(min(max(bisect_right(cumulative, point), first), last - 1))
+        return indices
+    
+    def stream(self, total, rng=random, min_per_month=0):
+        """
+        Create a DateStream of total dates that holds at least min_per_month dates in every month
+        """
+        return DateStream(self, total, rng, min_per_month)
+
+class DateStream:
+    """
+    Emits a fixed number of dates in batches while guaranteeing a per-month minimum.
+    
+    The guaranteed dates are spread uniformly at random through the stream, so the
+    minimum holds without ever materialising or shuffling the whole stream.
+    """
+    
+    def __init__(self, calendar, total, rng=random, min_per_month=0):
+        month_count = len(calendar.month_keys)
+        
+        # Cap the minimum when there are not enough dates to cover every month
+        self.per_month = min(min_per_month, total // month_count)
+        
+        self.calendar = calendar
+        self.rng = rng
+        self.remaining = total
+        self.reserved_remaining = self.per_month * month_count
+        self.reserved_taken = 0
+    
+    def take_indices(self, size):
+        """
+        Take the next size day indices (an array for a numpy Generator, a list otherwise)
+        """
+        size = min(size, self.remaining)
+        rng = self.rng
+        
+        if is_numpy_rng(rng):
+            reserved = 0
+            if self.reserved_remaining:
+                reserved = int(rng.hypergeometric(self.reserved_remaining, self.remaining - self.reserved_remaining, size)) if size else 0
+            months = (self.reserved_taken + np.arange(reserved)) // max(self.per_month, 1)
+            indices = np.concatenate([
+                self.calendar.sample_in_months(months, rng),
+                self.calendar.sample_indices(size - reserved, rng),
+            ])
+            rng.shuffle(indices)
+        else:
+            indices = []
+            reserved = 0
+            for position in range(size):
+                # Each remaining slot holds a guaranteed date with probability reserved/remaining
+                if rng.random() * (self.remaining - position) < self.reserved_remaining - reserved:
+                    month = (self.reserved_taken + reserved) // self.per_month
+                    indices.append(self.calendar.sample_in_months([month], rng)[0])
+                    reserved += 1
+                else:
+                    indices.append(self.calendar.sample_index(rng))
+        
+        self.remaining -= size
+        self.reserved_remaining -= reserved
+        self.reserved_taken += reserved
+        return indices
+    
+    def take(self, size):
+        """
+        Take the next size 'YYYY-MM-DD' date strings
+        """
+        return self.calendar.to_strings(self.take_indices(size))
+
+def add_date_type_args(parser):
+    """
+    Add the option choosing how order dates are stored
+    """
+    parser.add_argument('--date-type', choices=DATE_TYPES, default=None,
+                        help="Store order dates as 'YYYY-MM-DD' strings or as BSON dates "
+                             "(default: string, or the type of the existing orders when adding to them)")
+    return parser
+
+def add_calendar_args(parser):
+    """
+    Add the date range and weighting options used to build a CalendarSampler
+    """
+    parser.add_argument('--start-date', type=parse_date, default=DEFAULT_START_DATE,
+                        help=f"First date that can be generated, YYYY-MM-DD (default: {DEFAULT_START_DATE})")
+    parser.add_argument('--end-date', type=parse_date, default=DEFAULT_END_DATE,
+                        help=f"Generated dates fall before this date, YYYY-MM-DD (default: {DEFAULT_END_DATE})")
+    parser.add_argument('--seasonality', type=lambda value: [float(weight) for weight in value.split(',')], default=None,
+                        help="12 comma-separated monthly weights, January first (default: flat)")
+    parser.add_argument('--weekend-weight', type=float, default=1.0,
+                        help="Weight of Saturdays and Sundays relative to weekdays (default: 1.0)")
+    parser.add_argument('--growth', type=float, default=0.0,
+                        help="Annual growth rate of the date distribution, e.g. 0.2 for +20%% a year (default: 0)")
+    return parser
+
+def calendar_from_args(args):
+    """
+    Build a CalendarSampler from the options added by add_calendar_args
+    """
+    return CalendarSampler(
+        start=args.start_date,
+        end=args.end_date,
+        seasonality=args.seasonality,
+        weekend_weight=args.weekend_weight,
+        growth=args.growth,
+    )
@@ -0,0 +1,113 @@
+import re
+import math
+import random
+from reference.malaysian_names import FIRST_NAMES, LAST_NAMES
+from reference.malaysian_addresses import STREET_NAMES, STATES_AND_DISTRICTS
+
+# Extra words that can be added to usernames and emails, e.g. siti_rahman_ipoh,
+# so more admins get a plain name before numbered suffixes are needed
+IDENTITY_VOCABULARIES = {
+    'districts': [district for districts in STATES_AND_DISTRICTS.values() for district in districts],
+    'streets': STREET_NAMES,
+}
+
+# Domain of every generated email address
+EMAIL_DOMAIN = 'gmail.com'
+
+# Numbered suffix at the end of a username or email local part
+TRAILING_NUMBER = re.compile(r'[0-9]+$')
+
+def handle(word):
+    """A name or word as it appears in a username: lowercase letters and digits only"""
+    return re.sub(r'[^a-z0-9]', '', word.lower())
+
+def unique_words(words):
+    """The words whose handles are distinct, in order; the first of each handle is kept"""
+    seen = set()
+    kept = []
+    for word in words:
+        key = handle(word)
+        if key and key not in seen:
+            seen.add(key)
+            kept.append(word)
+    return kept
+
+class IdentityGenerator:
+    """
+    Unique first name, last name, username and email of every admin, derived
+    from its position in the run rather than drawn at random. Positions map onto
+    every combination of a first name, a last name and an optional vocabulary
+    word through a seeded permutation, so names still look shuffled. Once every
+    combination is taken, the next round repeats them with a numbered suffix
+    (ahmad_ali2, ahmad_ali3, ...).
+    
+    Uniqueness holds by construction, without a set of the names handed out and
+    without asking the database, so shards in separate processes never collide
+    as long as they use the same generator over distinct positions.
+    """
+    
+    def __init__(self, seed=0, vocabularies=None, first_names=FIRST_NAMES, last_names=LAST_NAMES):
+        self.first_names = unique_words(first_names)
+        self.last_names = unique_words(last_names)
+        vocabularies = list(vocabularies or [])
+        for name in vocabularies:
+            if name not in IDENTITY_VOCABULARIES:
+                raise ValueError(f"Unknown identity vocabulary {name!r}, expected one of {list(IDENTITY_VOCABULARIES)}")
+        # None stands for no word, so plain first_last names stay among the combinations
+        self.words = [None] + unique_words(word for name in vocabularies for word in IDENTITY_VOCABULARIES[name])
+        
+        self.first_handles = [handle(name) for name in self.first_names]
+        self.last_handles = [handle(name) for name in self.last_names]
+        self.word_handles = [None] + [handle(word) for word in self.words[1:]]
+        self.combinations = len(self.first_names) * len(self.last_names) * len(self.words)
+        
+        # position -> (multiplier * position + offset) mod combinations is a bijection when
+        # the multiplier is coprime with the number of combinations
+        rng = random.Random(seed)
+        multiplier = rng.randrange(1, self.combinations) if self.combinations > 1 else 1
+        while math.gcd(multiplier, self.combinations) != 1:
+            multiplier += 1
+        self.multiplier = multiplier
+        self.offset = rng.randrange(self.combinations)
+    
+    def first_position(self, round_number):
+        """Position of the first identity of a round"""
+        return round_number * self.combinations
+    
+    def identity(self, position):
+        """First name, last name, username and email of the admin at position (0 and up)"""
+        round_number, position = divmod(position, self.combinations)
+        combination = (self.multiplier * position + self.offset) % self.combinations
+        combination, word_index = divmod(combination, len(self.words))
+        first_index, last_index = divmod(combination, len(self.last_names))
+        
+        parts = [self.first_handles[first_index], self.last_handles[last_index]]
+        if word_index:
+            parts.append(self.word_handles[word_index])
+        # Handles hold no separators, so the suffix can follow the last part directly
+        suffix = str(round_number + 1) if round_number else ''
+        return (
+            self.first_names[first_index], self.last_names[last_index],
+            '_'.join(parts) + suffix, f"{'.'.join(parts)}{suffix}@{EMAIL_DOMAIN}",
+        )
+
+def first_free_round(names):
+    """
+    First round of identities whose numbered suffix is above that of every given
+    username or email, so identities from that round on cannot collide with them
+    whatever seed or vocabularies produced them; an unnumbered name counts as 1
+    """
+    highest = 0
+    for name in names:
+        number = TRAILING_NUMBER.search(name.split('@')[0])
+        highest = max(highest, int(number.group()) if number else 1)
+    return highest
+
+def add_identity_args(parser):
+    """
+    Add the admin identity options to a script's argument parser
+    """
+    parser.add_argument('--identity-vocabularies', nargs='+', choices=list(IDENTITY_VOCABULARIES), default=None,
+                        help="Extra words combined with the names in usernames and emails, so more admins "
+                             "get unnumbered ones (default: names only)")
+    return parser
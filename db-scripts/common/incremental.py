@@ -0,0 +1,161 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+from pymongo import ReplaceOne
+from common.connection import write_count
+
+# How a populate script treats the documents already in its collection:
+# - replace: clear the collection first (the original behaviour)
+# - append: add --count new documents
+# - top-up: add documents until the collection holds --count documents
+WRITE_MODES = ['replace', 'append', 'top-up']
+
+# Progress of interrupted seeding runs, one document per seeded collection
+CHECKPOINTS_COLLECTION = 'seed_checkpoints'
+
+# Settings a run needs to regenerate exactly the same documents, and the batches each shard has written
+Checkpoint = namedtuple('Checkpoint', ['name', 'settings', 'batches_done', 'resumed'])
+
+def collection_type(db, name):
+    """
+    Type of an existing collection ('collection', 'timeseries' or 'view'), None when there is none
+    """
+    try:
+        for info in db.list_collections(filter={'name': name}):
+            return info.get('type', 'collection')
+    except NotImplementedError:
+        # In-process stand-ins such as mongomock only have regular collections
+        return 'collection' if name in db.list_collection_names() else None
+    return None
+
+def reset_collection(db, name, fast=False, timeseries=None):
+    """
+    Empty a collection. The fast reset drops and recreates it instead of
+    deleting documents one by one, which also drops its indexes.
+    With timeseries options it is recreated as a time-series collection, and a
+    time-series collection reset without them becomes a regular one again.
+    """
+    if fast or timeseries or collection_type(db, name) == 'timeseries':
+        db.drop_collection(name)
+        if timeseries:
+            db.create_collection(name, timeseries=timeseries)
+        else:
+            db.create_collection(name)
+    else:
+        db[name].delete_many({})
+
+def clear_checkpoint(db, name):
+    """
+    Forget the checkpoint of a collection so its run cannot be resumed
+    """
+    db[CHECKPOINTS_COLLECTION].delete_one({'_id': name})
+
+def write_batch(collection, documents, upsert=False):
+    """
+    Write a batch of documents and return how many were written. Upserts replace
+    documents by _id, so writing the same batch twice leaves a single copy.
+    """
+    if not documents:
+        return 0
+    
+    # inserted_ids leaves out RawBSONDocuments, but an unordered insert_many
+    # that does not raise has written every document
+    if not upsert:
+        collection.insert_many(documents, ordered=False)
+        return len(documents)
+    
+    result = collection.bulk_write(
+        [ReplaceOne({'_id': document['_id']}, document, upsert=True) for document in documents],
+        ordered=False
+    )
+    return write_count(result, len(documents), 'upserted_count', 'matched_count')
+
+def open_checkpoint(db, name, settings, resume=False):
+    """
+    Start a checkpointed run for a collection. With resume, an unfinished checkpoint
+    is picked up and its stored settings replace the given ones, so the same
+    documents are regenerated and the batches already written are skipped.
+    """
+    checkpoints = db[CHECKPOINTS_COLLECTION]
+    
+    if resume:
+        existing = checkpoints.find_one({'_id': name, 'completed': False})
+        if existing:
+            batches_done = {int(index): done for index, done in existing.get('batches_done', {}).items()}
+            print(f"Resuming {name} from checkpoint ({sum(batches_done.values())} batches already written)")
+            return Checkpoint(name, existing['settings'], batches_done, True)
+        print(f"No unfinished checkpoint for {name}, starting a new run")
+    
+    now = datetime.now(timezone.utc)
+    checkpoints.replace_one(
+        {'_id': name},
+        {'_id': name, 'settings': settings, 'batches_done': {}, 'completed': False, 'createdAt': now, 'updatedAt': now},
+        upsert=True
+    )
+    return Checkpoint(name, settings, {}, False)
+
+def batches_done(checkpoint, shard_index):
+    """
+    Number of batches a shard already wrote before the run was interrupted
+    """
+    if checkpoint is None:
+        return 0
+    return checkpoint.batches_done.get(shard_index, 0)
+
+def record_batch(db, checkpoint, shard_index, done):
+    """
+    Remember that a shard has written its first `done` batches
+    """
+    if checkpoint is None:
+        return
+    db[CHECKPOINTS_COLLECTION].update_one(
+        {'_id': checkpoint.name},
+        {'$set': {f'batches_done.{shard_index}': done, 'updatedAt': datetime.now(timezone.utc)}}
+    )
+
+def record_months(db, checkpoint, months):
+    """
+    Remember the 'YYYY-MM' months a shard has written documents in
+    """
+    if checkpoint is None or not months:
+        return
+    db[CHECKPOINTS_COLLECTION].update_one(
+        {'_id': checkpoint.name},
+        {'$addToSet': {'months': {'$each': sorted(months)}}}
+    )
+
+def written_months(db, checkpoint):
+    """
+    The 'YYYY-MM' months the shards of a run have recorded, in order
+    """
+    document = db[CHECKPOINTS_COLLECTION].find_one({'_id': checkpoint.name}, {'months': 1})
+    return sorted(document.get('months', [])) if document else []
+
+def complete_checkpoint(db, checkpoint):
+    """
+    Mark a run as finished so it is not resumed again
+    """
+    db[CHECKPOINTS_COLLECTION].update_one(
+        {'_id': checkpoint.name},
+        {'$set': {'completed': True, 'updatedAt': datetime.now(timezone.utc)}}
+    )
+
+def documents_to_write(collection, count, mode):
+    """
+    Number of new documents a run has to generate for the given write mode
+    """
+    if mode == 'top-up':
+        return max(0, count - collection.estimated_document_count())
+    return count
+
+def add_incremental_args(parser):
+    """
+    Add the write mode, resume and fast reset options to a populate script's argument parser
+    """
+    parser.add_argument('--mode', choices=WRITE_MODES, default='replace',
+                        help="replace the collection, append --count documents, "
+                             "or top up to --count documents (default: replace)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume an interrupted run from its checkpoint, with the settings it was started with")
+    parser.add_argument('--fast-reset', action='store_true',
+                        help="In replace mode, drop and recreate the collection instead of deleting every document")
+    return parser
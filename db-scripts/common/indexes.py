@@ -0,0 +1,245 @@
+import re
+import time
+from collections import namedtuple
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from common.dates import day_key, month_filter
+
+# An index the dashboard API relies on and the reason it exists
+DashboardIndex = namedtuple('DashboardIndex', ['model', 'purpose'])
+
+# Indexes matching the list, lookup and search queries of the backend controllers.
+# Every sort field whitelisted by a controller gets an index so sort + skip/limit
+# walks the index instead of sorting the whole collection. The search fields are
+# indexed too: the controllers search with unanchored case-insensitive $regex,
+# which no index can bound, but MongoDB then matches the regex against the
+# index keys instead of fetching every (image-carrying) document.
+DASHBOARD_INDEXES = {
+    'orders': [
+        DashboardIndex(IndexModel([('id', ASCENDING)], name='id_1'), "findOne({id}), sort and search by id"),
+        DashboardIndex(IndexModel([('date', DESCENDING)], name='date_-1'), "default sort, newest first"),
+        DashboardIndex(IndexModel([('customer', ASCENDING)], name='customer_1'), "sort and search by customer"),
+        DashboardIndex(IndexModel([('total', DESCENDING)], name='total_-1'), "sort by total"),
+        DashboardIndex(IndexModel([('status', ASCENDING), ('date', DESCENDING)], name='status_1_date_-1'),
+                       "sort and search by status, status breakdowns over time"),
+        DashboardIndex(IndexModel([('customer_id', ASCENDING), ('date', DESCENDING)], name='customer_id_1_date_-1'),
+                       "orders of a customer, newest first"),
+    ],
+    'products': [
+        DashboardIndex(IndexModel([('id', ASCENDING)], name='id_1'), "sort and search by id"),
+        DashboardIndex(IndexModel([('createdAt', DESCENDING)], name='createdAt_-1'), "default sort, newest first"),
+        DashboardIndex(IndexModel([('name', ASCENDING)], name='name_1'), "sort and search by name"),
+        DashboardIndex(IndexModel([('category', ASCENDING), ('createdAt', DESCENDING)], name='category_1_createdAt_-1'),
+                       "sort and search by category, newest products of a category"),
+        DashboardIndex(IndexModel([('price', ASCENDING)], name='price_1'), "sort by price"),
+        DashboardIndex(IndexModel([('stock', ASCENDING)], name='stock_1'), "sort by stock"),
+        DashboardIndex(IndexModel([('updatedAt', DESCENDING)], name='updatedAt_-1'),
+                       "latest product change, which keys the cached order catalog"),
+    ],
+    'admins': [
+        DashboardIndex(IndexModel([('id', ASCENDING)], name='id_1'), "findOne({id}), sort and search by id"),
+        DashboardIndex(IndexModel([('createdAt', DESCENDING)], name='createdAt_-1'), "default sort, newest first"),
+        # The Admin model declares username and email unique, so Mongoose expects these exact indexes
+        DashboardIndex(IndexModel([('username', ASCENDING)], name='username_1', unique=True), "login checks, sort and search by username"),
+        DashboardIndex(IndexModel([('email', ASCENDING)], name='email_1', unique=True), "login, sort and search by email"),
+        DashboardIndex(IndexModel([('role', ASCENDING)], name='role_1'), "sort and search by role"),
+        DashboardIndex(IndexModel([('phone_number', ASCENDING)], name='phone_number_1'), "duplicate phone number checks"),
+    ],
+    # Per-product order rollups, read one day or month at a time, best sellers first;
+    # rollup rebuilds delete the buckets of the months they rebuild through it too
+    'order_rollups_products_daily': [
+        DashboardIndex(IndexModel([('bucket', ASCENDING), ('revenue', DESCENDING)], name='bucket_1_revenue_-1'),
+                       "best-selling products of a day"),
+    ],
+    'order_rollups_products_monthly': [
+        DashboardIndex(IndexModel([('bucket', ASCENDING), ('revenue', DESCENDING)], name='bucket_1_revenue_-1'),
+                       "best-selling products of a month"),
+    ],
+    'customers': [
+        DashboardIndex(IndexModel([('id', ASCENDING)], name='id_1'), "findOne({id})"),
+        DashboardIndex(IndexModel([('email', ASCENDING)], name='email_1', unique=True), "lookup by email"),
+        DashboardIndex(IndexModel([('name', ASCENDING)], name='name_1'), "lookup and sort by name"),
+        DashboardIndex(IndexModel([('total_spent', DESCENDING)], name='total_spent_-1'), "top customers by amount spent"),
+    ],
+}
+
+# Optional text indexes over the search fields, for a $text search the API does not use yet
+TEXT_INDEXES = {
+    'orders': IndexModel([('id', TEXT), ('customer', TEXT), ('status', TEXT)], name='search_text'),
+    'products': IndexModel([('id', TEXT), ('name', TEXT), ('category', TEXT)], name='search_text'),
+    'admins': IndexModel([('id', TEXT), ('username', TEXT), ('email', TEXT), ('role', TEXT)], name='search_text'),
+}
+
+# Queries following a reference from one collection to another, which must be
+# answered from an index: (collection, description, reference field, sort)
+REFERENCE_QUERIES = [
+    ('orders', "orders of a customer", 'customer_id', [('date', DESCENDING)]),
+    ('customers', "top customers", None, [('total_spent', DESCENDING)]),
+]
+
+# Queries over one month of a date field, as charts and rollup rebuilds send them,
+# which must be bounded scans of an index on it: (collection, description, date field, sort)
+MONTH_QUERIES = [
+    ('orders', "orders of a month", 'date', [('date', DESCENDING)]),
+]
+
+# The list queries of each controller: its default sort, whitelisted sort fields and search fields
+DASHBOARD_QUERIES = {
+    'orders': {'default_sort': 'date', 'sort_fields': ['id', 'customer', 'date', 'total', 'status'],
+               'search_fields': ['id', 'customer', 'status']},
+    'products': {'default_sort': 'createdAt', 'sort_fields': ['id', 'name', 'category', 'price', 'stock', 'createdAt'],
+                 'search_fields': ['id', 'name', 'category']},
+    'admins': {'default_sort': 'createdAt', 'sort_fields': ['id', 'username', 'email', 'role', 'createdAt'],
+               'search_fields': ['id', 'username', 'email', 'role']},
+}
+
+# Result of building one index
+IndexBuild = namedtuple('IndexBuild', ['collection', 'name', 'status', 'seconds', 'size_bytes'])
+
+# Result of explaining one dashboard query
+PlanCheck = namedtuple('PlanCheck', ['collection', 'query', 'stages', 'uses_index', 'keys_examined', 'docs_examined'])
+
+def index_sizes(db, collection_name):
+    """Size in bytes of every index of a collection, or {} when the server does not report them"""
+    try:
+        return db.command({'collStats': collection_name}).get('indexSizes', {})
+    except (OperationFailure, NotImplementedError):
+        return {}
+
+def build_indexes(db, collections=None, text=False):
+    """
+    Build the dashboard indexes of the given collections one at a time and return
+    an IndexBuild for each. Run it after the bulk load: maintaining these indexes
+    during insert_many would slow every batch down. Building an index that already
+    exists is a no-op; unique indexes over duplicate seeded values are skipped.
+    """
+    builds = []
+    for collection_name in collections or DASHBOARD_INDEXES:
+        collection = db[collection_name]
+        models = [index.model for index in DASHBOARD_INDEXES[collection_name]]
+        if text and collection_name in TEXT_INDEXES:
+            models.append(TEXT_INDEXES[collection_name])
+        
+        for model in models:
+            name = model.document['name']
+            start_time = time.perf_counter()
+            try:
+                collection.create_indexes([model])
+                status = 'built'
+            except DuplicateKeyError:
+                status = 'skipped (duplicate values)'
+            except OperationFailure as e:
+                status = f"failed ({e.details.get('codeName', e.code) if e.details else e})"
+            builds.append(IndexBuild(collection_name, name, status, time.perf_counter() - start_time, None))
+        
+        sizes = index_sizes(db, collection_name)
+        builds = [
+            build._replace(size_bytes=sizes.get(build.name)) if build.collection == collection_name else build
+            for build in builds
+        ]
+    
+    return builds
+
+def dashboard_queries(collection_name, search='a'):
+    """
+    The (description, filter, sort) of each list query a controller can send:
+    the default page, every whitelisted sort and a search sorted by default
+    """
+    spec = DASHBOARD_QUERIES[collection_name]
+    queries = [(f"list by {spec['default_sort']}", {}, [(spec['default_sort'], DESCENDING)])]
+    for field in spec['sort_fields']:
+        if field != spec['default_sort']:
+            queries.append((f"sort by {field}", {}, [(field, ASCENDING)]))
+    
+    pattern = re.compile(re.escape(search), re.IGNORECASE)
+    search_filter = {'$or': [{field: {'$regex': pattern}} for field in spec['search_fields']]}
+    queries.append((f"search '{search}'", search_filter, [(spec['default_sort'], DESCENDING)]))
+    return queries
+
+def reference_queries(db, collection_name):
+    """
+    The (description, filter, sort) of each REFERENCE_QUERIES query of a collection,
+    filtering on a reference taken from one of its documents; references nobody
+    has set yet are left out
+    """
+    queries = []
+    for name, description, field, sort in REFERENCE_QUERIES:
+        if name != collection_name:
+            continue
+        if field is None:
+            queries.append((description, {}, sort))
+            continue
+        sample = db[collection_name].find_one({field: {'$exists': True}}, {field: 1})
+        if sample:
+            queries.append((description, {field: sample[field]}, sort))
+    return queries
+
+def month_queries(db, collection_name):
+    """
+    The (description, filter, sort) of each MONTH_QUERIES query of a collection,
+    over the month of its newest document, whichever type its dates are stored as;
+    left out while the collection is empty
+    """
+    queries = []
+    for name, description, field, sort in MONTH_QUERIES:
+        if name != collection_name:
+            continue
+        newest = db[collection_name].find_one({field: {'$exists': True}}, {field: 1}, sort=[(field, DESCENDING)])
+        if newest:
+            queries.append((description, month_filter([day_key(newest[field])[:7]], field), sort))
+    return queries
+
+def plan_stages(plan):
+    """Stage names of a query plan, from the root down"""
+    stages = [plan.get('stage')]
+    for child in [plan.get('inputStage')] + plan.get('inputStages', []):
+        if child:
+            stages.extend(plan_stages(child))
+    return [stage for stage in stages if stage]
+
+def check_query_plans(db, collections=None, page_size=10, search='a'):
+    """
+    Explain the first page of every dashboard list query, reference query and month
+    query and report whether it is answered from an index (no collection scan) and how much work it did
+    """
+    checks = []
+    for collection_name in collections or DASHBOARD_INDEXES:
+        queries = dashboard_queries(collection_name, search) if collection_name in DASHBOARD_QUERIES else []
+        for description, query, sort in queries + reference_queries(db, collection_name) + month_queries(db, collection_name):
+            explain = db[collection_name].find(query).sort(sort).limit(page_size).explain()
+            planner = explain.get('queryPlanner', {})
+            # Sharded clusters nest the plan per shard
+            winning_plan = planner.get('winningPlan', {})
+            winning_plan = winning_plan.get('queryPlan', winning_plan)
+            stages = plan_stages(winning_plan)
+            stats = explain.get('executionStats', {})
+            checks.append(PlanCheck(
+                collection_name, description, stages, 'COLLSCAN' not in stages,
+                stats.get('totalKeysExamined'), stats.get('totalDocsExamined')
+            ))
+    return checks
+
+def print_index_builds(builds):
+    width = max([12] + [len(build.collection) + 2 for build in builds])
+    print(f"\n{'Collection':<{width}}{'Index':<28}{'Seconds':>9}{'Size':>12}  Status")
+    for build in builds:
+        size = f"{build.size_bytes / 1024:,.0f} KB" if build.size_bytes is not None else '-'
+        print(f"{build.collection:<{width}}{build.name:<28}{build.seconds:>9.2f}{size:>12}  {build.status}")
+
+def print_plan_checks(checks):
+    print(f"\n{'Collection':<12}{'Query':<24}{'Index':<7}{'Keys':>10}{'Docs':>10}  Plan")
+    for check in checks:
+        keys = check.keys_examined if check.keys_examined is not None else '-'
+        docs = check.docs_examined if check.docs_examined is not None else '-'
+        print(f"{check.collection:<12}{check.query:<24}{'yes' if check.uses_index else 'NO':<7}"
+              f"{keys:>10}{docs:>10}  {' <- '.join(check.stages)}")
+
+def add_index_args(parser):
+    """
+    Add the index builder options to an argument parser
+    """
+    parser.add_argument('--text-indexes', action='store_true',
+                        help="Also build a text index over the search fields of each collection")
+    parser.add_argument('--skip-plan-check', action='store_true',
+                        help="Do not explain the dashboard queries after building the indexes")
+    return parser
@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+from datetime import datetime, timezone
+import bson
+from bson.raw_bson import RawBSONDocument
+from pymongo import monitoring
+from common.connection import connection_summary
+
+# Peak RSS comes from the resource module, which does not exist on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Functions listed in the text report of a profiled stage
+PROFILE_TOP_FUNCTIONS = 15
+
+def peak_rss_mb(who='self'):
+    """
+    Peak resident set size in MB of this process ('self') or of its finished
+    worker processes ('children'), or None where it cannot be read
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+
+class Recorder:
+    """
+    Per-process stage timers and counters for a seeding run.
+    Stages are named '<collection>.<step>', e.g. 'orders.generate'. Nothing is
+    recorded until enable() is called, so uninstrumented runs pay almost nothing.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.profile_stage = None
+        self.profiler = None
+        self.profiling = False
+        self.reset()
+    
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+    
+    def enable(self, profile_stage=None):
+        self.enabled = True
+        self.profile_stage = profile_stage
+        if profile_stage:
+            self.profiler = cProfile.Profile()
+        monitoring.register(FailedCommandCounter(self))
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block as one call of the named stage, profiling it if it is the chosen stage"""
+        if not self.enabled:
+            yield
+            return
+        
+        # cProfile only follows one thread at a time, so concurrent calls go unprofiled
+        profiling = name == self.profile_stage and self.profiler is not None and self._start_profile()
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if profiling:
+                self.profiler.disable()
+                self.profiling = False
+            with self.lock:
+                timer = self.timers.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_rss_mb': None})
+                timer['calls'] += 1
+                timer['seconds'] += elapsed
+                timer['peak_rss_mb'] = peak_rss_mb()
+    
+    def _start_profile(self):
+        with self.lock:
+            if self.profiling:
+                return False
+            self.profiling = True
+        self.profiler.enable()
+        return True
+    
+    def timed_iter(self, name, iterable):
+        """Yield the items of iterable, timing the production of each as a call of the named stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+    
+    def count(self, name, amount=1):
+        if not self.enabled or not amount:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def count_batch(self, collection_name, documents):
+        """Count a written batch, its documents and their encoded BSON size"""
+        if not self.enabled:
+            return
+        # Encoding again only to measure is costly, which is why it only happens in instrumented runs
+        self.count(f"{collection_name}.batches")
+        self.count(f"{collection_name}.documents", len(documents))
+        self.count(f"{collection_name}.bson_bytes", sum(
+            len(document.raw) if isinstance(document, RawBSONDocument) else len(bson.encode(document))
+            for document in documents
+        ))
+    
+    def snapshot(self):
+        with self.lock:
+            return {
+                'timers': {name: dict(timer) for name, timer in self.timers.items()},
+                'counters': dict(self.counters),
+            }
+    
+    def merge(self, snapshot):
+        """Add the timers and counters recorded by a worker process"""
+        with self.lock:
+            for name, timer in snapshot['timers'].items():
+                total = self.timers.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_rss_mb': None})
+                total['calls'] += timer['calls']
+                total['seconds'] += timer['seconds']
+                total['peak_rss_mb'] = max(filter(None, [total['peak_rss_mb'], timer['peak_rss_mb']]), default=None)
+            for name, amount in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+class FailedCommandCounter(monitoring.CommandListener):
+    """Counts failed MongoDB commands; the driver retries retryable writes after them once"""
+    
+    def __init__(self, recorder):
+        self.recorder = recorder
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        self.recorder.count('mongo.failed_commands')
+
+# The recorder of this process; worker processes send theirs back through run_sharded
+RECORDER = Recorder()
+
+def stage(name):
+    return RECORDER.stage(name)
+
+def timed_iter(name, iterable):
+    return RECORDER.timed_iter(name, iterable) if RECORDER.enabled else iterable
+
+def count(name, amount=1):
+    RECORDER.count(name, amount)
+
+def build_report(command=None):
+    """The machine-readable report of everything recorded so far"""
+    snapshot = RECORDER.snapshot()
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'command': command or sys.argv,
+        'wall_seconds': round(time.perf_counter() - RECORDER.started, 4),
+        'peak_rss_mb': peak_rss_mb(),
+        'worker_peak_rss_mb': peak_rss_mb('children'),
+        'profiled_stage': RECORDER.profile_stage,
+        'stages': {
+            name: {
+                'calls': timer['calls'],
+                'seconds': round(timer['seconds'], 4),
+                'peak_rss_mb': round(timer['peak_rss_mb'], 1) if timer['peak_rss_mb'] is not None else None,
+            }
+            for name, timer in sorted(snapshot['timers'].items())
+        },
+        'counters': dict(sorted(snapshot['counters'].items())),
+        'connection': connection_summary(),
+    }
+
+def print_report(report):
+    """Print a report as a short text table"""
+    print(f"\n{'Stage':<28}{'Calls':>8}{'Seconds':>10}{'Peak MB':>10}")
+    for name, timer in report['stages'].items():
+        peak = f"{timer['peak_rss_mb']:.1f}" if timer['peak_rss_mb'] is not None else '-'
+        print(f"{name:<28}{timer['calls']:>8}{timer['seconds']:>10.2f}{peak:>10}")
+    
+    for name, amount in report['counters'].items():
+        print(f"{name:<28}{amount:>28,}")
+    
+    peak = f"{report['peak_rss_mb']:.1f} MB" if report['peak_rss_mb'] is not None else 'unknown'
+    print(f"Wall time {report['wall_seconds']:.2f}s, peak RSS {peak}")
+
+def write_report(path, command=None):
+    """
+    Save the report as JSON at path and print it; a profiled stage is saved
+    next to it as <path>.prof and its slowest functions are printed
+    """
+    if not RECORDER.enabled:
+        return None
+    
+    report = build_report(command)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    
+    if RECORDER.profiler is not None and RECORDER.profiler.getstats():
+        profile_path = os.path.splitext(path)[0] + '.prof'
+        RECORDER.profiler.dump_stats(profile_path)
+        print(f"\nProfile of '{RECORDER.profile_stage}' saved to {profile_path}")
+        pstats.Stats(profile_path).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    
+    print(f"Run report saved to {path}")
+    return report
+
+def instrumentation_from_args(args):
+    """Turn instrumentation on when a report was requested"""
+    if args.report:
+        RECORDER.enable(args.profile_stage)
+
+def add_instrumentation_args(parser):
+    """
+    Add the run report options to a populate script's argument parser
+    """
+    parser.add_argument('--report', default=None,
+                        help="Record stage timers, counters and peak memory and save them as JSON to this file")
+    parser.add_argument('--profile-stage', default=None,
+                        help="Run cProfile on one stage of an instrumented run, e.g. orders.generate or admins.hash_passwords")
+    return parser
@@ -0,0 +1,126 @@
+from array import array
+from pymongo import UpdateOne
+
+# What happens to an order line asking for more than the stock left:
+# 'ignore' leaves stock alone, 'cap' sells what is left, 'reject' drops the order
+STOCK_POLICIES = ['ignore', 'cap', 'reject']
+
+# $inc updates sent per bulk_write when the sold quantities are applied
+STOCK_WRITE_BATCH_SIZE = 1000
+
+def stock_share(stock, start, count, total):
+    """
+    The part of stock a shard of count orders starting at start may sell out of total
+    orders; the shares of contiguous shards add up to stock exactly
+    """
+    if not total:
+        return stock
+    return stock * (start + count) // total - stock * start // total
+
+class StockLedger:
+    """
+    Stock left and quantity sold of every product of a ProductCatalog, as two
+    compact integer arrays indexed by catalog position, so memory stays at a few
+    bytes per product however many orders go through it.
+    """
+    
+    def __init__(self, catalog, policy='cap', shard=None, total=None):
+        if policy not in STOCK_POLICIES[1:]:
+            raise ValueError(f"Unknown stock policy {policy!r}, expected one of {STOCK_POLICIES[1:]}")
+        self.policy = policy
+        self.catalog = catalog
+        # A shard only sells its share of the stock, so concurrent shards never oversell together
+        self.remaining = array('q', (
+            stock_share(max(stock, 0), shard.start, shard.count, total) if shard else max(stock, 0)
+            for stock in catalog.stock
+        ))
+        self.sold = array('q', bytes(8 * len(catalog)))
+        self.rejected = 0
+        self.capped = 0
+    
+    def take(self, lines):
+        """
+        Sell the (catalog index, quantity) lines of one order and return the lines
+        as sold, or None when the order cannot be filled under the policy
+        """
+        remaining = self.remaining
+        if self.policy == 'reject':
+            if any(quantity > remaining[index] for index, quantity in lines):
+                self.rejected += 1
+                return None
+            sold = lines
+        else:
+            sold = []
+            capped = False
+            for index, quantity in lines:
+                available = remaining[index]
+                if quantity > available:
+                    capped = True
+                    quantity = available
+                if quantity:
+                    sold.append((index, quantity))
+            if not sold:
+                self.rejected += 1
+                return None
+            # Lines sold in full are passed on as they were, so their order is not rebuilt
+            if capped:
+                self.capped += 1
+                sold = tuple(sold)
+            else:
+                sold = lines
+        
+        for index, quantity in sold:
+            remaining[index] -= quantity
+            self.sold[index] += quantity
+        return sold
+    
+    def fill(self, rows):
+        """
+        Apply the policy to a batch of OrderRows and return the rows that can be
+        filled, with their lines and totals capped where needed
+        """
+        prices = self.catalog.prices
+        filled = []
+        for row in rows:
+            lines = self.take(row.lines)
+            if lines is None:
+                continue
+            if lines is not row.lines:
+                row = row._replace(lines=lines, total=round(sum(prices[index] * quantity for index, quantity in lines), 2))
+            filled.append(row)
+        return filled
+    
+    def updates(self):
+        """One $inc per product that sold anything, decrementing its stock by the quantity sold"""
+        for index, quantity in enumerate(self.sold):
+            if quantity:
+                yield stock_update(self.catalog.ids[index], quantity)
+
+def stock_update(product_id, quantity):
+    # updatedAt moves as it would through the Product model, which also invalidates cached catalogs
+    return UpdateOne({'_id': product_id}, {'$inc': {'stock': -quantity}, '$currentDate': {'updatedAt': True}})
+
+def write_stock(collection, updates):
+    """Apply stock updates in grouped bulk_write calls and return how many products were updated"""
+    updates = list(updates)
+    for batch_start in range(0, len(updates), STOCK_WRITE_BATCH_SIZE):
+        collection.bulk_write(updates[batch_start:batch_start + STOCK_WRITE_BATCH_SIZE], ordered=False)
+    return len(updates)
+
+def sold_updates(orders_collection):
+    """Stock updates for the quantity of every product sold by the orders already in a collection"""
+    for entry in orders_collection.aggregate([
+        {'$unwind': '$products'},
+        {'$group': {'_id': '$products.product_id', 'sold': {'$sum': '$products.product_quantity'}}},
+    ], allowDiskUse=True):
+        if entry['sold']:
+            yield stock_update(entry['_id'], entry['sold'])
+
+def add_stock_args(parser):
+    """
+    Add the stock consistency option to a script's argument parser
+    """
+    parser.add_argument('--stock', choices=STOCK_POLICIES, default='ignore',
+                        help="Keep product stock consistent with the orders: 'cap' sells what is left, "
+                             "'reject' drops orders that would oversell, 'ignore' leaves stock alone (default: ignore)")
+    return parser
@@ -0,0 +1,116 @@
+import math
+import time
+import random
+
+# Length of a simulated day in seconds: the daily cycle repeats this often
+DEFAULT_DAY_SECONDS = 600
+
+# Swing of the daily cycle around the base rate, 0.5 = from 50% to 150% of it
+DEFAULT_DAILY_AMPLITUDE = 0.5
+
+# Bursts: how often one starts (per second), how long it lasts and how much it multiplies the rate
+DEFAULT_BURST_PROBABILITY = 0.01
+DEFAULT_BURST_SECONDS = 5
+DEFAULT_BURST_MULTIPLIER = 3.0
+
+class TokenBucket:
+    """
+    Paces work at a target rate: tokens refill continuously at rate per second up
+    to capacity, and take(n) waits until n tokens are there. The capacity is how
+    far the work may run ahead after a stall, e.g. a slow write.
+    """
+    
+    def __init__(self, rate, capacity=None, clock=time.perf_counter, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+    
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def set_rate(self, rate):
+        """Change the rate from now on, keeping the tokens gathered so far"""
+        self._refill()
+        self.rate = rate
+    
+    def take(self, count):
+        """Wait until count tokens are available, take them and return the seconds waited"""
+        waited = 0.0
+        # More than the capacity is granted once the bucket is full, leaving a debt
+        # the next takes wait off, so the average rate holds for any batch size
+        needed = min(count, self.capacity)
+        self._refill()
+        while self.tokens < needed:
+            if self.rate <= 0:
+                raise ValueError("A token bucket with no rate never refills")
+            pause = (needed - self.tokens) / self.rate
+            self.sleep(pause)
+            waited += pause
+            self._refill()
+        self.tokens -= count
+        return waited
+
+class RateSchedule:
+    """
+    Target rate over time: a base rate following a daily cycle (quietest at
+    simulated midnight, busiest at noon), with random bursts on top.
+    """
+    
+    def __init__(self, base_rate, day_seconds=DEFAULT_DAY_SECONDS, daily_amplitude=DEFAULT_DAILY_AMPLITUDE,
+                 burst_probability=DEFAULT_BURST_PROBABILITY, burst_seconds=DEFAULT_BURST_SECONDS,
+                 burst_multiplier=DEFAULT_BURST_MULTIPLIER, rng=random):
+        self.base_rate = base_rate
+        self.day_seconds = day_seconds
+        self.daily_amplitude = daily_amplitude
+        self.burst_probability = burst_probability
+        self.burst_seconds = burst_seconds
+        self.burst_multiplier = burst_multiplier
+        self.rng = rng
+        self.burst_until = None
+        self.checked = 0.0
+    
+    def in_burst(self, elapsed):
+        """Whether a burst is running at elapsed seconds; bursts start at random, burst_probability per second"""
+        if self.burst_until is not None and elapsed < self.burst_until:
+            return True
+        seconds = elapsed - self.checked
+        self.checked = elapsed
+        if self.burst_probability > 0 and self.rng.random() < 1 - (1 - self.burst_probability) ** seconds:
+            self.burst_until = elapsed + self.burst_seconds
+            return True
+        return False
+    
+    def rate_at(self, elapsed):
+        """Target rate per second at elapsed seconds into the run"""
+        rate = self.base_rate
+        if self.day_seconds and self.daily_amplitude:
+            phase = (elapsed % self.day_seconds) / self.day_seconds
+            rate *= 1 - self.daily_amplitude * math.cos(2 * math.pi * phase)
+        if self.in_burst(elapsed):
+            rate *= self.burst_multiplier
+        return max(rate, 0.0)
+
+def add_pacing_args(parser):
+    """
+    Add the rate, daily cycle and burst options of a paced stream to an argument parser
+    """
+    parser.add_argument('--day-seconds', type=float, default=DEFAULT_DAY_SECONDS,
+                        help=f"Length of a simulated day, 0 for a flat rate (default: {DEFAULT_DAY_SECONDS})")
+    parser.add_argument('--daily-amplitude', type=float, default=DEFAULT_DAILY_AMPLITUDE,
+                        help=f"Swing of the daily cycle around the rate, e.g. 0.5 for 50%%-150%% (default: {DEFAULT_DAILY_AMPLITUDE})")
+    parser.add_argument('--burst-probability', type=float, default=DEFAULT_BURST_PROBABILITY,
+                        help=f"Chance per second that a burst starts, 0 for none (default: {DEFAULT_BURST_PROBABILITY})")
+    parser.add_argument('--burst-seconds', type=float, default=DEFAULT_BURST_SECONDS,
+                        help=f"Length of a burst (default: {DEFAULT_BURST_SECONDS})")
+    parser.add_argument('--burst-multiplier', type=float, default=DEFAULT_BURST_MULTIPLIER,
+                        help=f"Rate multiplier during a burst (default: {DEFAULT_BURST_MULTIPLIER})")
+    return parser
+
+def schedule_from_args(args, base_rate, rng=random):
+    return RateSchedule(base_rate, args.day_seconds, args.daily_amplitude, args.burst_probability,
+                        args.burst_seconds, args.burst_multiplier, rng)
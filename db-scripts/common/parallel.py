@@ -0,0 +1,111 @@
+import hashlib
+import random
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from common.instrumentation import RECORDER
+from common.connection import CONNECTION_STATS, configure_connection, connection_options
+
+# A slice of the requested documents handled by a single worker
+Shard = namedtuple('Shard', ['index', 'start', 'count', 'seed'])
+
+def derive_seed(seed, index, name=None):
+    """
+    Derive a stable per-worker seed from the run seed and the worker index.
+    With name, the collection being seeded, stages given the same --seed
+    draw different ids, phone numbers and addresses from each other.
+    """
+    key = f"{name}:{seed}:{index}" if name else f"{seed}:{index}"
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def split_shards(count, workers, seed, name=None):
+    """
+    Split count documents into at most `workers` contiguous shards,
+    giving the first shards one extra document when count does not divide evenly;
+    their seeds are derived from seed and name
+    """
+    workers = max(1, min(workers, count)) if count else 1
+    base, remainder = divmod(count, workers)
+    
+    shards = []
+    start = 0
+    for index in range(workers):
+        shard_count = base + (1 if index < remainder else 0)
+        shards.append(Shard(index, start, shard_count, derive_seed(seed, index, name)))
+        start += shard_count
+    
+    return shards
+
+def resolve_seed(seed=None):
+    """
+    Return the given seed, or pick one so the run can be reproduced later
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+        print(f"Using random seed {seed} (pass --seed {seed} to reproduce this dataset)")
+    return seed
+
+def run_sharded(shard_fn, count, workers=1, seed=None, name=None, **kwargs):
+    """
+    Run shard_fn(shard, **kwargs) for every shard of count documents,
+    on a process pool when workers > 1, and return the summed results.
+    name, the collection being seeded, is mixed into the shard seeds.
+    shard_fn must be a module-level function so it can be pickled.
+    """
+    shards = split_shards(count, workers, resolve_seed(seed), name)
+    
+    # A single shard runs in-process to skip the pool start-up and pickling costs
+    if len(shards) == 1:
+        return shard_fn(shards[0], **kwargs)
+    
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [
+            executor.submit(_run_shard, shard_fn, shard, RECORDER.enabled, connection_options(), kwargs)
+            for shard in shards
+        ]
+        total = 0
+        for future in futures:
+            result, snapshot, connection_stats = future.result()
+            total += result
+            if snapshot:
+                RECORDER.merge(snapshot)
+            CONNECTION_STATS.merge(connection_stats)
+        return total
+
+def _run_shard(shard_fn, shard, instrumented, connection_options, kwargs):
+    """
+    Run one shard in a worker process and return its result with its
+    connection stats and the timers and counters it recorded, if instrumented
+    """
+    # Forked workers inherit the parent's stats and recordings, spawned ones start
+    # empty and with default connection options; every worker uses the parent's options
+    configure_connection(connection_options)
+    CONNECTION_STATS.reset()
+    if not instrumented:
+        result = shard_fn(shard, **kwargs)
+        return result, None, CONNECTION_STATS.snapshot()
+    
+    # Stages are only profiled in the parent process
+    RECORDER.reset()
+    if not RECORDER.enabled:
+        RECORDER.enable()
+    RECORDER.profiler = None
+    result = shard_fn(shard, **kwargs)
+    return result, RECORDER.snapshot(), CONNECTION_STATS.snapshot()
+
+def add_parallel_args(parser):
+    """
+    Add the --workers and --seed options shared by the populate scripts
+    """
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes, each inserting its own shard (default: 1)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for reproducible data; the same seed, workers and count give the same dataset")
+    return parser
+
+def random_uuid(rng):
+    """
+    Build a version 4 UUID string from the given RNG so ids are reproducible
+    """
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
@@ -0,0 +1,82 @@
+import os
+import time
+import bcrypt
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Password hashing strategies for seeded accounts:
+# - serial: hash every password one after another (realistic, slowest)
+# - pool: hash every password on a process pool using all cores
+# - shared: hash each distinct password once and reuse the result
+HASH_STRATEGIES = ['serial', 'pool', 'shared']
+
+# bcrypt's default cost factor; lower values are only meant for non-production seeds
+DEFAULT_BCRYPT_ROUNDS = 12
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 31
+
+def hash_password(password, rounds=DEFAULT_BCRYPT_ROUNDS):
+    """Hash a password using bcrypt with the given cost factor"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def hash_passwords(passwords, strategy='serial', rounds=DEFAULT_BCRYPT_ROUNDS, workers=None):
+    """Hash a list of passwords with the given strategy, keeping their order"""
+    if strategy not in HASH_STRATEGIES:
+        raise ValueError(f"Unknown hash strategy '{strategy}', expected one of {HASH_STRATEGIES}")
+    
+    if strategy == 'shared':
+        hashes = {password: hash_password(password, rounds) for password in set(passwords)}
+        return [hashes[password] for password in passwords]
+    
+    if strategy == 'pool' and len(passwords) > 1:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(passwords) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(hash_password, passwords, [rounds] * len(passwords), chunksize=chunksize))
+    
+    return [hash_password(password, rounds) for password in passwords]
+
+def timed_hash_passwords(passwords, strategy='serial', rounds=DEFAULT_BCRYPT_ROUNDS, workers=None):
+    """Hash passwords like hash_passwords and print how long the strategy took"""
+    start_time = time.perf_counter()
+    hashes = hash_passwords(passwords, strategy, rounds, workers)
+    elapsed = time.perf_counter() - start_time
+    
+    rate = len(passwords) / elapsed if elapsed > 0 else 0
+    print(f"Hashed {len(passwords)} passwords with the '{strategy}' strategy (cost {rounds}) in {elapsed:.2f}s ({rate:,.1f} passwords/sec)")
+    return hashes
+
+def compare_hash_strategies(count, password='password', rounds=DEFAULT_BCRYPT_ROUNDS, workers=None):
+    """Time every hashing strategy on count copies of the same password and print a summary table"""
+    passwords = [password] * count
+    results = []
+    
+    for strategy in HASH_STRATEGIES:
+        start_time = time.perf_counter()
+        hash_passwords(passwords, strategy, rounds, workers)
+        results.append((strategy, time.perf_counter() - start_time))
+    
+    print(f"{'Strategy':<10} {'Seconds':>10} {'Passwords/sec':>15}  (count {count}, cost {rounds})")
+    for strategy, elapsed in results:
+        rate = count / elapsed if elapsed > 0 else 0
+        print(f"{strategy:<10} {elapsed:>10.2f} {rate:>15,.1f}")
+    
+    return results
+
+def bcrypt_rounds(value):
+    """Parse a --bcrypt-rounds value, which bcrypt only accepts within 4-31"""
+    rounds = int(value)
+    if not MIN_BCRYPT_ROUNDS <= rounds <= MAX_BCRYPT_ROUNDS:
+        raise argparse.ArgumentTypeError(f"bcrypt rounds must be between {MIN_BCRYPT_ROUNDS} and {MAX_BCRYPT_ROUNDS}, got {rounds}")
+    return rounds
+
+def add_hashing_args(parser):
+    """Add the password hashing options to a populate script's argument parser"""
+    parser.add_argument('--hash-strategy', choices=HASH_STRATEGIES, default='serial',
+                        help="How seeded passwords are hashed (default: serial)")
+    parser.add_argument('--bcrypt-rounds', type=bcrypt_rounds, default=DEFAULT_BCRYPT_ROUNDS,
+                        help=f"bcrypt cost factor, lower it only for non-production seeds "
+                             f"({MIN_BCRYPT_ROUNDS}-{MAX_BCRYPT_ROUNDS}, default: {DEFAULT_BCRYPT_ROUNDS})")
+    parser.add_argument('--hash-workers', type=int, default=None,
+                        help="Processes used by the 'pool' strategy (default: all cores)")
+    return parser
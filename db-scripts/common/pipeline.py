@@ -0,0 +1,174 @@
+import asyncio
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pymongo import ReplaceOne
+from common.incremental import write_batch, record_batch
+from common.connection import client_options, write_count
+from common.instrumentation import RECORDER, stage, timed_iter
+
+# Motor is optional; without it the pipeline runs pymongo writes on executor threads
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+# How many batches may be written at once and how many generated batches may wait for a writer;
+# the write concern comes from the connection options, like every other write
+PipelineOptions = namedtuple('PipelineOptions', ['in_flight', 'queue_size'])
+
+DEFAULT_IN_FLIGHT = 4
+DEFAULT_QUEUE_SIZE = 8
+
+class BatchWatermark:
+    """
+    Tracks batches finishing out of order and reports how many leading batches are all written
+    """
+    
+    def __init__(self, first_batch):
+        self.next_batch = first_batch
+        self.finished = set()
+    
+    def finish(self, batch_number):
+        self.finished.add(batch_number)
+        while self.next_batch in self.finished:
+            self.finished.remove(self.next_batch)
+            self.next_batch += 1
+        return self.next_batch
+
+def write_batches(collection, numbered_batches, upsert=False, checkpoint=None, shard_index=0,
+                  pipeline=None, uri=None, on_progress=None):
+    """
+    Write (batch number, documents) pairs to collection and return how many documents were written.
+    Without pipeline options every batch is generated and then written in turn; with them,
+    generation and writes overlap through a bounded queue. on_progress receives the running total.
+    """
+    # Instrumented runs time the generation of every batch and count what is written
+    numbered_batches = timed_iter(f"{collection.name}.generate", numbered_batches)
+    
+    if pipeline is not None:
+        return asyncio.run(_write_pipelined(
+            collection, numbered_batches, upsert, checkpoint, shard_index, pipeline, uri, on_progress
+        ))
+    
+    written = 0
+    for batch_number, batch in numbered_batches:
+        with stage(f"{collection.name}.write"):
+            written += write_batch(collection, batch, upsert)
+        RECORDER.count_batch(collection.name, batch)
+        record_batch(collection.database, checkpoint, shard_index, batch_number + 1)
+        if on_progress:
+            on_progress(written)
+    return written
+
+async def _write_pipelined(collection, numbered_batches, upsert, checkpoint, shard_index, options, uri, on_progress):
+    """
+    Generate batches on a producer thread while up to options.in_flight batches are being written
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=options.queue_size)
+    failed = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=options.in_flight + 2)
+    
+    motor_client = None
+    
+    if AsyncIOMotorClient is not None and uri:
+        motor_client = AsyncIOMotorClient(uri, **client_options())
+        target = motor_client[collection.database.name][collection.name]
+        
+        async def write(batch):
+            if not batch:
+                return 0
+            if upsert:
+                result = await target.bulk_write(
+                    [ReplaceOne({'_id': document['_id']}, document, upsert=True) for document in batch],
+                    ordered=False
+                )
+                return write_count(result, len(batch), 'upserted_count', 'matched_count')
+            await target.insert_many(batch, ordered=False)
+            return len(batch)
+    else:
+        async def write(batch):
+            return await loop.run_in_executor(executor, write_batch, collection, batch, upsert)
+    
+    state = {'written': 0, 'watermark': None}
+    
+    def produce():
+        """Runs the generator on its own thread, waiting whenever the queue is full"""
+        for item in numbered_batches:
+            if failed.is_set():
+                return
+            if state['watermark'] is None:
+                state['watermark'] = BatchWatermark(item[0])
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    future.result(timeout=0.1)
+                    break
+                except FutureTimeoutError:
+                    if failed.is_set():
+                        future.cancel()
+                        return
+    
+    async def consume():
+        while True:
+            item = await queue.get()
+            if item is None or failed.is_set():
+                return
+            batch_number, batch = item
+            try:
+                with stage(f"{collection.name}.write"):
+                    written = await write(batch)
+            except Exception:
+                failed.set()
+                raise
+            
+            RECORDER.count_batch(collection.name, batch)
+            state['written'] += written
+            done = state['watermark'].finish(batch_number)
+            if checkpoint is not None:
+                await loop.run_in_executor(executor, record_batch, collection.database, checkpoint, shard_index, done)
+            if on_progress:
+                on_progress(state['written'])
+    
+    consumers = [asyncio.create_task(consume()) for _ in range(options.in_flight)]
+    try:
+        await loop.run_in_executor(executor, produce)
+        
+        if failed.is_set():
+            for consumer in consumers:
+                consumer.cancel()
+        else:
+            for _ in consumers:
+                await queue.put(None)
+        
+        results = await asyncio.gather(*consumers, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    finally:
+        executor.shutdown(wait=False)
+        if motor_client is not None:
+            motor_client.close()
+    
+    return state['written']
+
+def pipeline_from_args(args):
+    """
+    Pipeline options from the command line, or None when pipelined writes are off
+    """
+    if not args.pipeline:
+        return None
+    return PipelineOptions(args.in_flight, args.queue_size)
+
+def add_pipeline_args(parser):
+    """
+    Add the pipelined writer options to a populate script's argument parser
+    """
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Overlap generation with writes through an asyncio writer (uses motor when installed)")
+    parser.add_argument('--in-flight', type=int, default=DEFAULT_IN_FLIGHT,
+                        help=f"Batches written concurrently by the pipelined writer (default: {DEFAULT_IN_FLIGHT})")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Generated batches waiting for a writer before generation pauses (default: {DEFAULT_QUEUE_SIZE})")
+    return parser
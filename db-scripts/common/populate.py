@@ -0,0 +1,55 @@
+import time
+from common.parallel import run_sharded
+from common.incremental import reset_collection, open_checkpoint, complete_checkpoint
+from common.snapshots import prepare_snapshot, load_snapshot, complete_snapshot, abandon_snapshot
+
+def run_populate(db, collection_name, settings, shard_fn, shard_kwargs=None, client=None, uri=None,
+                 resume=False, fast_reset=False, pipeline=None, snapshot=False, snapshot_key=None):
+    """
+    Drive a checkpointed populate run of one collection and return how many documents were written.
+    settings must hold the run's mode, count, seed, workers and batch_size; a resumed
+    run replaces them with the ones it was started with. A fresh replace clears the
+    collection first and, with snapshot, loads a saved copy of the same dataset or
+    saves one, keyed by the settings and snapshot_key. Otherwise the documents are
+    generated by shard_fn through run_sharded, upserting unless the run is a fresh replace.
+    shard_kwargs(settings) returns the extra arguments of shard_fn for the settings
+    the run ends up with. client is shared by in-process shards; worker processes
+    connect to uri themselves.
+    """
+    collection = db[collection_name]
+    
+    checkpoint = open_checkpoint(db, collection_name, settings, resume)
+    settings = checkpoint.settings
+    fresh_replace = settings['mode'] == 'replace' and not checkpoint.resumed
+    
+    # Delete existing documents before inserting new ones
+    if fresh_replace:
+        reset_collection(db, collection_name, fast_reset)
+    
+    snapshot_run = None
+    if snapshot and fresh_replace:
+        snapshot_run = prepare_snapshot(collection_name, {**settings, **(snapshot_key or {})})
+    
+    start_time = time.perf_counter()
+    try:
+        if snapshot_run and snapshot_run.manifest:
+            inserted = load_snapshot(collection, snapshot_run.manifest, settings['batch_size'], pipeline, uri)
+        else:
+            # Generate and insert the documents, split across workers.
+            # Anything but a fresh replace upserts, so rewritten documents are not duplicated
+            inserted = run_sharded(
+                shard_fn, settings['count'], workers=settings['workers'], seed=settings['seed'], name=collection_name,
+                client=client if settings['workers'] <= 1 else None,
+                batch_size=settings['batch_size'], upsert=not fresh_replace,
+                checkpoint=checkpoint, pipeline=pipeline, snapshot_dir=snapshot_run and snapshot_run.directory,
+                **(shard_kwargs(settings) if shard_kwargs else {})
+            )
+            complete_snapshot(snapshot_run, inserted)
+    finally:
+        abandon_snapshot(snapshot_run)
+    complete_checkpoint(db, checkpoint)
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"Successfully inserted {inserted} {collection_name} in {elapsed:.2f}s")
+    
+    return inserted
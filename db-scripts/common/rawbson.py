@@ -0,0 +1,85 @@
+import struct
+import bson
+from collections import OrderedDict
+from bson.raw_bson import RawBSONDocument
+
+# BSON type bytes of the elements written without going through bson.encode
+BSON_DOUBLE = b'\x01'
+BSON_STRING = b'\x02'
+BSON_DOCUMENT = b'\x03'
+BSON_ARRAY = b'\x04'
+
+# Most values an encoding cache keeps; past it each new value drops the oldest one
+DEFAULT_CACHE_SIZE = 50_000
+
+_INT32 = struct.Struct('<i')
+_DOUBLE = struct.Struct('<d')
+
+def element_name(bson_type, name):
+    """The type byte and name that open an element, e.g. b'\\x02_id\\x00'"""
+    return bson_type + name.encode('utf-8') + b'\x00'
+
+def encode_element(name, value):
+    """The BSON bytes of one name/value element, as it appears inside a document"""
+    return bson.encode({name: value})[4:-1]
+
+def string_value(value):
+    """The encoded value of a string element, to follow one or more element_name prefixes"""
+    data = value.encode('utf-8')
+    return _INT32.pack(len(data) + 1) + data + b'\x00'
+
+# The encoded value of a double element, and the size that opens a document or string
+pack_double = _DOUBLE.pack
+pack_int32 = _INT32.pack
+
+def document_bytes(elements):
+    """A BSON document made of already encoded elements"""
+    body = b''.join(elements)
+    return _INT32.pack(len(body) + 5) + body + b'\x00'
+
+def array_element(prefix, documents):
+    """An array element of already encoded documents, given its element_name prefix"""
+    return prefix + document_bytes([
+        BSON_DOCUMENT + str(index).encode('ascii') + b'\x00' + document
+        for index, document in enumerate(documents)
+    ])
+
+def raw_document(elements):
+    """
+    A RawBSONDocument made of already encoded elements; pymongo inserts it
+    as it is, without turning it into a dict or encoding it again
+    """
+    return RawBSONDocument(document_bytes(elements))
+
+class BoundedCache(OrderedDict):
+    """
+    Values computed once per key by compute, for keys that repeat across documents.
+    At most maxsize values are kept, dropping the oldest for each new one past that,
+    so memory stays flat however many distinct keys (product lines, customers) a run draws.
+    """
+    
+    def __init__(self, compute, maxsize=DEFAULT_CACHE_SIZE):
+        super().__init__()
+        self.compute = compute
+        self.maxsize = maxsize
+    
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
+
+class ElementCache(BoundedCache):
+    """
+    Encoded elements of one field, encoded once per distinct value, for fields
+    whose values repeat across documents (statuses, dates, customers).
+    With convert, values are looked up as they are and encoded as convert(value).
+    """
+    
+    def __init__(self, name, convert=None, maxsize=DEFAULT_CACHE_SIZE):
+        super().__init__(self.encode, maxsize)
+        self.name = name
+        self.convert = convert
+    
+    def encode(self, value):
+        return encode_element(self.name, self.convert(value) if self.convert else value)
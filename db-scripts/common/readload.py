@@ -0,0 +1,256 @@
+import time
+import random
+import threading
+from collections import namedtuple
+from pymongo import ASCENDING, DESCENDING
+from common.indexes import DASHBOARD_QUERIES
+from common.parallel import derive_seed
+from reference.malaysian_names import FIRST_NAMES, LAST_NAMES
+from reference.product_types import PRODUCT_TYPES
+
+# allowedPageSizes of the list controllers
+PAGE_SIZES = [10, 20, 50]
+
+# Fields the list controllers leave out of their results
+LIST_PROJECTIONS = {
+    'admins': {'password': 0},
+}
+
+# Field of the single-document lookups: getOrderById, and the username check of validateAdmin
+LOOKUP_FIELDS = {
+    'orders': 'id',
+    'admins': 'username',
+}
+
+# Values of the lookup field sampled from each collection before the load starts
+LOOKUP_SAMPLE_SIZE = 1000
+
+# Kinds of dashboard request:
+# - list: a first few pages in the default sort
+# - sort: a first few pages sorted by a random whitelisted field, either way
+# - search: a case-insensitive $regex search over the search fields, as typed in the search box
+# - deep_page: a page anywhere in the collection, so skip walks far into the sort
+# - lookup: findOne by id (orders) or username (admins)
+QUERY_KINDS = ['list', 'sort', 'search', 'deep_page', 'lookup']
+
+# Relative frequency of each '<collection>.<kind>' request in the replayed mix
+DEFAULT_MIX = {
+    'orders.list': 20,
+    'orders.sort': 10,
+    'orders.search': 15,
+    'orders.deep_page': 5,
+    'orders.lookup': 10,
+    'products.list': 10,
+    'products.sort': 5,
+    'products.search': 10,
+    'products.deep_page': 3,
+    'admins.list': 5,
+    'admins.sort': 2,
+    'admins.search': 3,
+    'admins.lookup': 2,
+}
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 30
+
+# Chance that a list or sort request asks for the next page rather than the first
+NEXT_PAGE_PROBABILITY = 0.3
+
+# Latency percentiles reported per query shape
+PERCENTILES = [50, 95, 99]
+
+# One timed request: its shape, latency in ms and whether it failed
+Sample = namedtuple('Sample', ['shape', 'milliseconds', 'failed'])
+
+def search_terms():
+    """
+    What admins type in each search box: customer names and statuses for orders,
+    product types and categories for products, names and roles for admins
+    """
+    product_names = [name for types in PRODUCT_TYPES.values() for name, _ in types]
+    return {
+        'orders': FIRST_NAMES + LAST_NAMES + ['Pending', 'Processing', 'Completed', 'ORDER-'],
+        'products': product_names + list(PRODUCT_TYPES),
+        'admins': [name.lower() for name in FIRST_NAMES + LAST_NAMES] + ['Admin', 'Applicant', 'gmail'],
+    }
+
+def parse_mix(value):
+    """A mix from the command line, e.g. 'orders.search=5,products.list=2'"""
+    mix = {}
+    for entry in value.split(','):
+        shape, _, weight = entry.partition('=')
+        collection_name, _, kind = shape.strip().partition('.')
+        if collection_name not in DASHBOARD_QUERIES or kind not in QUERY_KINDS:
+            raise ValueError(f"Unknown query shape {shape!r}, expected <collection>.<kind> with a kind in {QUERY_KINDS}")
+        if kind == 'lookup' and collection_name not in LOOKUP_FIELDS:
+            raise ValueError(f"The dashboard has no single-document lookup of {collection_name}")
+        mix[shape.strip()] = float(weight or 1)
+    return mix
+
+class DashboardQueries:
+    """
+    Draws dashboard requests the way the controllers build them: filter, sort,
+    page size and skip for the list queries, key for the lookups. Collection
+    sizes and lookup keys are read once, before the load starts.
+    """
+    
+    def __init__(self, db, mix=None):
+        self.db = db
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.shapes = list(self.mix)
+        self.weights = [self.mix[shape] for shape in self.shapes]
+        self.terms = search_terms()
+        collections = {shape.split('.')[0] for shape in self.shapes}
+        self.counts = {name: db[name].estimated_document_count() for name in collections}
+        self.lookup_keys = {
+            name: [document[field] for document in db[name].aggregate([
+                {'$sample': {'size': LOOKUP_SAMPLE_SIZE}}, {'$project': {field: 1}}
+            ]) if field in document]
+            for name, field in LOOKUP_FIELDS.items() if name in collections
+        }
+    
+    def search_filter(self, collection_name, rng):
+        """$or of the controller's case-insensitive regex over every search field, for a prefix of a term"""
+        term = rng.choice(self.terms[collection_name])
+        term = term[:rng.randint(min(3, len(term)), len(term))]
+        return {'$or': [
+            {field: {'$regex': term, '$options': 'i'}} for field in DASHBOARD_QUERIES[collection_name]['search_fields']
+        ]}
+    
+    def run(self, shape, rng):
+        """Send the requests of one dashboard call of the given shape"""
+        collection_name, kind = shape.split('.')
+        collection = self.db[collection_name]
+        spec = DASHBOARD_QUERIES[collection_name]
+        
+        if kind == 'lookup':
+            keys = self.lookup_keys.get(collection_name)
+            key = rng.choice(keys) if keys else ''
+            return collection.find_one({LOOKUP_FIELDS[collection_name]: key}, LIST_PROJECTIONS.get(collection_name))
+        
+        query = self.search_filter(collection_name, rng) if kind == 'search' else {}
+        sort = [(spec['default_sort'], DESCENDING)]
+        if kind == 'sort':
+            sort = [(rng.choice(spec['sort_fields']), rng.choice([ASCENDING, DESCENDING]))]
+        
+        limit = rng.choice(PAGE_SIZES)
+        if kind == 'deep_page':
+            page = rng.randint(1, max(1, -(-self.counts[collection_name] // limit)))
+        else:
+            page = 2 if rng.random() < NEXT_PAGE_PROBABILITY else 1
+        
+        # Like the controllers: the total for the pagination block, then the page itself
+        collection.count_documents(query)
+        return list(collection.find(query, LIST_PROJECTIONS.get(collection_name)).sort(sort).skip((page - 1) * limit).limit(limit))
+
+def run_load(queries, concurrency=DEFAULT_CONCURRENCY, duration=DEFAULT_DURATION, requests=None, seed=0):
+    """
+    Replay the mix of queries from concurrency threads, each like an admin clicking
+    through the dashboard without pause, for duration seconds or until requests
+    requests were sent. Returns every Sample and the wall time in seconds.
+    """
+    samples = []
+    lock = threading.Lock()
+    sent = [0]
+    start_time = time.perf_counter()
+    deadline = start_time + duration if duration else None
+    
+    def admin(index):
+        rng = random.Random(derive_seed(seed, index))
+        local = []
+        while deadline is None or time.perf_counter() < deadline:
+            if requests is not None:
+                with lock:
+                    if sent[0] >= requests:
+                        break
+                    sent[0] += 1
+            shape = rng.choices(queries.shapes, weights=queries.weights)[0]
+            request_start = time.perf_counter()
+            failed = False
+            try:
+                queries.run(shape, rng)
+            except Exception:
+                failed = True
+            local.append(Sample(shape, (time.perf_counter() - request_start) * 1000, failed))
+        with lock:
+            samples.extend(local)
+    
+    threads = [threading.Thread(target=admin, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    return samples, time.perf_counter() - start_time
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(samples, seconds):
+    """Requests, errors, throughput and latency percentiles per query shape and over all of them"""
+    by_shape = {}
+    for sample in samples:
+        by_shape.setdefault(sample.shape, []).append(sample)
+    
+    def shape_summary(shape_samples):
+        latencies = sorted(sample.milliseconds for sample in shape_samples)
+        summary = {
+            'requests': len(shape_samples),
+            'errors': sum(sample.failed for sample in shape_samples),
+            'per_sec': round(len(shape_samples) / seconds, 1) if seconds else None,
+            'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        }
+        for percent in PERCENTILES:
+            value = percentile(latencies, percent)
+            summary[f"p{percent}_ms"] = round(value, 2) if value is not None else None
+        return summary
+    
+    shapes = {shape: shape_summary(shape_samples) for shape, shape_samples in sorted(by_shape.items())}
+    shapes['all'] = shape_summary(samples)
+    return shapes
+
+def print_summary(shapes, seconds):
+    print(f"\n{'Query shape':<20}{'Requests':>9}{'Errors':>8}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for shape, summary in shapes.items():
+        latencies = ''.join(
+            f"{summary[f'p{percent}_ms']:>9.2f}" if summary[f'p{percent}_ms'] is not None else f"{'-':>9}"
+            for percent in PERCENTILES
+        )
+        print(f"{shape:<20}{summary['requests']:>9,}{summary['errors']:>8,}{summary['per_sec'] or 0:>9.1f}{latencies}")
+    print(f"Ran for {seconds:.2f}s")
+
+def compare_summaries(baseline, current):
+    """Print the p95 and throughput change of every shape both runs measured"""
+    print(f"\n{'Query shape':<20}{'p95 before':>12}{'p95 now':>10}{'Change':>9}{'Req/s before':>14}{'Req/s now':>11}")
+    for shape, summary in current.items():
+        before = baseline.get(shape)
+        if not before or not before['p95_ms'] or not summary['p95_ms']:
+            continue
+        change = summary['p95_ms'] / before['p95_ms'] - 1
+        print(f"{shape:<20}{before['p95_ms']:>12.2f}{summary['p95_ms']:>10.2f}{change:>+9.1%}"
+              f"{before['per_sec'] or 0:>14.1f}{summary['per_sec'] or 0:>11.1f}")
+
+def add_load_args(parser):
+    """
+    Add the read-load options to an argument parser
+    """
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help="Weighted query shapes, e.g. orders.search=5,orders.deep_page=1 "
+                             f"(kinds: {', '.join(QUERY_KINDS)}; default: a mix of every collection)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Concurrent simulated admins, one thread each (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help=f"Seconds to run for, 0 for no limit (default: {DEFAULT_DURATION})")
+    parser.add_argument('--requests', type=int, default=None,
+                        help="Stop after this many requests (default: no limit)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed of the simulated admins, so runs replay the same requests (default: 0)")
+    parser.add_argument('--output', default=None,
+                        help="Save the per-shape results as JSON to this file")
+    parser.add_argument('--baseline', default=None,
+                        help="Results file of an earlier run to compare p95 latency and throughput against")
+    return parser
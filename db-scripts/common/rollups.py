@@ -0,0 +1,330 @@
+from pymongo import UpdateOne
+from common.dates import day_key, month_bounds, month_filter
+
+# Summary collections of the orders, one document per day or month keyed by
+# 'YYYY-MM-DD' or 'YYYY-MM', as the dashboard charts read them
+ROLLUP_COLLECTIONS = {
+    'day': 'order_rollups_daily',
+    'month': 'order_rollups_monthly',
+}
+
+# Per-product summaries, one document per day or month and product keyed by
+# {bucket, product_id}. They are kept out of the bucket documents above, whose
+# size would otherwise grow with the catalog up to the 16MB document limit
+PRODUCT_ROLLUP_COLLECTIONS = {
+    'day': 'order_rollups_products_daily',
+    'month': 'order_rollups_products_monthly',
+}
+
+# Characters that cannot appear in the keys of the breakdown maps, which are parts
+# of $inc paths, and the full-width characters they are replaced with
+KEY_ESCAPES = {
+    '.': '\uff0e',
+    '$': '\uff04',
+}
+
+# Length of the 'YYYY-MM-DD' order date prefix that keys each period
+PERIOD_KEY_LENGTH = {
+    'day': 10,
+    'month': 7,
+}
+
+# Format of the key of each period, for orders dated with BSON dates
+PERIOD_FORMATS = {
+    'day': '%Y-%m-%d',
+    'month': '%Y-%m',
+}
+
+# Category of orders whose product is no longer in the products collection
+UNKNOWN_CATEGORY = 'Unknown'
+
+# Upserts sent per bulk_write when flushing accumulated rollups
+ROLLUP_WRITE_BATCH_SIZE = 1000
+
+def escape_key(key):
+    """A status or category as a key of a breakdown map, with KEY_ESCAPES replaced"""
+    key = str(key)
+    for char, replacement in KEY_ESCAPES.items():
+        key = key.replace(char, replacement)
+    return key
+
+def line_revenues(order):
+    """
+    Revenue of each product line of an order: price x quantity when the line
+    carries its price, otherwise the order total split by quantity
+    """
+    lines = order['products']
+    if len(lines) == 1 and 'price' not in lines[0]:
+        return [order['total']]
+    order_quantity = sum(line['product_quantity'] for line in lines) or 1
+    return [
+        line['price'] * line['product_quantity'] if 'price' in line
+        else order['total'] * line['product_quantity'] / order_quantity
+        for line in lines
+    ]
+
+class RollupAccumulator:
+    """
+    Daily and monthly order counts and revenue by status, category and product,
+    accumulated from generated orders in the same pass that writes them.
+    Orders are only tallied per day and status and per day and product line;
+    months and categories are derived from those tallies when the rollups are written.
+    With a ProductCatalog, lines are tallied by catalog index and resolved to product
+    ids and categories only then.
+    """
+    
+    def __init__(self, categories=None, catalog=None):
+        # product id -> category
+        self.categories = categories or {}
+        self.catalog = catalog
+        # (day, status) -> [orders, revenue]
+        self.statuses = {}
+        # (day, product id) -> [lines, quantity, revenue]
+        self.lines = {}
+    
+    def add(self, day, status, total, lines):
+        """Tally one order; lines are the (product id or catalog index, quantity, revenue) of its product lines"""
+        tally = self.statuses.get((day, status))
+        if tally is None:
+            tally = self.statuses[(day, status)] = [0, 0.0]
+        tally[0] += 1
+        tally[1] += total
+        
+        for product_id, quantity, revenue in lines:
+            tally = self.lines.get((day, product_id))
+            if tally is None:
+                tally = self.lines[(day, product_id)] = [0, 0, 0.0]
+            tally[0] += 1
+            tally[1] += quantity
+            tally[2] += revenue
+    
+    def move(self, day, from_status, to_status, total):
+        """Tally an existing order changing status; the day's count and revenue stay as they are"""
+        for status, sign in ((from_status, -1), (to_status, 1)):
+            tally = self.statuses.get((day, status))
+            if tally is None:
+                tally = self.statuses[(day, status)] = [0, 0.0]
+            tally[0] += sign
+            tally[1] += sign * total
+    
+    def add_orders(self, orders):
+        for order in orders:
+            self.add(day_key(order['date']), order['status'], order['total'], [
+                (line['product_id'], line['product_quantity'], revenue)
+                for line, revenue in zip(order['products'], line_revenues(order))
+            ])
+        return orders
+    
+    def product(self, product):
+        """The product id and category of a tallied product id or catalog index"""
+        if self.catalog is not None:
+            product_id, category = self.catalog.ids[product], self.catalog.categories[product]
+        else:
+            product_id, category = product, self.categories.get(product)
+        return product_id, category or UNKNOWN_CATEGORY
+    
+    def buckets(self, period):
+        """The count, revenue and status and category breakdowns of every bucket of a period"""
+        length = PERIOD_KEY_LENGTH[period]
+        buckets = {}
+        
+        def bucket_for(day):
+            bucket = buckets.get(day[:length])
+            if bucket is None:
+                bucket = buckets[day[:length]] = {'count': 0, 'revenue': 0.0, 'by_status': {}, 'by_category': {}}
+            return bucket
+        
+        for (day, status), (count, revenue) in self.statuses.items():
+            bucket = bucket_for(day)
+            bucket['count'] += count
+            bucket['revenue'] += revenue
+            entry = bucket['by_status'].setdefault(status, {'count': 0, 'revenue': 0.0})
+            entry['count'] += count
+            entry['revenue'] += revenue
+        
+        for (day, product), (count, quantity, revenue) in self.lines.items():
+            bucket = bucket_for(day)
+            entry = bucket['by_category'].setdefault(self.product(product)[1], {'count': 0, 'quantity': 0, 'revenue': 0.0})
+            entry['count'] += count
+            entry['quantity'] += quantity
+            entry['revenue'] += revenue
+        
+        return buckets
+    
+    def product_buckets(self, period):
+        """The count, quantity and revenue of every product in every bucket of a period, keyed by (bucket, product id)"""
+        length = PERIOD_KEY_LENGTH[period]
+        products = {}
+        for (day, product), (count, quantity, revenue) in self.lines.items():
+            key = (day[:length], self.product(product)[0])
+            entry = products.get(key)
+            if entry is None:
+                entry = products[key] = {'count': 0, 'quantity': 0, 'revenue': 0.0}
+            entry['count'] += count
+            entry['quantity'] += quantity
+            entry['revenue'] += revenue
+        return products
+    
+    def updates(self, period):
+        """One $inc upsert per bucket of the period, so concurrent shards add up"""
+        for key, bucket in self.buckets(period).items():
+            increments = {'count': bucket['count'], 'revenue': round(bucket['revenue'], 2)}
+            for breakdown in ('by_status', 'by_category'):
+                for entry_key, entry in bucket[breakdown].items():
+                    for field, value in entry.items():
+                        increments[f"{breakdown}.{escape_key(entry_key)}.{field}"] = round(value, 2) if field == 'revenue' else value
+            yield UpdateOne({'_id': key}, {'$inc': increments, '$set': {'period': period}}, upsert=True)
+    
+    def product_updates(self, period):
+        """One $inc upsert per product and bucket of the period"""
+        for (key, product_id), entry in self.product_buckets(period).items():
+            yield UpdateOne(
+                {'_id': {'bucket': key, 'product_id': product_id}},
+                {'$inc': {**entry, 'revenue': round(entry['revenue'], 2)},
+                 '$set': {'bucket': key, 'product_id': product_id, 'period': period}},
+                upsert=True
+            )
+
+def write_rollups(db, accumulator):
+    """Add the accumulated rollups to the summary collections and return how many documents were written"""
+    written = 0
+    for period in ROLLUP_COLLECTIONS:
+        for collection_name, updates in ((ROLLUP_COLLECTIONS[period], accumulator.updates(period)),
+                                         (PRODUCT_ROLLUP_COLLECTIONS[period], accumulator.product_updates(period))):
+            updates = list(updates)
+            for batch_start in range(0, len(updates), ROLLUP_WRITE_BATCH_SIZE):
+                db[collection_name].bulk_write(updates[batch_start:batch_start + ROLLUP_WRITE_BATCH_SIZE], ordered=False)
+            written += len(updates)
+    return written
+
+def reset_rollups(db):
+    for collection_name in list(ROLLUP_COLLECTIONS.values()) + list(PRODUCT_ROLLUP_COLLECTIONS.values()):
+        db[collection_name].delete_many({})
+
+def month_range(since, until):
+    """Every 'YYYY-MM' month from since to until, both included"""
+    year, month = (int(part) for part in since.split('-'))
+    months = []
+    while f"{year:04d}-{month:02d}" <= until:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def _escaped_key(expression):
+    """Aggregation expression applying escape_key to a status or category expression"""
+    expression = {'$toString': expression}
+    for char, replacement in KEY_ESCAPES.items():
+        expression = {'$replaceAll': {'input': expression, 'find': {'$literal': char}, 'replacement': replacement}}
+    return expression
+
+def _rollup_pipelines(match, period, collection_name, product_collection_name):
+    """
+    Aggregations that recompute the status and category breakdowns of every
+    bucket of a period and merge them into its rollup collection, and the
+    per-product rollups of the period merged into its product rollup collection
+    """
+    # Orders dated with strings and with BSON dates land in the same buckets,
+    # so a collection can be rebuilt halfway through a date migration
+    bucket = {'$cond': [
+        {'$eq': [{'$type': '$date'}, 'date']},
+        {'$dateToString': {'date': '$date', 'format': PERIOD_FORMATS[period], 'timezone': 'UTC'}},
+        {'$substrBytes': ['$date', 0, PERIOD_KEY_LENGTH[period]]},
+    ]}
+    merge = {'$merge': {'into': collection_name, 'whenMatched': 'merge', 'whenNotMatched': 'insert'}}
+    
+    def to_document(field, value):
+        # Turn the per-bucket list of {k, v} pairs into the breakdown map of the bucket
+        return [
+            {'$group': {'_id': '$_id.bucket', field: {'$push': {'k': _escaped_key('$_id.key'), 'v': value}}}},
+            {'$set': {field: {'$arrayToObject': f"${field}"}, 'period': period}},
+            merge,
+        ]
+    
+    by_status = [
+        {'$match': match},
+        {'$group': {'_id': {'bucket': bucket, 'key': '$status'}, 'count': {'$sum': 1}, 'revenue': {'$sum': '$total'}}},
+        {'$group': {
+            '_id': '$_id.bucket',
+            'count': {'$sum': '$count'},
+            'revenue': {'$sum': '$revenue'},
+            'by_status': {'$push': {'k': _escaped_key('$_id.key'), 'v': {'count': '$count', 'revenue': {'$round': ['$revenue', 2]}}}},
+        }},
+        {'$set': {'by_status': {'$arrayToObject': '$by_status'}, 'revenue': {'$round': ['$revenue', 2]}, 'period': period}},
+        merge,
+    ]
+    
+    # Product lines grouped per bucket and product, with the same revenue rule as line_revenues
+    by_line = [
+        {'$match': match},
+        {'$project': {'date': 1, 'total': 1, 'products': 1, 'order_quantity': {'$sum': '$products.product_quantity'}}},
+        {'$unwind': '$products'},
+        {'$group': {
+            '_id': {'bucket': bucket, 'key': '$products.product_id'},
+            'count': {'$sum': 1},
+            'quantity': {'$sum': '$products.product_quantity'},
+            'revenue': {'$sum': {'$ifNull': [
+                {'$multiply': ['$products.price', '$products.product_quantity']},
+                {'$multiply': ['$total', {'$divide': ['$products.product_quantity', {'$max': ['$order_quantity', 1]}]}]},
+            ]}},
+        }},
+    ]
+    line_value = {'count': '$count', 'quantity': '$quantity', 'revenue': {'$round': ['$revenue', 2]}}
+    
+    by_product = by_line + [
+        {'$project': {
+            '_id': {'bucket': '$_id.bucket', 'product_id': '$_id.key'},
+            'bucket': '$_id.bucket',
+            'product_id': '$_id.key',
+            'period': {'$literal': period},
+            'count': 1,
+            'quantity': 1,
+            'revenue': {'$round': ['$revenue', 2]},
+        }},
+        {'$merge': {'into': product_collection_name, 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+    ]
+    
+    by_category = by_line + [
+        {'$lookup': {
+            'from': 'products',
+            'let': {'product_id': '$_id.key'},
+            'pipeline': [{'$match': {'$expr': {'$eq': ['$_id', '$$product_id']}}}, {'$project': {'category': 1}}],
+            'as': 'product',
+        }},
+        {'$group': {
+            '_id': {'bucket': '$_id.bucket', 'key': {'$ifNull': [{'$arrayElemAt': ['$product.category', 0]}, UNKNOWN_CATEGORY]}},
+            'count': {'$sum': '$count'},
+            'quantity': {'$sum': '$quantity'},
+            'revenue': {'$sum': '$revenue'},
+        }},
+    ] + to_document('by_category', line_value)
+    
+    return [by_status, by_product, by_category]
+
+def rebuild_rollups(db, months=None, orders_collection='orders'):
+    """
+    Recompute the rollups of the given 'YYYY-MM' months, or of every month when
+    None, from the orders collection. The aggregations stream on the server and
+    merge their results into the summary collections; only the rebuilt months'
+    buckets are replaced, so a rebuild after an append can stay small.
+    """
+    if months is None:
+        match = {}
+        reset_rollups(db)
+    else:
+        if not months:
+            return 0
+        # One index range per month and date type, rather than a scan of every order
+        match = month_filter(months)
+        db[ROLLUP_COLLECTIONS['month']].delete_many({'_id': {'$in': list(months)}})
+        db[ROLLUP_COLLECTIONS['day']].delete_many({'$or': [{'_id': month_bounds(month)} for month in months]})
+        db[PRODUCT_ROLLUP_COLLECTIONS['month']].delete_many({'bucket': {'$in': list(months)}})
+        db[PRODUCT_ROLLUP_COLLECTIONS['day']].delete_many({'$or': [{'bucket': month_bounds(month)} for month in months]})
+    
+    for period, collection_name in ROLLUP_COLLECTIONS.items():
+        for pipeline in _rollup_pipelines(match, period, collection_name, PRODUCT_ROLLUP_COLLECTIONS[period]):
+            db[orders_collection].aggregate(pipeline, allowDiskUse=True)
+    
+    return sum(
+        db[collection_name].count_documents({})
+        for collection_name in list(ROLLUP_COLLECTIONS.values()) + list(PRODUCT_ROLLUP_COLLECTIONS.values())
+    )
@@ -0,0 +1,71 @@
+import random
+from array import array
+
+# NumPy is optional; it is only needed to draw many samples at once
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def is_numpy_rng(rng):
+    """
+    Tell a numpy Generator apart from random.Random or the random module
+    """
+    return hasattr(rng, 'integers')
+
+class AliasSampler:
+    """
+    Walker/Vose alias table for O(1) draws from a fixed discrete distribution
+    """
+    
+    def __init__(self, weights):
+        count = len(weights)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError("AliasSampler needs at least one positive weight")
+        
+        scaled = [weight * count / total for weight in weights]
+        probability = [1.0] * count
+        alias = list(range(count))
+        
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        
+        # Pair every under-full slot with an over-full one until all slots hold exactly 1
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        
+        # Typed arrays keep a table over millions of products to 16 bytes a slot
+        self.size = count
+        self.probability = array('d', probability)
+        self.alias = array('q', alias)
+        self._arrays = None
+    
+    def sample(self, rng=random):
+        """
+        Draw a single index
+        """
+        index = int(rng.random() * self.size)
+        return index if rng.random() < self.probability[index] else self.alias[index]
+    
+    def sample_many(self, size, rng=random):
+        """
+        Draw size indices, as a NumPy array for a numpy Generator or a list otherwise
+        """
+        if not is_numpy_rng(rng):
+            return [self.sample(rng) for _ in range(size)]
+        
+        if self._arrays is None:
+            self._arrays = (np.array(self.probability), np.array(self.alias, dtype=np.int64))
+        probability, alias = self._arrays
+        
+        index = rng.integers(0, self.size, size=size)
+        return np.where(rng.random(size) < probability[index], index, alias[index])
@@ -0,0 +1,184 @@
+import os
+import json
+import mmap
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from functools import lru_cache
+from collections import namedtuple
+import bson
+from bson.raw_bson import RawBSONDocument
+from common.pipeline import write_batches
+
+# Generated datasets saved for instant re-seeding, one directory per collection and key
+SNAPSHOT_DIR = os.getenv(
+    'SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'snapshots')
+)
+SNAPSHOT_MANIFEST = 'manifest.json'
+
+# Reference data the generators draw from; editing it invalidates every snapshot
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'reference')
+
+# Bump when the snapshot layout or the way shard seeds are derived changes
+SNAPSHOT_FORMAT = 2
+
+# A populate run's snapshot: the manifest to load from, or the directory its shards record into
+SnapshotRun = namedtuple('SnapshotRun', ['collection', 'key', 'config', 'manifest', 'directory'])
+
+@lru_cache(maxsize=None)
+def reference_fingerprint():
+    """
+    SHA-256 over every file in reference/ (names lists, PRODUCT_TYPES, addresses, images)
+    """
+    digest = hashlib.sha256()
+    for root, directories, files in os.walk(REFERENCE_DIR):
+        directories[:] = sorted(directory for directory in directories if directory != '__pycache__')
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, REFERENCE_DIR).replace(os.sep, '/').encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def fingerprint(value):
+    """Short stable hash of some JSON-serializable value, e.g. an image or the products orders draw from"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def snapshot_key(collection_name, config):
+    """
+    Key of the snapshot of a collection generated with the given config
+    (seed, counts, workers, batch size and anything else the documents depend on)
+    """
+    return fingerprint({
+        'format': SNAPSHOT_FORMAT,
+        'collection': collection_name,
+        'config': config,
+        'reference': reference_fingerprint(),
+    })
+
+def snapshot_directory(collection_name, key):
+    return os.path.join(SNAPSHOT_DIR, f"{collection_name}-{key[:16]}")
+
+def find_snapshot(collection_name, key):
+    """The manifest of a complete snapshot for the key, or None"""
+    path = os.path.join(snapshot_directory(collection_name, key), SNAPSHOT_MANIFEST)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('key') != key:
+        return None
+    manifest['directory'] = os.path.dirname(path)
+    return manifest
+
+def start_snapshot(collection_name, key):
+    """
+    Create an empty working directory that shards record their batches into;
+    it only becomes a snapshot once finish_snapshot renames it
+    """
+    directory = f"{snapshot_directory(collection_name, key)}.partial-{os.getpid()}"
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    return directory
+
+def shard_file(directory, shard_index):
+    return os.path.join(directory, f"shard-{shard_index:04d}.bson")
+
+def record_batches(numbered_batches, directory, shard_index):
+    """
+    Pass (batch number, documents) pairs through unchanged while appending each
+    document's BSON to the shard's file, so the snapshot holds exactly what was inserted
+    """
+    with open(shard_file(directory, shard_index), 'wb') as f:
+        for batch_number, batch in numbered_batches:
+            f.write(b''.join(
+                document.raw if isinstance(document, RawBSONDocument) else bson.encode(document) for document in batch
+            ))
+            yield batch_number, batch
+
+def finish_snapshot(directory, collection_name, key, config, documents):
+    """Write the manifest and publish the working directory as the snapshot for key"""
+    shards = sorted(name for name in os.listdir(directory) if name.endswith('.bson'))
+    manifest = {
+        'key': key,
+        'collection': collection_name,
+        'config': config,
+        'documents': documents,
+        'shards': shards,
+        'bytes': sum(os.path.getsize(os.path.join(directory, name)) for name in shards),
+        'created': datetime.now(timezone.utc).isoformat(),
+    }
+    with open(os.path.join(directory, SNAPSHOT_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    final = snapshot_directory(collection_name, key)
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(directory, final)
+    return manifest
+
+def discard_snapshot(directory):
+    """Remove the working directory of a run that did not finish"""
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def snapshot_batches(manifest, batch_size):
+    """
+    Yield the snapshot's documents in lists of at most batch_size RawBSONDocuments,
+    read from memory-mapped shard files; pymongo inserts them without re-encoding
+    """
+    batch = []
+    for name in manifest['shards']:
+        path = os.path.join(manifest['directory'], name)
+        if os.path.getsize(path) == 0:
+            continue
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = 0
+            end = len(data)
+            while position < end:
+                length = int.from_bytes(data[position:position + 4], 'little')
+                batch.append(RawBSONDocument(data[position:position + length]))
+                position += length
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+def prepare_snapshot(collection_name, config):
+    """
+    Look up the snapshot for config, or start recording one when there is none
+    """
+    key = snapshot_key(collection_name, config)
+    manifest = find_snapshot(collection_name, key)
+    directory = None if manifest else start_snapshot(collection_name, key)
+    return SnapshotRun(collection_name, key, config, manifest, directory)
+
+def complete_snapshot(run, documents):
+    """Publish what the shards of run recorded"""
+    if run is not None and run.directory:
+        manifest = finish_snapshot(run.directory, run.collection, run.key, run.config, documents)
+        print(f"Saved a snapshot of {documents} {run.collection} ({manifest['bytes'] / (1024 * 1024):,.1f} MB)")
+
+def abandon_snapshot(run):
+    """Drop an unfinished recording; a published snapshot is left alone"""
+    if run is not None:
+        discard_snapshot(run.directory)
+
+def load_snapshot(collection, manifest, batch_size, pipeline=None, uri=None):
+    """
+    Insert a snapshot's documents as they were saved and return how many were written
+    """
+    written = write_batches(collection, enumerate(snapshot_batches(manifest, batch_size)), pipeline=pipeline, uri=uri)
+    print(f"Loaded {written} {manifest['collection']} from snapshot {manifest['key'][:16]} (no regeneration)")
+    return written
+
+def add_snapshot_args(parser):
+    """
+    Add the --snapshot option to a populate script's argument parser
+    """
+    parser.add_argument('--snapshot', action='store_true',
+                        help="In replace mode, load the dataset from a snapshot of the same seed and options when one "
+                             "exists, or save one while generating (stored under .cache/snapshots)")
+    return parser
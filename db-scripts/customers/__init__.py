@@ -0,0 +1 @@
+# Customers seeding package
@@ -0,0 +1,182 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import argparse
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+from common.parallel import add_parallel_args, derive_seed, random_uuid, resolve_seed
+from common.incremental import batches_done, documents_to_write, add_incremental_args
+from common.connection import get_client, add_connection_args, connection_from_args, print_connection_stats
+from common.pipeline import write_batches, add_pipeline_args, pipeline_from_args
+from common.populate import run_populate
+from common.snapshots import record_batches, add_snapshot_args
+from common.instrumentation import add_instrumentation_args, instrumentation_from_args, write_report
+from common.identities import IdentityGenerator, first_free_round, add_identity_args
+from admins.populate_admins import generate_address, generate_phone_number
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+CUSTOMERS_COLLECTION = 'customers'
+
+# Default number of customers to generate and how many to send per write
+DEFAULT_NUM_CUSTOMERS = 200
+DEFAULT_BATCH_SIZE = 1000
+
+def generate_customers(num_customers=DEFAULT_NUM_CUSTOMERS, rng=random, identities=None, first_position=0):
+    """
+    Generate a list of customer dictionaries. Names and emails come from identities
+    at first_position onwards, so customers over distinct positions never share an email.
+    Order statistics start at zero and are filled in once orders reference the customers.
+    """
+    customers = []
+    identities = identities or IdentityGenerator()
+    
+    for position in range(first_position, first_position + num_customers):
+        first_name, last_name, _, email = identities.identity(position)
+        
+        customer_id = "CUSTOMER-" + random_uuid(rng)
+        current_time = datetime.now(timezone.utc)
+        
+        customer = {
+            '_id': customer_id,
+            'id': customer_id,
+            'name': f"{first_name} {last_name}",
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': email,
+            'phone_number': generate_phone_number(rng),
+            'address': generate_address(rng),
+            'order_count': 0,
+            'total_spent': 0.0,
+            'last_order_date': None,
+            'createdAt': current_time,
+            'updatedAt': current_time,
+            '__v': 0
+        }
+        customers.append(customer)
+    
+    return customers
+
+def insert_customer_shard(shard, client=None, batch_size=DEFAULT_BATCH_SIZE, upsert=False, checkpoint=None,
+                          pipeline=None, snapshot_dir=None, identities=None, identity_offset=0):
+    """
+    Generate and insert one shard of customers in batches,
+    over the given client or the shared client of the process.
+    The shard's customers take the identities at identity_offset + their position in the run.
+    With a checkpoint, batches already written are skipped and progress is recorded after every batch.
+    With pipeline options, generation overlaps with up to pipeline.in_flight concurrent writes.
+    With a snapshot_dir, every batch is also recorded there.
+    """
+    client = client or get_client(MONGO_URI)
+    db = client[DB_NAME]
+    collection = db[CUSTOMERS_COLLECTION]
+    
+    # Each shard draws from its own RNG so the dataset is reproducible
+    rng = random.Random(shard.seed)
+    start_batch = batches_done(checkpoint, shard.index)
+    
+    def batches():
+        for batch_number, batch_start in enumerate(range(0, shard.count, batch_size)):
+            customers = generate_customers(min(batch_size, shard.count - batch_start), rng=rng, identities=identities,
+                                           first_position=identity_offset + shard.start + batch_start)
+            
+            # Batches written before an interruption only advance the RNG
+            if batch_number >= start_batch:
+                yield batch_number, customers
+    
+    numbered_batches = batches()
+    if snapshot_dir:
+        numbered_batches = record_batches(numbered_batches, snapshot_dir, shard.index)
+    
+    return write_batches(collection, numbered_batches, upsert=upsert, checkpoint=checkpoint,
+                         shard_index=shard.index, pipeline=pipeline, uri=MONGO_URI)
+
+def populate_customers(num_customers=DEFAULT_NUM_CUSTOMERS, workers=1, seed=None, client=None,
+                       batch_size=DEFAULT_BATCH_SIZE, mode='replace', resume=False, fast_reset=False, pipeline=None,
+                       snapshot=False, identity_vocabularies=None):
+    """
+    Write generated customers to the customers collection and return how many were written,
+    or None when the run failed.
+    mode replaces the collection, appends num_customers customers or tops it up to num_customers;
+    resume continues an interrupted run from its checkpoint.
+    Emails are unique the same way admin emails are, see IdentityGenerator.
+    With snapshot, a fresh replace loads a saved copy of the same dataset, or saves one.
+    Orders seeded afterwards reference these customers by id.
+    """
+    try:
+        # Connect to MongoDB
+        client = client or get_client(MONGO_URI)
+        db = client[DB_NAME]
+        collection = db[CUSTOMERS_COLLECTION]
+        
+        # Appended customers start at a round of numbered suffixes none of the customers already there reach
+        identity_round = 0
+        if mode != 'replace':
+            identity_round = first_free_round(
+                customer['email'] for customer in collection.find({}, {'email': 1}) if customer.get('email')
+            )
+        
+        # A resumed run regenerates the same customers from the settings it was started with
+        settings = {
+            'mode': mode,
+            'count': documents_to_write(collection, num_customers, mode),
+            'seed': resolve_seed(seed),
+            'workers': workers,
+            'batch_size': batch_size,
+            'identity_round': identity_round,
+            'identity_vocabularies': list(identity_vocabularies or []),
+        }
+        
+        # Every shard shares one generator, so their emails never collide
+        def shard_kwargs(settings):
+            identities = IdentityGenerator(derive_seed(settings['seed'], 'identities', CUSTOMERS_COLLECTION),
+                                           settings['identity_vocabularies'])
+            return {'identities': identities, 'identity_offset': identities.first_position(settings['identity_round'])}
+        
+        return run_populate(db, CUSTOMERS_COLLECTION, settings, insert_customer_shard, shard_kwargs,
+                            client=client, uri=MONGO_URI, resume=resume, fast_reset=fast_reset,
+                            pipeline=pipeline, snapshot=snapshot)
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the customers collection with sample customers")
+    parser.add_argument('--count', type=int, default=DEFAULT_NUM_CUSTOMERS,
+                        help=f"Number of customers to generate (default: {DEFAULT_NUM_CUSTOMERS})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Number of customers per write (default: {DEFAULT_BATCH_SIZE})")
+    add_identity_args(parser)
+    add_incremental_args(parser)
+    add_connection_args(parser)
+    add_pipeline_args(parser)
+    add_snapshot_args(parser)
+    add_instrumentation_args(parser)
+    add_parallel_args(parser)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    instrumentation_from_args(args)
+    connection_from_args(args)
+    inserted = populate_customers(num_customers=args.count, workers=args.workers, seed=args.seed, batch_size=args.batch_size,
+                                  mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+                                  pipeline=pipeline_from_args(args), snapshot=args.snapshot,
+                                  identity_vocabularies=args.identity_vocabularies)
+    print_connection_stats()
+    if args.report:
+        write_report(args.report)
+    sys.exit(0 if inserted is not None else 1)
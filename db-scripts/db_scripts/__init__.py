@@ -0,0 +1 @@
+# Orchestrated seeding command line package
@@ -0,0 +1,269 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from dotenv import load_dotenv
+from db_scripts.stages import Stage, run_stages, print_stage_summary
+from common.parallel import add_parallel_args, resolve_seed
+from common.dates import add_calendar_args, add_date_type_args, calendar_from_args
+from common.baskets import add_basket_args
+from common.inventory import add_stock_args
+from common.catalog import add_catalog_args
+from common.customers import add_customer_args
+from common.readload import add_load_args
+from common.passwords import add_hashing_args
+from common.identities import add_identity_args
+from common.assets import add_image_storage_args
+from common.incremental import reset_collection, clear_checkpoint, add_incremental_args
+from common.connection import get_client, close_clients, add_connection_args, connection_from_args, print_connection_stats
+from common.pipeline import add_pipeline_args, pipeline_from_args
+from common.snapshots import add_snapshot_args
+from common.indexes import add_index_args
+from common.rollups import reset_rollups
+from common.instrumentation import add_instrumentation_args, instrumentation_from_args, write_report
+from products.populate_products import populate_products, DEFAULT_NUM_PRODUCTS
+from admins.populate_admins import populate_admins, DEFAULT_NUM_ADMINS
+from customers.populate_customers import populate_customers, DEFAULT_NUM_CUSTOMERS
+from indexes.build_indexes import build_dashboard_indexes
+from loadtest.replay_dashboard import replay_dashboard_load
+from orders.stream_orders import add_stream_args, stream_from_args
+from orders.migrate_order_dates import add_migration_args, migrate_from_args
+from orders.populate_orders import (
+    populate_orders, DEFAULT_NUM_ORDERS, DEFAULT_BATCH_SIZE, ORDER_BACKENDS, ORDER_ENCODINGS, ORDER_STORAGES,
+    MIN_ORDERS_PER_MONTH
+)
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+
+# Seeding stages and the stages they depend on
+STAGE_DEPENDENCIES = {
+    'products': [],
+    'admins': [],
+    'customers': [],
+    'orders': ['products', 'customers'],
+    'indexes': ['products', 'admins', 'customers', 'orders'],
+}
+
+# Collections written by the seeding stages
+SEEDED_COLLECTIONS = ['products', 'admins', 'customers', 'orders']
+
+def stage_result(name, result):
+    """
+    Turn the None a populate step returns when it fails into an error,
+    so the stage is recorded as failed and the stages depending on it are skipped
+    """
+    if result is None:
+        raise RuntimeError(f"{name} failed, see the error printed above")
+    return result
+
+def build_seed_stages(args, client):
+    """
+    Build the selected seeding stages, all sharing one client.
+    Dependencies on stages that are not selected are dropped, so their
+    existing collections are used as they are.
+    """
+    seed = resolve_seed(args.seed)
+    pipeline = pipeline_from_args(args)
+    selected = args.stages or list(STAGE_DEPENDENCIES)
+    
+    runners = {
+        'products': lambda: stage_result('products', populate_products(
+            num_products=args.products, workers=args.workers, seed=seed,
+            image_storage=args.image_storage, offline=args.offline, client=client,
+            mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+            pipeline=pipeline, snapshot=args.snapshot
+        )),
+        'admins': lambda: stage_result('admins', populate_admins(
+            num_admins=args.admins, workers=args.workers, seed=seed,
+            hash_strategy=args.hash_strategy, bcrypt_rounds=args.bcrypt_rounds, hash_workers=args.hash_workers,
+            image_storage=args.image_storage, client=client,
+            mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+            pipeline=pipeline, snapshot=args.snapshot, identity_vocabularies=args.identity_vocabularies
+        )),
+        'customers': lambda: stage_result('customers', populate_customers(
+            num_customers=args.customers, workers=args.workers, seed=seed, client=client,
+            mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+            pipeline=pipeline, snapshot=args.snapshot, identity_vocabularies=args.identity_vocabularies
+        )),
+        'orders': lambda: stage_result('orders', populate_orders(
+            num_orders=args.orders, batch_size=args.batch_size, workers=args.workers, seed=seed,
+            backend=args.backend, calendar=calendar_from_args(args), min_per_month=args.min_per_month,
+            client=client, mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+            pipeline=pipeline, rollups=not args.skip_rollups, snapshot=args.snapshot, encoding=args.encoding,
+            basket_sizes=args.basket_sizes, zipf_exponent=args.zipf_exponent, stock=args.stock,
+            catalog_cache=args.catalog_cache, catalog_batch_size=args.catalog_batch_size,
+            customers=not args.skip_customers, customer_zipf_exponent=args.customer_zipf_exponent,
+            date_type=args.date_type, storage=args.order_storage
+        )),
+        # Indexes are built once the bulk load is over, so inserts do not maintain them
+        'indexes': lambda: f"{stage_result('indexes', build_dashboard_indexes(text=args.text_indexes, check_plans=not args.skip_plan_check, client=client))} indexes",
+    }
+    
+    return [
+        Stage(name, runners[name], [dependency for dependency in STAGE_DEPENDENCIES[name] if dependency in selected])
+        for name in STAGE_DEPENDENCIES
+        if name in selected
+    ]
+
+def seed_command(args):
+    """
+    Seed the selected collections concurrently and print a per-stage timing summary
+    """
+    # Command listeners only see clients created after instrumentation is on
+    instrumentation_from_args(args)
+    connection_from_args(args)
+    client = get_client(MONGO_URI)
+    try:
+        results = run_stages(build_seed_stages(args, client))
+    finally:
+        close_clients()
+    
+    print_stage_summary(results)
+    print_connection_stats()
+    if args.report:
+        write_report(args.report)
+    return 0 if all(result.status == 'ok' for result in results) else 1
+
+def reset_command(args):
+    """
+    Drop and recreate the selected collections and forget their checkpoints
+    """
+    client = get_client(MONGO_URI)
+    try:
+        db = client[DB_NAME]
+        for name in args.collections:
+            reset_collection(db, name, fast=True)
+            clear_checkpoint(db, name)
+            if name == 'orders':
+                reset_rollups(db)
+            print(f"Reset {name}")
+    finally:
+        close_clients()
+    return 0
+
+def load_command(args):
+    """
+    Replay the dashboard's read queries against the database and report their latency
+    """
+    connection_from_args(args)
+    try:
+        summary = replay_dashboard_load(mix=args.mix, concurrency=args.concurrency, duration=args.duration,
+                                        requests=args.requests, seed=args.seed, output=args.output, baseline=args.baseline)
+    finally:
+        close_clients()
+    print_connection_stats()
+    return 0 if summary is not None else 1
+
+def stream_command(args):
+    """
+    Stream new orders into the database at a target rate and report the rate and write latency achieved
+    """
+    connection_from_args(args)
+    try:
+        summary = stream_from_args(args)
+    finally:
+        close_clients()
+    print_connection_stats()
+    return 0 if summary is not None else 1
+
+def migrate_dates_command(args):
+    """
+    Convert the string order dates already in the database to BSON dates
+    """
+    connection_from_args(args)
+    try:
+        converted = migrate_from_args(args)
+    finally:
+        close_clients()
+    print_connection_stats()
+    return 0 if converted is not None else 1
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m db_scripts', description="Seed and maintain the dashboard database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    seed_parser = subparsers.add_parser('seed', help="Populate products, admins, customers and orders, then build their indexes")
+    seed_parser.add_argument('--stages', nargs='+', choices=list(STAGE_DEPENDENCIES), default=None,
+                             help="Stages to run (default: all)")
+    seed_parser.add_argument('--products', type=int, default=DEFAULT_NUM_PRODUCTS,
+                             help=f"Number of products to generate (default: {DEFAULT_NUM_PRODUCTS})")
+    seed_parser.add_argument('--admins', type=int, default=DEFAULT_NUM_ADMINS,
+                             help=f"Number of random admins to generate (default: {DEFAULT_NUM_ADMINS})")
+    seed_parser.add_argument('--customers', type=int, default=DEFAULT_NUM_CUSTOMERS,
+                             help=f"Number of customers to generate (default: {DEFAULT_NUM_CUSTOMERS})")
+    seed_parser.add_argument('--skip-customers', action='store_true',
+                             help="Give orders a random customer name instead of referencing the seeded customers")
+    seed_parser.add_argument('--orders', type=int, default=DEFAULT_NUM_ORDERS,
+                             help=f"Number of orders to generate (default: {DEFAULT_NUM_ORDERS})")
+    seed_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                             help=f"Number of orders per insert_many call (default: {DEFAULT_BATCH_SIZE})")
+    seed_parser.add_argument('--backend', choices=ORDER_BACKENDS, default='auto',
+                             help="Order generation backend (default: auto)")
+    seed_parser.add_argument('--encoding', choices=ORDER_ENCODINGS, default='raw',
+                             help="How orders are encoded for the driver (default: raw)")
+    seed_parser.add_argument('--min-per-month', type=int, default=MIN_ORDERS_PER_MONTH,
+                             help=f"Minimum number of orders in every month (default: {MIN_ORDERS_PER_MONTH})")
+    seed_parser.add_argument('--skip-rollups', action='store_true',
+                             help="Do not maintain the daily and monthly order rollup collections")
+    seed_parser.add_argument('--offline', action='store_true',
+                             help="Never download the default product image")
+    add_basket_args(seed_parser)
+    add_stock_args(seed_parser)
+    add_catalog_args(seed_parser)
+    add_customer_args(seed_parser)
+    add_calendar_args(seed_parser)
+    add_date_type_args(seed_parser)
+    seed_parser.add_argument('--order-storage', choices=ORDER_STORAGES, default='collection',
+                             help="Write orders to a regular or a time-series collection (MongoDB 7.0+, --mode replace only) (default: collection)")
+    add_hashing_args(seed_parser)
+    add_identity_args(seed_parser)
+    add_image_storage_args(seed_parser)
+    add_incremental_args(seed_parser)
+    add_connection_args(seed_parser)
+    add_pipeline_args(seed_parser)
+    add_snapshot_args(seed_parser)
+    add_index_args(seed_parser)
+    add_instrumentation_args(seed_parser)
+    add_parallel_args(seed_parser)
+    seed_parser.set_defaults(handler=seed_command)
+    
+    load_parser = subparsers.add_parser('load', help="Replay the dashboard's list, search and lookup queries and report their latency")
+    add_load_args(load_parser)
+    add_connection_args(load_parser)
+    load_parser.set_defaults(handler=load_command)
+    
+    stream_parser = subparsers.add_parser('stream', help="Insert live orders at a target rate and move them through their statuses")
+    add_stream_args(stream_parser)
+    add_connection_args(stream_parser)
+    stream_parser.set_defaults(handler=stream_command)
+    
+    migrate_parser = subparsers.add_parser('migrate-dates', help="Convert string order dates to BSON dates in streaming batches")
+    add_migration_args(migrate_parser)
+    add_connection_args(migrate_parser)
+    migrate_parser.set_defaults(handler=migrate_dates_command)
+    
+    reset_parser = subparsers.add_parser('reset', help="Drop and recreate collections instead of deleting every document")
+    reset_parser.add_argument('--collections', nargs='+', choices=SEEDED_COLLECTIONS, default=SEEDED_COLLECTIONS,
+                              help="Collections to reset (default: all)")
+    reset_parser.set_defaults(handler=reset_command)
+    
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
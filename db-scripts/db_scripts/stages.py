@@ -0,0 +1,96 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# A unit of seeding work and the names of the stages it has to wait for
+Stage = namedtuple('Stage', ['name', 'run', 'depends_on'])
+
+# Outcome of a stage; started/finished are seconds since the run began
+StageResult = namedtuple('StageResult', ['name', 'status', 'started', 'finished', 'result', 'error'])
+
+def check_stages(stages):
+    """
+    Make sure stage names are unique and every dependency names a stage of the run
+    """
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names in {names}")
+    
+    for stage in stages:
+        for dependency in stage.depends_on:
+            if dependency not in names:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+def run_stages(stages, max_concurrency=None):
+    """
+    Run every stage on a thread pool as soon as all of its dependencies have succeeded,
+    so independent stages overlap and the run takes as long as its critical path.
+    A stage whose dependency failed or was skipped is skipped. Returns the results in stage order.
+    """
+    check_stages(stages)
+    
+    run_start = time.perf_counter()
+    pending = {stage.name: stage for stage in stages}
+    results = {}
+    
+    def timed(stage):
+        started = time.perf_counter() - run_start
+        try:
+            result = stage.run()
+            return StageResult(stage.name, 'ok', started, time.perf_counter() - run_start, result, None)
+        except Exception as e:
+            return StageResult(stage.name, 'failed', started, time.perf_counter() - run_start, None, e)
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency or max(1, len(stages))) as executor:
+        running = {}
+        
+        while pending or running:
+            # Start or skip every stage whose dependencies have all finished
+            scheduled = True
+            while scheduled:
+                scheduled = False
+                for name, stage in list(pending.items()):
+                    if not all(dependency in results for dependency in stage.depends_on):
+                        continue
+                    
+                    del pending[name]
+                    scheduled = True
+                    if all(results[dependency].status == 'ok' for dependency in stage.depends_on):
+                        running[executor.submit(timed, stage)] = name
+                    else:
+                        now = time.perf_counter() - run_start
+                        results[name] = StageResult(name, 'skipped', now, now, None, None)
+            
+            if not running:
+                # Whatever is left waits on itself
+                for name in pending:
+                    results[name] = StageResult(name, 'skipped', 0.0, 0.0, None, ValueError("Dependency cycle"))
+                break
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[running.pop(future)] = result
+    
+    return [results[stage.name] for stage in stages]
+
+def print_stage_summary(results):
+    """
+    Print when each stage started, how long it took and how it ended,
+    next to the run's wall-clock time and the sum of all stage times
+    """
+    print(f"\n{'Stage':<12} {'Start':>9} {'Duration':>10}  Status")
+    for result in results:
+        duration = result.finished - result.started
+        status = result.status
+        if result.error is not None:
+            status += f" ({result.error})"
+        elif isinstance(result.result, int):
+            status += f" ({result.result} documents)"
+        elif result.result is not None:
+            status += f" ({result.result})"
+        print(f"{result.name:<12} {result.started:>8.2f}s {duration:>9.2f}s  {status}")
+    
+    wall_time = max((result.finished for result in results), default=0.0)
+    stage_time = sum(result.finished - result.started for result in results)
+    print(f"Total wall time {wall_time:.2f}s (sum of stage times {stage_time:.2f}s)")
@@ -0,0 +1 @@
+# Index management package
@@ -0,0 +1,71 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+from dotenv import load_dotenv
+from common.connection import get_client
+from common.indexes import (
+    DASHBOARD_INDEXES, build_indexes, check_query_plans, print_index_builds, print_plan_checks, add_index_args
+)
+from common.instrumentation import stage
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+
+def build_dashboard_indexes(collections=None, text=False, check_plans=True, client=None):
+    """
+    Build the indexes the dashboard queries need, print their build times and sizes,
+    then confirm the dashboard queries use them. Returns how many indexes were built,
+    or None when the build failed.
+    """
+    try:
+        # Connect to MongoDB
+        client = client or get_client(MONGO_URI)
+        db = client[DB_NAME]
+        
+        start_time = time.perf_counter()
+        with stage('indexes.build'):
+            builds = build_indexes(db, collections, text)
+        print_index_builds(builds)
+        print(f"Built {sum(build.status == 'built' for build in builds)} indexes in {time.perf_counter() - start_time:.2f}s")
+        
+        if check_plans:
+            try:
+                checks = check_query_plans(db, collections)
+                print_plan_checks(checks)
+                scans = [check for check in checks if not check.uses_index]
+                if scans:
+                    print(f"{len(scans)} dashboard queries still scan the whole collection")
+            except (NotImplementedError, AttributeError):
+                # In-process stand-ins such as mongomock cannot explain queries
+                print("This server does not support explain; skipped the query plan check")
+        
+        return sum(build.status == 'built' for build in builds)
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the indexes behind the dashboard's list, sort and search queries")
+    parser.add_argument('--collections', nargs='+', choices=list(DASHBOARD_INDEXES), default=None,
+                        help="Collections to index (default: all)")
+    add_index_args(parser)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    built = build_dashboard_indexes(collections=args.collections, text=args.text_indexes, check_plans=not args.skip_plan_check)
+    sys.exit(0 if built is not None else 1)
@@ -0,0 +1 @@
+# Dashboard load generation package
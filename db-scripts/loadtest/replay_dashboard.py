@@ -0,0 +1,84 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from common.connection import get_client, add_connection_args, connection_from_args, print_connection_stats
+from common.readload import (
+    DEFAULT_CONCURRENCY, DEFAULT_DURATION, DashboardQueries, run_load, summarize, print_summary,
+    compare_summaries, add_load_args
+)
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+
+def replay_dashboard_load(mix=None, concurrency=DEFAULT_CONCURRENCY, duration=DEFAULT_DURATION, requests=None, seed=0,
+                          output=None, baseline=None, client=None):
+    """
+    Put the dashboard's read load on the database: replay the mix of list, sort,
+    search, deep-page and lookup queries from concurrent threads, then print the
+    throughput and p50/p95/p99 latency of every query shape. Returns the summary.
+    """
+    try:
+        if not duration and requests is None:
+            raise ValueError("Give a --duration or a number of --requests, or the load never stops")
+        
+        # Every simulated admin shares the client's connection pool, like the API's Mongoose connection
+        client = client or get_client(MONGO_URI)
+        db = client[DB_NAME]
+        
+        queries = DashboardQueries(db, mix)
+        print(f"Replaying {len(queries.shapes)} query shapes from {concurrency} concurrent admins "
+              f"({f'{duration:g}s' if duration else 'no time limit'}{f', {requests} requests' if requests else ''})")
+        samples, seconds = run_load(queries, concurrency, duration, requests, seed)
+        summary = summarize(samples, seconds)
+        print_summary(summary, seconds)
+        
+        if output:
+            with open(output, 'w') as f:
+                json.dump({
+                    'created': datetime.now(timezone.utc).isoformat(),
+                    'database': DB_NAME,
+                    'concurrency': concurrency,
+                    'seconds': round(seconds, 3),
+                    'mix': queries.mix,
+                    'shapes': summary,
+                }, f, indent=2)
+            print(f"Results saved to {output}")
+        
+        if baseline:
+            with open(baseline) as f:
+                compare_summaries(json.load(f)['shapes'], summary)
+        
+        return summary
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay the dashboard's list, search and lookup queries and report their latency")
+    add_load_args(parser)
+    add_connection_args(parser)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    connection_from_args(args)
+    summary = replay_dashboard_load(mix=args.mix, concurrency=args.concurrency, duration=args.duration,
+                                    requests=args.requests, seed=args.seed, output=args.output, baseline=args.baseline)
+    print_connection_stats()
+    sys.exit(0 if summary is not None else 1)
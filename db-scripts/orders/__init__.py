@@ -0,0 +1 @@
+# Orders seeding package
@@ -0,0 +1,122 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from common.connection import get_client, write_count, add_connection_args, connection_from_args, print_connection_stats
+from common.dates import day_datetime
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+
+# The string dates converted by the migration: (collection, field)
+DATE_FIELDS = [
+    ('orders', 'date'),
+    ('customers', 'last_order_date'),
+]
+
+# Documents read per cursor batch and updated per bulk_write
+DEFAULT_BATCH_SIZE = 5000
+
+def convert_date_field(collection, field, batch_size=DEFAULT_BATCH_SIZE, on_progress=None):
+    """
+    Turn the 'YYYY-MM-DD' strings of field into BSON dates at midnight UTC, streaming
+    the documents still holding a string through a cursor and converting each batch
+    with one unordered bulk_write. Only _id and field are read, and each update
+    matches the string it replaces, so orders written meanwhile are left alone and
+    an interrupted migration picks up where it stopped when run again.
+    Returns how many values were converted and how many were not dates.
+    """
+    converted = 0
+    skipped = 0
+    updates = []
+    
+    def flush():
+        nonlocal converted
+        if updates:
+            converted += write_count(collection.bulk_write(updates, ordered=False), len(updates), 'modified_count')
+            updates.clear()
+            if on_progress:
+                on_progress(converted)
+    
+    for document in collection.find({field: {'$type': 'string'}}, {field: 1}, batch_size=batch_size):
+        value = document[field]
+        try:
+            new_value = day_datetime(value[:10])
+        except ValueError:
+            skipped += 1
+            continue
+        updates.append(UpdateOne({'_id': document['_id'], field: value}, {'$set': {field: new_value}}))
+        if len(updates) >= batch_size:
+            flush()
+    flush()
+    
+    return converted, skipped
+
+def migrate_order_dates(batch_size=DEFAULT_BATCH_SIZE, client=None):
+    """
+    Convert the string order dates of an existing database to BSON dates, along
+    with the last order date of the customers. The rollups are keyed by the same
+    days either way, so they stay as they are. Returns how many values were converted.
+    """
+    try:
+        # Connect to MongoDB
+        client = client or get_client(MONGO_URI)
+        db = client[DB_NAME]
+        
+        total = 0
+        for collection_name, field in DATE_FIELDS:
+            start_time = time.perf_counter()
+            
+            def on_progress(converted):
+                print(f"\rConverted {converted:,} {collection_name}.{field} values", end='', flush=True)
+            
+            converted, skipped = convert_date_field(db[collection_name], field, batch_size, on_progress)
+            elapsed = time.perf_counter() - start_time
+            print(f"\rConverted {converted:,} {collection_name}.{field} values in {elapsed:.2f}s"
+                  + (f", left {skipped:,} that are not YYYY-MM-DD dates" if skipped else ''))
+            total += converted
+        
+        return total
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def add_migration_args(parser):
+    """
+    Add the date migration options to an argument parser
+    """
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Documents read and updated per batch (default: {DEFAULT_BATCH_SIZE})")
+    return parser
+
+def migrate_from_args(args):
+    """Migrate the order dates with the options added by add_migration_args"""
+    return migrate_order_dates(batch_size=args.batch_size)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert the string order dates of the orders and customers to BSON dates")
+    add_migration_args(parser)
+    add_connection_args(parser)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    connection_from_args(args)
+    converted = migrate_from_args(args)
+    print_connection_stats()
+    sys.exit(0 if converted is not None else 1)
@@ -4,12 +4,42 @@ import sys
 # Add the parent directory to Python path BEFORE any local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from pymongo import MongoClient
+import bson
+from bson.raw_bson import RawBSONDocument
+from collections import namedtuple
 from dotenv import load_dotenv
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from reference.malaysian_names import FIRST_NAMES, LAST_NAMES
+from common.parallel import run_sharded, add_parallel_args, random_uuid, resolve_seed
+from common.incremental import (
+    collection_type, reset_collection, open_checkpoint, batches_done, complete_checkpoint, documents_to_write,
+    record_months, written_months, add_incremental_args
+)
+from common.connection import get_client, add_connection_args, connection_from_args, print_connection_stats
+from common.pipeline import write_batches, add_pipeline_args, pipeline_from_args
+from common.rollups import RollupAccumulator, write_rollups, reset_rollups, rebuild_rollups
+from common.snapshots import prepare_snapshot, load_snapshot, complete_snapshot, abandon_snapshot, record_batches, add_snapshot_args
+from common.instrumentation import stage, count, add_instrumentation_args, instrumentation_from_args, write_report
+from common.dates import CalendarSampler, date_value, day_datetime, month_bounds, add_calendar_args, add_date_type_args, calendar_from_args
+from common.baskets import BasketSampler, DEFAULT_BASKET_SIZE_WEIGHTS, DEFAULT_ZIPF_EXPONENT, add_basket_args
+from common.inventory import StockLedger, write_stock, sold_updates, add_stock_args
+from common.catalog import CATALOG_BATCH_SIZE, load_catalog, add_catalog_args
+from common.customers import (
+    DEFAULT_CUSTOMER_ZIPF_EXPONENT, CustomerSampler, load_customers, refresh_customer_stats, add_customer_args
+)
+from common.rawbson import (
+    BSON_ARRAY, BSON_DOCUMENT, BSON_DOUBLE, BSON_STRING, BoundedCache, ElementCache, element_name, encode_element,
+    pack_int32, pack_double, array_element
+)
+import argparse
 import random
-import uuid
+import time
+
+# NumPy is optional; without it orders are generated with the pure-Python backend
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Get project root directory in a device-agnostic way
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,8 +52,44 @@ load_dotenv(dotenv_path)
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
 DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
 PRODUCTS_COLLECTION = 'products'
+CUSTOMERS_COLLECTION = 'customers'
 ORDERS_COLLECTION = 'orders'
 
+# Default number of orders to generate and how many to send per insert_many
+DEFAULT_NUM_ORDERS = 1000
+DEFAULT_BATCH_SIZE = 1000
+
+# Minimum number of orders generated for every month in the date range
+MIN_ORDERS_PER_MONTH = 30
+
+# Dates between 2020 and 2025, every month equally likely
+DEFAULT_CALENDAR = CalendarSampler()
+
+# Order generation backends ('auto' uses numpy when it is installed)
+ORDER_BACKENDS = ['auto', 'python', 'numpy']
+
+# How generated orders are handed to the driver: 'raw' encodes them straight
+# into BSON, 'dict' builds a dict per order for pymongo to encode
+ORDER_ENCODINGS = ['raw', 'dict']
+
+# Where orders are written: a regular collection, or a time-series collection
+# (MongoDB 5.0+) that stores them in buckets of orders close in time
+ORDER_STORAGES = ['collection', 'timeseries']
+
+# Options of the time-series orders collection. The order date is its time field.
+# There is no meta field: the status changes over an order's life and the other
+# fields are per order, so orders close in time simply share buckets
+ORDER_TIMESERIES = {'timeField': 'date', 'granularity': 'hours'}
+
+# Oldest server whose time-series collections accept updates of fields other than
+# the meta field, such as the status updates of the dashboard and the order stream
+TIMESERIES_MIN_SERVER_VERSION = (7, 0)
+
+# One generated order before it becomes a document; lines are (product, quantity) pairs
+# and date is a 'YYYY-MM-DD' string whatever type it is stored as.
+# customer_id is None when orders only carry a customer name
+OrderRow = namedtuple('OrderRow', ['id', 'customer', 'date', 'total', 'status', 'lines', 'customer_id'], defaults=(None,))
+
 # Order status types
 ORDER_STATUSES = [
     'Pending', 
@@ -31,149 +97,862 @@ ORDER_STATUSES = [
     'Completed'
 ]
 
-def generate_customer_name():
+def generate_customer_name(rng=random):
     """
     Generate a random customer name
     """
-    first_name = random.choice(FIRST_NAMES)
-    last_name = random.choice(LAST_NAMES)
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
     return f"{first_name} {last_name}"
 
-def fetch_products():
+def fetch_catalog(client=None, cache=False, batch_size=CATALOG_BATCH_SIZE):
     """
-    Fetch existing products from the database
+    Load existing products from the database as a compact ProductCatalog,
+    over the given client or the shared client of the process
     """
     try:
-        client = MongoClient(MONGO_URI)
+        client = client or get_client(MONGO_URI)
         db = client[DB_NAME]
-        products_collection = db[PRODUCTS_COLLECTION]
-        
-        # Fetch all products
-        products = list(products_collection.find({}, {'_id': 1, 'name': 1, 'price': 1}))
         
-        client.close()
-        return products
+        # Stream the products into packed columns instead of a dict per product
+        return load_catalog(db[PRODUCTS_COLLECTION], batch_size=batch_size, cache=cache)
     
     except Exception as e:
         print(f"Error fetching products: {e}")
-        return []
+        return None
 
-def generate_date():
+def fetch_customers(client=None, batch_size=CATALOG_BATCH_SIZE):
     """
-    Generate a date between 2020 and 2025,
-    ensuring at least one order per month
+    Load existing customers from the database as a compact CustomerDirectory,
+    over the given client or the shared client of the process
     """
-    start_date = datetime(2020, 1, 1)
-    end_date = datetime(2025, 1, 1)
+    try:
+        client = client or get_client(MONGO_URI)
+        db = client[DB_NAME]
+        return load_customers(db[CUSTOMERS_COLLECTION], batch_size=batch_size)
     
-    # Calculate total months
-    total_months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+    except Exception as e:
+        print(f"Error fetching customers: {e}")
+        return None
+
+def orders_date_type(collection):
+    """
+    Type the dates of an orders collection are stored as, judging by its newest
+    order: BSON dates sort after strings, so any migrated order makes it 'datetime'.
+    None when the collection is empty.
+    """
+    newest = collection.find_one({}, {'date': 1}, sort=[('date', -1)])
+    if not newest or 'date' not in newest:
+        return None
+    return 'string' if isinstance(newest['date'], str) else 'datetime'
+
+def check_timeseries_orders(client, mode='replace', resumed=False):
+    """
+    Raise a ValueError unless orders can be written to a time-series collection:
+    only by a fresh replace, since appends, top-ups and resumed runs upsert by _id,
+    which is not unique in a time-series collection, and only on a server where
+    the dashboard can still update the status of an order
+    """
+    if mode != 'replace' or resumed:
+        raise ValueError("Time-series orders can only be written by a fresh --mode replace run: "
+                         "appends, top-ups and --resume upsert by _id, which a time-series collection does not keep unique")
+    version = tuple(client.server_info().get('versionArray', [0])[:2])
+    if version < TIMESERIES_MIN_SERVER_VERSION:
+        raise ValueError(f"Time-series orders need MongoDB {'.'.join(map(str, TIMESERIES_MIN_SERVER_VERSION))} or later "
+                         f"so order statuses can be updated (server is {'.'.join(map(str, version))})")
+
+def generate_date(rng=random, calendar=None):
+    """
+    Generate a date between 2020 and 2025
+    """
+    return (calendar or DEFAULT_CALENDAR).sample(rng)
+
+def order_line(catalog, index, quantity):
+    """
+    One product line of an order for the catalog product at index; _id repeats
+    product_id as the Order model expects and price is the unit price the line was sold at
+    """
+    product_id = catalog.ids[index]
+    return {
+        '_id': product_id,
+        'product_id': product_id,
+        'product_name': catalog.names[index],
+        'product_quantity': quantity,
+        'price': catalog.prices[index]
+    }
+
+def order_document(row, current_time, catalog, date_type='string'):
+    """
+    Turn an order row into the document the Order model reads, dated with a
+    string or a BSON date following date_type;
+    orders placed by a seeded customer reference it by customer_id
+    """
+    document = {
+        '_id': row.id,
+        'id': row.id,
+        'customer_id': row.customer_id,
+        'customer': row.customer,
+        'date': date_value(row.date, date_type),
+        'total': row.total,
+        'status': row.status,
+        'products': [order_line(catalog, index, quantity) for index, quantity in row.lines],
+        'createdAt': current_time,
+        'updatedAt': current_time,
+        '__v': 0
+    }
+    if row.customer_id is None:
+        del document['customer_id']
+    return document
+
+class OrderEncoder:
+    """
+    Encodes order rows straight into RawBSONDocuments holding the same fields,
+    in the same order, as order_document. Values that repeat across orders
+    (customers, dates, statuses, product lines, timestamps) are encoded once,
+    in caches bounded so a large catalog or customer base does not grow them without limit.
+    """
     
-    # Create a list of all months
-    all_months = [
-        start_date + timedelta(days=30*i) 
-        for i in range(total_months)
-    ]
+    ID = element_name(BSON_STRING, '_id')
+    ID_FIELD = element_name(BSON_STRING, 'id')
+    TOTAL = element_name(BSON_DOUBLE, 'total')
+    PRODUCTS = element_name(BSON_ARRAY, 'products')
+    
+    def __init__(self, catalog, date_type='string'):
+        self.catalog = catalog
+        self.customers = ElementCache('customer')
+        self.customer_ids = ElementCache('customer_id')
+        self.dates = ElementCache('date', day_datetime if date_type == 'datetime' else None)
+        self.statuses = ElementCache('status')
+        # (product index, quantity) -> encoded line document, keeping the most recent ones
+        self.lines = BoundedCache(self.encode_line)
+        # (position, product index, quantity) -> the line as an element of the products array
+        self.items = BoundedCache(self.encode_item)
+        # (product index, quantity) -> encoded products array of a single-line order
+        self.single_lines = BoundedCache(self.encode_single_line)
+    
+    def encode_line(self, key):
+        return bson.encode(order_line(self.catalog, *key))
     
-    # Randomly select a month
-    selected_month = random.choice(all_months)
+    def encode_item(self, key):
+        position, index, quantity = key
+        return BSON_DOCUMENT + str(position).encode('ascii') + b'\x00' + self.lines[(index, quantity)]
     
-    # Randomly select a day within that month
-    days_in_month = (selected_month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-    random_day = random.randint(1, days_in_month.day)
+    def encode_single_line(self, key):
+        return array_element(self.PRODUCTS, [self.lines[key]])
     
-    return selected_month.replace(day=random_day).strftime('%Y-%m-%d')
+    def encode(self, rows, current_time):
+        # Every order of a batch shares its timestamps, so the tail of the documents,
+        # up to their closing byte, is encoded once
+        tail = (encode_element('createdAt', current_time) + encode_element('updatedAt', current_time)
+                + encode_element('__v', 0) + b'\x00')
+        
+        # This loop runs once per order, so everything it touches is bound to a local
+        # and each document is joined from its cached elements in one go
+        ID, ID_FIELD, TOTAL, PRODUCTS = self.ID, self.ID_FIELD, self.TOTAL, self.PRODUCTS
+        customers, customer_ids, dates, statuses = self.customers, self.customer_ids, self.dates, self.statuses
+        items, single_lines = self.items, self.single_lines
+        pack_size, join = pack_int32, b''.join
+        documents = []
+        append = documents.append
+        for row in rows:
+            data = row.id.encode('utf-8')
+            order_id = pack_size(len(data) + 1) + data + b'\x00'
+            
+            lines = row.lines
+            if len(lines) == 1:
+                products = single_lines[lines[0]]
+            else:
+                array = join([items[(position, index, quantity)] for position, (index, quantity) in enumerate(lines)])
+                products = PRODUCTS + pack_size(len(array) + 5) + array + b'\x00'
+            
+            body = join((
+                ID, order_id, ID_FIELD, order_id,
+                customer_ids[row.customer_id] if row.customer_id is not None else b'',
+                customers[row.customer], dates[row.date], TOTAL, pack_double(row.total), statuses[row.status],
+                products, tail,
+            ))
+            append(RawBSONDocument(pack_size(len(body) + 4) + body))
+        return documents
 
-def generate_orders(num_orders=500, products=None):
+def encode_order_rows(rows, catalog, encoder=None, date_type='string'):
     """
-    Generate a list of sample orders with specific structure
+    Turn one batch of order rows over catalog into documents to insert:
+    RawBSONDocuments with an encoder, which dates them its own way, dicts dated
+    following date_type without one
     """
-    if not products:
-        products = fetch_products()
+    current_time = datetime.now(timezone.utc)
+    if encoder is not None:
+        return encoder.encode(rows, current_time)
+    return [order_document(row, current_time, catalog, date_type) for row in rows]
+
+def accumulate_order_rows(accumulator, rows, catalog):
+    """Tally a batch of order rows in a RollupAccumulator keyed by catalog index and pass it on"""
+    prices = catalog.prices
+    for row in rows:
+        # Same revenue rule as line_revenues for lines that carry their price
+        accumulator.add(row.date, row.status, row.total, [
+            (index, quantity, prices[index] * quantity) for index, quantity in row.lines
+        ])
+    return rows
+
+def generate_order_rows(num_orders=500, catalog=None, batch_size=DEFAULT_BATCH_SIZE, rng=random,
+                        calendar=None, min_per_month=MIN_ORDERS_PER_MONTH, start_batch=0, baskets=None, customers=None):
+    """
+    Generate sample orders as compact OrderRows, whose lines hold catalog indices,
+    yielding them in lists of at most batch_size rows.
+    Every month gets at least min_per_month orders when num_orders allows it.
+    The products of each order are drawn by baskets, a BasketSampler over the catalog.
+    With customers, a CustomerSampler, every order is placed by one of the seeded
+    customers; otherwise it only carries a random customer name.
+    The first start_batch batches are drawn but not yielded, to resume a run.
+    """
+    if not catalog:
+        catalog = fetch_catalog()
     
-    if not products:
+    if not catalog:
         print("No products available to generate orders.")
-        return []
-    
-    # Track orders per month to ensure at least 20 per month
-    orders_per_month = {}
-    orders = []
-    
-    while len(orders) < num_orders:
-        # Randomly select one unique product for the order
-        product = random.choice(products)
-        
-        # Randomly determine quantity (1 to 5)
-        quantity = random.randint(1, 5)
-        
-        # Calculate total price
-        total_price = product['price'] * quantity
-        
-        # Generate a date
-        order_date = generate_date()
-        
-        # Ensure at least 20 orders per month
-        month_key = order_date[:7]  # Takes "YYYY-MM"
-        if month_key not in orders_per_month:
-            orders_per_month[month_key] = 0
-        
-        # Ensure minimum order count per month (30 orders) and total order required (500 orders)
-        if orders_per_month[month_key] < 30 or len(orders) < num_orders:
-            order_products = [{
-                '_id': product['_id'],
-                'product_id': product['_id'],
-                'product_name': product['name'],
-                'product_quantity': quantity
-            }]
+        return
+    
+    baskets = baskets or BasketSampler(catalog)
+    prices = catalog.prices
+    dates = (calendar or DEFAULT_CALENDAR).stream(num_orders, rng, min_per_month)
+    directory = customers.directory if customers else None
+    
+    # Generate one batch at a time so memory stays flat regardless of num_orders
+    for batch_number, batch_start in enumerate(range(0, num_orders, batch_size)):
+        batch = []
+        
+        # Dates for the batch come from the stream that guarantees min_per_month orders per month
+        for order_date in dates.take(min(batch_size, num_orders - batch_start)):
+            # Draw the distinct products of the order, hot products more often,
+            # and a quantity (1 to 5) for each of them
+            lines = tuple((index, rng.randint(1, 5)) for index in baskets.sample(rng))
+            
+            # Calculate total price over every line
+            total_price = sum(prices[index] * quantity for index, quantity in lines)
             
-            order_id = "ORDER-" + str(uuid.uuid4())
-            current_time = datetime.now(timezone.utc)
+            order_id = "ORDER-" + random_uuid(rng)
+            customer_id = None
+            if customers:
+                customer_index = customers.sample(rng)
+                customer, customer_id = directory.names[customer_index], directory.ids[customer_index]
+            else:
+                customer = generate_customer_name(rng)
+            status = rng.choice(ORDER_STATUSES)
             
-            order = {
-                '_id': order_id,
-                'id': order_id,
-                'customer': generate_customer_name(),
-                'date': order_date,
-                'total': round(total_price, 2),
-                'status': random.choice(ORDER_STATUSES),
-                'products': order_products,
-                'createdAt': current_time,
-                'updatedAt': current_time,
-                '__v': 0
-            }
+            # Batches written before an interruption only advance the RNG
+            if batch_number < start_batch:
+                continue
             
-            orders.append(order)
-            orders_per_month[month_key] += 1
+            batch.append(OrderRow(order_id, customer, order_date, round(total_price, 2), status, lines, customer_id))
+        
+        if batch_number >= start_batch:
+            yield batch
+
+def generate_orders(num_orders=500, catalog=None, batch_size=DEFAULT_BATCH_SIZE, rng=random,
+                    calendar=None, min_per_month=MIN_ORDERS_PER_MONTH, start_batch=0, encoder=None, baskets=None,
+                    customers=None, date_type='string'):
+    """
+    Generate sample orders with specific structure,
+    yielding them in lists of at most batch_size orders.
+    Every month gets at least min_per_month orders when num_orders allows it.
+    The first start_batch batches are drawn but not yielded, to resume a run.
+    With an OrderEncoder, the orders are yielded as pre-encoded RawBSONDocuments,
+    otherwise as dicts dated following date_type.
+    """
+    if not catalog:
+        catalog = fetch_catalog()
+    
+    for rows in generate_order_rows(num_orders, catalog, batch_size, rng, calendar, min_per_month, start_batch, baskets,
+                                    customers):
+        yield encode_order_rows(rows, catalog, encoder, date_type)
+
+def generate_order_ids(num_orders, rng):
+    """
+    Draw num_orders "ORDER-<uuid4>" ids as a fixed-width byte string array
+    """
+    # Random bytes with the UUID version 4 and variant bits set
+    raw = np.frombuffer(rng.bytes(16 * num_orders), dtype=np.uint8).reshape(num_orders, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0f) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3f) | 0x80
+    
+    hex_chars = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+    digits = np.empty((num_orders, 32), dtype=np.uint8)
+    digits[:, 0::2] = hex_chars[raw >> 4]
+    digits[:, 1::2] = hex_chars[raw & 0x0f]
+    
+    # Lay the digits out as ORDER-xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
+    prefix = b'ORDER-'
+    ids = np.empty((num_orders, len(prefix) + 36), dtype=np.uint8)
+    ids[:, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+    position = len(prefix)
+    for group_start, group_end in [(0, 8), (8, 12), (12, 16), (16, 20), (20, 32)]:
+        if group_start:
+            ids[:, position] = ord('-')
+            position += 1
+        ids[:, position:position + group_end - group_start] = digits[:, group_start:group_end]
+        position += group_end - group_start
+    
+    return ids.view(f'S{ids.shape[1]}').ravel()
+
+def generate_order_columns(num_orders, prices, rng, dates, baskets, customers=None):
+    """
+    Draw every random field of num_orders orders as NumPy arrays in one pass;
+    basket_size says how many of the product_index and quantity lines belong to each order.
+    With customers, a customer_index column replaces the random name columns.
+    """
+    basket_size, product_index = baskets.sample_many(num_orders, rng)
+    quantity = rng.integers(1, 6, size=len(product_index))
+    
+    # Every basket keeps at least its first line, so no basket is empty
+    basket_start = np.concatenate([[0], np.cumsum(basket_size)[:-1]])
+    
+    columns = {
+        'basket_size': basket_size,
+        'product_index': product_index,
+        'quantity': quantity,
+        'total': np.round(np.add.reduceat(prices[product_index] * quantity, basket_start), 2),
+        'date_index': dates.take_indices(num_orders),
+        'status_index': rng.integers(0, len(ORDER_STATUSES), size=num_orders),
+    }
+    if customers:
+        columns['customer_index'] = customers.sample_many(num_orders, rng)
+    else:
+        columns['first_name_index'] = rng.integers(0, len(FIRST_NAMES), size=num_orders)
+        columns['last_name_index'] = rng.integers(0, len(LAST_NAMES), size=num_orders)
+    columns['order_id'] = generate_order_ids(num_orders, rng)
+    return columns
+
+def build_order_rows(columns, calendar=None, customers=None):
+    """
+    Turn one batch of order columns into OrderRows, placed by the customers of
+    the CustomerSampler the columns were drawn with, if any
+    """
+    # Every possible date string is formatted once, when the calendar is built
+    date_strings = (calendar or DEFAULT_CALENDAR).date_strings
+    
+    # The lines of every order, sliced off the flat line columns basket after basket
+    lines = list(zip(columns['product_index'].tolist(), columns['quantity'].tolist()))
+    basket_ends = np.cumsum(columns['basket_size']).tolist()
+    
+    if 'customer_index' in columns:
+        directory = customers.directory
+        customer_indices = columns['customer_index'].tolist()
+        names = [directory.names[index] for index in customer_indices]
+        customer_ids = [directory.ids[index] for index in customer_indices]
+    else:
+        names = [
+            f"{FIRST_NAMES[first_index]} {LAST_NAMES[last_index]}"
+            for first_index, last_index in zip(columns['first_name_index'].tolist(), columns['last_name_index'].tolist())
+        ]
+        customer_ids = [None] * len(names)
+    
+    return [
+        OrderRow(
+            order_id, customer, date_strings[date_index],
+            total, ORDER_STATUSES[status_index], tuple(lines[basket_end - basket_size:basket_end]), customer_id
+        )
+        for order_id, basket_size, basket_end, total, date_index, status_index, customer, customer_id in zip(
+            columns['order_id'].astype(str).tolist(),
+            columns['basket_size'].tolist(),
+            basket_ends,
+            columns['total'].tolist(),
+            columns['date_index'].tolist(),
+            columns['status_index'].tolist(),
+            names,
+            customer_ids,
+        )
+    ]
+
+def generate_order_rows_vectorized(num_orders=500, catalog=None, batch_size=DEFAULT_BATCH_SIZE, rng=None,
+                                   calendar=None, min_per_month=MIN_ORDERS_PER_MONTH, start_batch=0, baskets=None,
+                                   customers=None):
+    """
+    Columnar counterpart of generate_order_rows backed by NumPy,
+    yielding OrderRows in lists of at most batch_size rows.
+    The first start_batch batches are drawn but not yielded, to resume a run.
+    """
+    if not catalog:
+        catalog = fetch_catalog()
+    
+    if not catalog:
+        print("No products available to generate orders.")
+        return
+    
+    if rng is None:
+        rng = np.random.default_rng()
+    
+    baskets = baskets or BasketSampler(catalog)
+    calendar = calendar or DEFAULT_CALENDAR
+    dates = calendar.stream(num_orders, rng, min_per_month)
+    # A view of the catalog's typed price array, not a copy
+    prices = np.frombuffer(catalog.prices, dtype=np.float64)
+    
+    # Columns are drawn per batch so memory stays flat regardless of num_orders
+    for batch_number, batch_start in enumerate(range(0, num_orders, batch_size)):
+        columns = generate_order_columns(min(batch_size, num_orders - batch_start), prices, rng, dates, baskets, customers)
+        
+        # Batches written before an interruption only advance the RNG
+        if batch_number >= start_batch:
+            yield build_order_rows(columns, calendar, customers)
+
+def generate_orders_vectorized(num_orders=500, catalog=None, batch_size=DEFAULT_BATCH_SIZE, rng=None,
+                               calendar=None, min_per_month=MIN_ORDERS_PER_MONTH, start_batch=0, encoder=None,
+                               baskets=None, customers=None, date_type='string'):
+    """
+    Columnar counterpart of generate_orders backed by NumPy,
+    yielding orders in lists of at most batch_size orders.
+    The first start_batch batches are drawn but not yielded, to resume a run.
+    With an OrderEncoder, the orders are yielded as pre-encoded RawBSONDocuments,
+    otherwise as dicts dated following date_type.
+    """
+    if not catalog:
+        catalog = fetch_catalog()
+    
+    for rows in generate_order_rows_vectorized(num_orders, catalog, batch_size, rng, calendar, min_per_month, start_batch,
+                                               baskets, customers):
+        yield encode_order_rows(rows, catalog, encoder, date_type)
+
+def resolve_backend(backend='auto'):
+    """
+    Pick the order generation backend, falling back to pure Python without numpy
+    """
+    if backend == 'auto':
+        return 'numpy' if np is not None else 'python'
+    if backend == 'numpy' and np is None:
+        raise ImportError("The numpy backend requires numpy (pip install numpy)")
+    return backend
+
+def order_distributions(order_batches):
+    """
+    Tally the relative frequency of each generated field value;
+    quantity and product are counted per product line, the rest per order
+    """
+    counts = {'status': {}, 'basket_size': {}, 'quantity': {}, 'month': {}, 'product': {}, 'first_name': {}, 'last_name': {}}
+    total = 0
+    revenue = 0.0
+    
+    for batch in order_batches:
+        for order in batch:
+            first_name, last_name = order['customer'].split(' ', 1)
+            values = [
+                ('status', order['status']),
+                ('basket_size', len(order['products'])),
+                ('month', order['date'][:7]),
+                ('first_name', first_name),
+                ('last_name', last_name),
+            ]
+            for product in order['products']:
+                values.append(('quantity', product['product_quantity']))
+                values.append(('product', product['product_id']))
+            for field, value in values:
+                counts[field][value] = counts[field].get(value, 0) + 1
+            total += 1
+            revenue += order['total']
+    
+    distributions = {
+        field: {value: count / sum(values.values()) for value, count in values.items()}
+        for field, values in counts.items()
+    }
+    distributions['mean_total'] = revenue / total if total else 0
+    return distributions
+
+def compare_backends(num_orders=100000, catalog=None, seed=0, tolerance=0.05, baskets=None):
+    """
+    Check that the python and numpy backends draw from the same distributions,
+    using the total variation distance between the per-field frequencies
+    """
+    if not catalog:
+        catalog = fetch_catalog()
+    
+    baskets = baskets or BasketSampler(catalog)
+    python_dist = order_distributions(generate_orders(num_orders, catalog, rng=random.Random(seed), baskets=baskets))
+    numpy_dist = order_distributions(generate_orders_vectorized(num_orders, catalog, rng=np.random.default_rng(seed),
+                                                                baskets=baskets))
+    
+    matches = True
+    for field in ['status', 'basket_size', 'quantity', 'month', 'product', 'first_name', 'last_name']:
+        values = set(python_dist[field]) | set(numpy_dist[field])
+        distance = sum(
+            abs(python_dist[field].get(value, 0) - numpy_dist[field].get(value, 0))
+            for value in values
+        ) / 2
+        ok = distance <= tolerance
+        matches = matches and ok
+        print(f"{field:<10} total variation distance {distance:.4f} {'OK' if ok else 'MISMATCH'}")
+    
+    mean_gap = abs(python_dist['mean_total'] - numpy_dist['mean_total']) / max(python_dist['mean_total'], 1e-9)
+    ok = mean_gap <= tolerance
+    matches = matches and ok
+    print(f"{'total':<10} mean {python_dist['mean_total']:.2f} vs {numpy_dist['mean_total']:.2f} {'OK' if ok else 'MISMATCH'}")
+    
+    return matches
+
+def report_progress(inserted, total, start_time):
+    """
+    Print insert progress and throughput on a single line
+    """
+    elapsed = time.perf_counter() - start_time
+    rate = inserted / elapsed if elapsed > 0 else 0
+    percent = inserted / total * 100 if total else 100
+    print(f"\rInserted {inserted}/{total} orders ({percent:.1f}%) - {rate:,.0f} docs/sec", end='', flush=True)
+
+def note_months(months, rows):
+    """
+    Add the 'YYYY-MM' months of a batch of OrderRows to months and pass the batch on
+    """
+    months.update(row.date[:7] for row in rows)
+    return rows
+
+def insert_order_shard(shard, catalog, batch_size=DEFAULT_BATCH_SIZE, show_progress=True, backend='python',
+                       calendar=None, min_per_month=MIN_ORDERS_PER_MONTH, client=None,
+                       upsert=False, checkpoint=None, pipeline=None, rollups=False, snapshot_dir=None, encoding='raw',
+                       baskets=None, stock='ignore', order_count=None, customers=None, date_type='string',
+                       track_months=False):
+    """
+    Generate and insert one shard of orders,
+    over the given client or the shared client of the process.
+    With customers, a CustomerSampler, the orders are placed by the seeded customers.
+    Orders are dated with 'YYYY-MM-DD' strings or BSON dates following date_type.
+    With the 'raw' encoding, orders go from compact rows straight to BSON without a dict per order.
+    With a checkpoint, batches already written are skipped and progress is recorded after every batch.
+    With pipeline options, generation overlaps with up to pipeline.in_flight concurrent writes.
+    With rollups, the shard's daily and monthly rollups are accumulated as its orders
+    are generated and added to the summary collections once they are all written.
+    With a snapshot_dir, every batch is also recorded there.
+    With a stock policy other than 'ignore', the shard sells at most its share of every
+    product's stock out of order_count orders, capping or dropping orders that would
+    oversell, and decrements the stock with one $inc per product once its orders are written.
+    With track_months, the months the shard wrote orders in are recorded on the checkpoint.
+    """
+    client = client or get_client(MONGO_URI)
+    db = client[DB_NAME]
+    orders_collection = db[ORDERS_COLLECTION]
+    
+    # Each shard draws from its own RNG so the dataset is reproducible
+    if backend == 'numpy':
+        rng = np.random.default_rng(shard.seed)
+        generate = generate_order_rows_vectorized
+    else:
+        rng = random.Random(shard.seed)
+        generate = generate_order_rows
+    
+    start_batch = batches_done(checkpoint, shard.index)
+    skipped = min(start_batch * batch_size, shard.count)
+    start_time = time.perf_counter()
+    
+    def on_progress(inserted):
+        report_progress(skipped + inserted, shard.count, start_time)
+    
+    rows = generate(num_orders=shard.count, catalog=catalog, batch_size=batch_size, rng=rng,
+                    calendar=calendar, min_per_month=min_per_month, start_batch=start_batch, baskets=baskets,
+                    customers=customers)
+    if stock != 'ignore':
+        ledger = StockLedger(catalog, stock, shard, order_count)
+        rows = (ledger.fill(batch) for batch in rows)
+    if rollups:
+        accumulator = RollupAccumulator(catalog=catalog)
+        rows = (accumulate_order_rows(accumulator, batch, catalog) for batch in rows)
+    months = set()
+    if track_months:
+        rows = (note_months(months, batch) for batch in rows)
+    
+    encoder = OrderEncoder(catalog, date_type) if encoding == 'raw' else None
+    batches = (encode_order_rows(batch, catalog, encoder, date_type) for batch in rows)
+    
+    numbered_batches = enumerate(batches, start=start_batch)
+    if snapshot_dir:
+        numbered_batches = record_batches(numbered_batches, snapshot_dir, shard.index)
+    
+    inserted = write_batches(orders_collection, numbered_batches, upsert=upsert,
+                             checkpoint=checkpoint, shard_index=shard.index, pipeline=pipeline,
+                             uri=MONGO_URI, on_progress=on_progress if show_progress else None)
+    
+    if stock != 'ignore':
+        with stage('orders.stock'):
+            write_stock(db[PRODUCTS_COLLECTION], ledger.updates())
+        count('orders.capped_for_stock', ledger.capped)
+        count('orders.rejected_for_stock', ledger.rejected)
+        if show_progress and (ledger.capped or ledger.rejected):
+            print(f"\nStock ran out: {ledger.capped} orders capped, {ledger.rejected} orders dropped")
     
-    return orders
+    if rollups:
+        with stage('orders.rollups'):
+            write_rollups(db, accumulator)
+    
+    record_months(db, checkpoint, months)
+    return inserted
 
-def populate_orders():
+def months_below_minimum(orders_collection, months, min_per_month, date_type='string'):
+    """
+    The 'YYYY-MM' months holding fewer than min_per_month orders, with how many they hold
+    """
+    below = {}
+    for month in months:
+        orders = orders_collection.count_documents({'date': month_bounds(month, date_type)})
+        if orders < min_per_month:
+            below[month] = orders
+    return below
+
+def report_stock_shortfall(orders_collection, requested, inserted, calendar=None, min_per_month=0, date_type='string'):
+    """
+    Warn when the stock policy dropped orders, so fewer than requested were written,
+    and name the months it left under min_per_month orders; the shortfall and the
+    number of such months are also counted in the run report
+    """
+    shortfall = requested - inserted
+    if shortfall <= 0:
+        return
+    count('orders.stock_shortfall', shortfall)
+    print(f"\nWARNING: stock ran out, so only {inserted:,} of the {requested:,} requested orders "
+          f"were written ({shortfall:,} short). Add stock or use --stock ignore for the full count.")
+    
+    if min_per_month:
+        months = (calendar or DEFAULT_CALENDAR).month_keys
+        below = months_below_minimum(orders_collection, months, min_per_month, date_type)
+        count('orders.months_below_minimum', len(below))
+        if below:
+            listed = ', '.join(f"{month} ({orders})" for month, orders in list(below.items())[:12])
+            more = f" and {len(below) - 12} more" if len(below) > 12 else ''
+            print(f"WARNING: {len(below)} of {len(months)} months have fewer than {min_per_month} orders: {listed}{more}")
+
+def populate_orders(num_orders=DEFAULT_NUM_ORDERS, batch_size=DEFAULT_BATCH_SIZE, workers=1, seed=None, backend='auto',
+                    calendar=None, min_per_month=MIN_ORDERS_PER_MONTH, client=None,
+                    mode='replace', resume=False, fast_reset=False, pipeline=None, rollups=True, snapshot=False,
+                    encoding='raw', basket_sizes=None, zipf_exponent=DEFAULT_ZIPF_EXPONENT, stock='ignore',
+                    catalog_cache=False, catalog_batch_size=CATALOG_BATCH_SIZE, customers=True,
+                    customer_zipf_exponent=DEFAULT_CUSTOMER_ZIPF_EXPONENT, date_type=None, storage='collection'):
+    """
+    Write generated orders to the orders collection and return how many were written,
+    or None when the run failed.
+    mode replaces the collection, appends num_orders orders or tops it up to num_orders;
+    resume continues an interrupted run from its checkpoint.
+    basket_sizes weighs orders of 1, 2, 3, ... distinct products, drawn with a Zipf
+    popularity of the given exponent.
+    With a stock policy of 'cap' or 'reject', orders never sell more than the stock of
+    their products, which is decremented by what they sold; orders dropped for lack of
+    stock are not replaced, and the shortfall is reported at the end of the run.
+    The products are loaded as a compact catalog, reused from disk with catalog_cache.
+    With customers and a non-empty customers collection, every order references one of
+    the customers by customer_id, regulars more often following customer_zipf_exponent,
+    and the order statistics of the customers are recomputed once the orders are written.
+    date_type stores order dates as strings or BSON dates; by default a replace uses
+    strings and other modes follow the orders already there. storage 'timeseries'
+    replaces the orders with a time-series collection, which always uses BSON dates
+    and needs MongoDB 7.0+; appending to it, topping it up or resuming into it is refused.
+    With rollups, the daily and monthly summary collections are kept in step with the orders.
+    With snapshot, a fresh replace loads a saved copy of the same orders, or saves one.
+    One client is shared by every in-process write; each worker process has its own.
+    """
     try:
+        backend = resolve_backend(backend)
+        
         # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
+        client = client or get_client(MONGO_URI)
         db = client[DB_NAME]
         orders_collection = db[ORDERS_COLLECTION]
         
-        # Fetch products
-        products = fetch_products()
+        # Load the catalog once and share it with every worker
+        with stage('orders.fetch_products'):
+            catalog = fetch_catalog(client, catalog_cache, catalog_batch_size)
         
-        # Generate orders
-        orders = generate_orders(num_orders=1000, products=products)
+        if not catalog:
+            print("No products available to generate orders.")
+            return None
         
-        # Insert orders
-        if orders:
-            # Delete existing orders before inserting new ones
-            orders_collection.delete_many({})
-            
-            # Insert new orders
-            result = orders_collection.insert_many(orders)
-            
-            print(f"Successfully inserted {len(result.inserted_ids)} orders")
+        # Orders added to a collection keep its storage and date type, so its dates can still be compared
+        if mode != 'replace':
+            storage = 'timeseries' if collection_type(db, ORDERS_COLLECTION) == 'timeseries' else 'collection'
+            date_type = date_type or orders_date_type(orders_collection)
+        # A time-series collection needs a BSON date as its time field
+        if storage == 'timeseries':
+            check_timeseries_orders(client, mode)
+            date_type = 'datetime'
+        
+        # Orders are placed by the seeded customers when there are any, otherwise they only carry a name
+        directory = None
+        if customers:
+            with stage('orders.fetch_customers'):
+                directory = fetch_customers(client, catalog_batch_size)
+        
+        # A resumed run regenerates the same orders from the settings it was started with
+        settings = {
+            'mode': mode,
+            'count': documents_to_write(orders_collection, num_orders, mode),
+            'seed': resolve_seed(seed),
+            'workers': workers,
+            'batch_size': batch_size,
+            'backend': backend,
+            'min_per_month': min_per_month,
+            'basket_sizes': list(basket_sizes or DEFAULT_BASKET_SIZE_WEIGHTS),
+            'zipf_exponent': zipf_exponent,
+            'stock': stock,
+            'customers': len(directory or []),
+            'customer_zipf_exponent': customer_zipf_exponent,
+            'date_type': date_type or 'string',
+            'storage': storage,
+        }
+        checkpoint = open_checkpoint(db, ORDERS_COLLECTION, settings, resume)
+        settings = checkpoint.settings
+        # A resumed run may have started as a time-series replace
+        if settings.get('storage') == 'timeseries':
+            check_timeseries_orders(client, settings['mode'], checkpoint.resumed)
+        
+        # The popularity tables are built once and shared with every worker
+        baskets = BasketSampler(catalog, settings['basket_sizes'], settings['zipf_exponent'])
+        customer_sampler = None
+        if directory and settings.get('customers'):
+            customer_sampler = CustomerSampler(directory, settings['customer_zipf_exponent'])
+        
+        # Delete existing orders before inserting new ones
+        if settings['mode'] == 'replace' and not checkpoint.resumed:
+            reset_collection(db, ORDERS_COLLECTION, fast_reset,
+                             timeseries=ORDER_TIMESERIES if settings.get('storage') == 'timeseries' else None)
+            reset_rollups(db)
+        
+        # A resumed run cannot tell how much its interrupted shards already sold,
+        # and regenerating capped orders needs the stock they were capped against
+        track_stock = settings['stock'] != 'ignore' and not checkpoint.resumed
+        if settings['stock'] != 'ignore' and checkpoint.resumed:
+            print("Stock is not adjusted on a resumed run")
         
-        client.close()
+        # Orders embed product ids, names and prices, so their snapshot depends on the products too
+        snapshot_run = None
+        if snapshot and settings['mode'] == 'replace' and not checkpoint.resumed:
+            snapshot_run = prepare_snapshot(ORDERS_COLLECTION, {
+                **settings, 'calendar': (calendar or DEFAULT_CALENDAR).settings,
+                'products': catalog.fingerprint(include_stock=track_stock),
+                'customers': directory.fingerprint() if customer_sampler else None,
+            })
+        loading = snapshot_run is not None and snapshot_run.manifest is not None
+        
+        # A fresh replace accumulates rollups while generating; any other run may
+        # rewrite existing orders, so the rollups of the months it wrote are rebuilt from the collection afterwards
+        accumulate_rollups = rollups and settings['mode'] == 'replace' and not checkpoint.resumed and not loading
+        rebuild_months = rollups and not accumulate_rollups
+        
+        start_time = time.perf_counter()
+        try:
+            if loading:
+                inserted = load_snapshot(orders_collection, snapshot_run.manifest, settings['batch_size'], pipeline, MONGO_URI)
+                # The saved orders were filled against the same stock, so it drops by what they sold
+                if track_stock:
+                    with stage('orders.stock'):
+                        write_stock(db[PRODUCTS_COLLECTION], sold_updates(orders_collection))
+            else:
+                # Generate and insert orders one batch at a time, split across workers.
+                # Anything but a fresh replace upserts, so rewritten orders are not duplicated
+                inserted = run_sharded(
+                    insert_order_shard, settings['count'], workers=settings['workers'], seed=settings['seed'],
+                    name=ORDERS_COLLECTION,
+                    catalog=catalog, batch_size=settings['batch_size'], show_progress=settings['workers'] == 1,
+                    backend=settings['backend'], calendar=calendar, min_per_month=settings['min_per_month'],
+                    client=client if settings['workers'] <= 1 else None,
+                    upsert=settings['mode'] != 'replace' or checkpoint.resumed, checkpoint=checkpoint,
+                    pipeline=pipeline, rollups=accumulate_rollups, snapshot_dir=snapshot_run and snapshot_run.directory,
+                    encoding=encoding, baskets=baskets,
+                    stock=settings['stock'] if track_stock else 'ignore', order_count=settings['count'],
+                    customers=customer_sampler, date_type=settings.get('date_type', 'string'),
+                    track_months=rebuild_months
+                )
+                complete_snapshot(snapshot_run, inserted)
+        finally:
+            abandon_snapshot(snapshot_run)
+        complete_checkpoint(db, checkpoint)
+        
+        # The orders are in place even if the rollups cannot be rebuilt; rebuild_rollups.py can retry.
+        # Only the months the shards wrote orders in are rebuilt. The months of the batches
+        # written before an interruption, or of a loaded snapshot, are not known, but every
+        # order is dated inside the calendar, so all of its months are rebuilt then
+        if rebuild_months:
+            try:
+                if loading or checkpoint.resumed:
+                    months = (calendar or DEFAULT_CALENDAR).month_keys
+                else:
+                    months = written_months(db, checkpoint)
+                with stage('orders.rollups'):
+                    buckets = rebuild_rollups(db, months)
+                print(f"\nRebuilt the rollups of {len(months)} months from the orders collection ({buckets} rollup documents in total)")
+            except Exception as e:
+                print(f"\nError rebuilding order rollups: {e}")
+        
+        # Any mode can add or rewrite orders of a customer, so the statistics are recomputed from all of them
+        if customer_sampler:
+            try:
+                with stage('orders.customer_stats'):
+                    refresh_customer_stats(db, ORDERS_COLLECTION, CUSTOMERS_COLLECTION)
+            except Exception as e:
+                print(f"\nError updating customer order statistics: {e}")
+        
+        elapsed = time.perf_counter() - start_time
+        rate = inserted / elapsed if elapsed > 0 else 0
+        print(f"\nSuccessfully inserted {inserted} orders in {elapsed:.2f}s ({rate:,.0f} docs/sec)")
+        
+        # Orders dropped for stock are not regenerated, since the stock they needed is gone
+        if track_stock:
+            report_stock_shortfall(orders_collection, settings['count'], inserted, calendar,
+                                   settings['min_per_month'], settings.get('date_type', 'string'))
+        
+        return inserted
     
     except Exception as e:
         print(f"An error occurred: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the orders collection with sample orders")
+    parser.add_argument('--count', type=int, default=DEFAULT_NUM_ORDERS,
+                        help=f"Number of orders to generate (default: {DEFAULT_NUM_ORDERS})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Number of orders per insert_many call (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--backend', choices=ORDER_BACKENDS, default='auto',
+                        help="Order generation backend; 'auto' uses numpy when installed (default: auto)")
+    parser.add_argument('--encoding', choices=ORDER_ENCODINGS, default='raw',
+                        help="'raw' encodes orders straight to BSON, 'dict' lets pymongo encode a dict per order (default: raw)")
+    parser.add_argument('--check-distributions', action='store_true',
+                        help="Compare the python and numpy backends on the current products instead of seeding")
+    parser.add_argument('--min-per-month', type=int, default=MIN_ORDERS_PER_MONTH,
+                        help=f"Minimum number of orders in every month of the date range (default: {MIN_ORDERS_PER_MONTH})")
+    parser.add_argument('--skip-rollups', action='store_true',
+                        help="Do not maintain the daily and monthly order rollup collections")
+    add_basket_args(parser)
+    add_stock_args(parser)
+    add_catalog_args(parser)
+    parser.add_argument('--skip-customers', action='store_true',
+                        help="Give orders a random customer name even when the customers collection is seeded")
+    add_customer_args(parser)
+    add_calendar_args(parser)
+    add_date_type_args(parser)
+    parser.add_argument('--order-storage', choices=ORDER_STORAGES, default='collection',
+                        help="Write orders to a regular or a time-series collection; 'timeseries' implies "
+                             "--date-type datetime, needs MongoDB 7.0+ and only works with --mode replace (default: collection)")
+    add_incremental_args(parser)
+    add_connection_args(parser)
+    add_pipeline_args(parser)
+    add_snapshot_args(parser)
+    add_instrumentation_args(parser)
+    add_parallel_args(parser)
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    populate_orders()
\ No newline at end of file
+    args = parse_args()
+    instrumentation_from_args(args)
+    connection_from_args(args)
+    if args.check_distributions:
+        resolve_backend('numpy')
+        catalog = fetch_catalog(cache=args.catalog_cache, batch_size=args.catalog_batch_size)
+        baskets = BasketSampler(catalog, args.basket_sizes, args.zipf_exponent) if catalog else None
+        sys.exit(0 if compare_backends(args.count, catalog, seed=args.seed or 0, baskets=baskets) else 1)
+    inserted = populate_orders(num_orders=args.count, batch_size=args.batch_size, workers=args.workers, seed=args.seed, backend=args.backend,
+                               calendar=calendar_from_args(args), min_per_month=args.min_per_month,
+                               mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+                               pipeline=pipeline_from_args(args), rollups=not args.skip_rollups,
+                               snapshot=args.snapshot, encoding=args.encoding,
+                               basket_sizes=args.basket_sizes, zipf_exponent=args.zipf_exponent, stock=args.stock,
+                               catalog_cache=args.catalog_cache, catalog_batch_size=args.catalog_batch_size,
+                               customers=not args.skip_customers, customer_zipf_exponent=args.customer_zipf_exponent,
+                               date_type=args.date_type, storage=args.order_storage)
+    print_connection_stats()
+    if args.report:
+        write_report(args.report)
+    sys.exit(0 if inserted is not None else 1)
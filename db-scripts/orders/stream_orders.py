@@ -0,0 +1,370 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import random
+import argparse
+from collections import deque
+from itertools import chain, islice
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from common.connection import get_client, add_connection_args, connection_from_args, print_connection_stats
+from common.baskets import BasketSampler, DEFAULT_ZIPF_EXPONENT, add_basket_args
+from common.catalog import CATALOG_BATCH_SIZE, add_catalog_args
+from common.customers import DEFAULT_CUSTOMER_ZIPF_EXPONENT, CustomerSampler, add_customer_args
+from common.dates import add_date_type_args
+from common.incremental import collection_type
+from common.pacing import TokenBucket, RateSchedule, add_pacing_args, schedule_from_args
+from common.readload import PERCENTILES, percentile
+from common.rollups import RollupAccumulator, write_rollups
+from orders.populate_orders import (
+    ORDER_BACKENDS, ORDER_ENCODINGS, ORDER_STATUSES, OrderEncoder, fetch_catalog, fetch_customers, encode_order_rows,
+    accumulate_order_rows, generate_order_rows, generate_order_rows_vectorized, orders_date_type, resolve_backend, np
+)
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+ORDERS_COLLECTION = 'orders'
+
+# Target orders per second and how long to stream for
+DEFAULT_RATE = 1000
+DEFAULT_DURATION = 60
+
+# Most orders per insert_many; at low rates batches shrink so no order waits longer than MAX_BATCH_DELAY seconds
+DEFAULT_BATCH_SIZE = 200
+MAX_BATCH_DELAY = 0.1
+
+# Share of the orders inserted by a step that then move from Pending to Processing,
+# and from Processing to Completed, oldest first
+DEFAULT_ADVANCE_RATIO = 0.9
+
+# Seconds between two progress lines, which is also how often the rollups are written
+DEFAULT_REPORT_INTERVAL = 5
+
+# Most write latencies kept for the percentiles of each kind of write
+LATENCY_SAMPLE_SIZE = 10000
+
+# Most streamed orders remembered per status waiting to move on; when the stream
+# outpaces the advance ratio, the oldest ones are forgotten and keep their status
+MAX_TRACKED_ORDERS = 100000
+
+class LatencySample:
+    """
+    Count and mean of every latency recorded, with a uniform sample of at most
+    size of them for the percentiles (reservoir sampling), so memory stays flat
+    however long the stream runs
+    """
+    
+    def __init__(self, size=LATENCY_SAMPLE_SIZE, rng=None):
+        self.size = size
+        self.rng = rng or random.Random(0)
+        self.count = 0
+        self.total = 0.0
+        self.values = []
+    
+    def add(self, milliseconds):
+        self.count += 1
+        self.total += milliseconds
+        if len(self.values) < self.size:
+            self.values.append(milliseconds)
+        else:
+            # The new latency replaces a kept one with probability size/count
+            slot = self.rng.randrange(self.count)
+            if slot < self.size:
+                self.values[slot] = milliseconds
+    
+    def summary(self):
+        values = sorted(self.values)
+        summary = {'calls': self.count, 'mean_ms': round(self.total / self.count, 2) if self.count else None}
+        for percent in PERCENTILES:
+            value = percentile(values, percent)
+            summary[f"p{percent}_ms"] = round(value, 2) if value is not None else None
+        return summary
+
+class StreamStats:
+    """
+    Orders written, target orders and write latencies of a stream, in total and
+    since the last progress line
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.inserted = 0
+        self.target = 0.0
+        self.moved = {status: 0 for status in ORDER_STATUSES[1:]}
+        self.insert_ms = LatencySample()
+        self.update_ms = LatencySample()
+        self.interval_start = self.started
+        self.interval_inserted = 0
+        self.interval_target = 0.0
+        self.interval_insert_ms = LatencySample()
+    
+    def record_insert(self, count, milliseconds):
+        self.inserted += count
+        self.interval_inserted += count
+        self.insert_ms.add(milliseconds)
+        self.interval_insert_ms.add(milliseconds)
+    
+    def record_target(self, orders):
+        self.target += orders
+        self.interval_target += orders
+    
+    def record_update(self, status, count, milliseconds):
+        self.moved[status] += count
+        self.update_ms.add(milliseconds)
+    
+    def print_interval(self, rate):
+        """Print the rate and insert latency since the last progress line and start a new interval"""
+        now = time.perf_counter()
+        seconds = now - self.interval_start or 1e-9
+        latencies = sorted(self.interval_insert_ms.values)
+        print(f"[{now - self.started:7.1f}s] target {self.interval_target / seconds:8,.0f}/s "
+              f"(now {rate:,.0f}/s), achieved {self.interval_inserted / seconds:8,.0f}/s, insert "
+              + ' '.join(f"p{percent} {percentile(latencies, percent) or 0:.1f}ms" for percent in PERCENTILES), flush=True)
+        self.interval_start = now
+        self.interval_inserted = 0
+        self.interval_target = 0.0
+        self.interval_insert_ms = LatencySample()
+    
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            'seconds': round(seconds, 3),
+            'inserted': self.inserted,
+            'target_per_sec': round(self.target / seconds, 1) if seconds else None,
+            'achieved_per_sec': round(self.inserted / seconds, 1) if seconds else None,
+            'moved': dict(self.moved),
+            'insert': self.insert_ms.summary(),
+            'update': self.update_ms.summary(),
+        }
+
+def print_stream_summary(summary):
+    print(f"\nStreamed {summary['inserted']:,} orders in {summary['seconds']:.2f}s: "
+          f"target {summary['target_per_sec'] or 0:,.1f}/s, achieved {summary['achieved_per_sec'] or 0:,.1f}/s")
+    print(', '.join(f"{count:,} moved to {status}" for status, count in summary['moved'].items()))
+    print(f"{'Write':<8}{'Calls':>9}{'Mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name in ('insert', 'update'):
+        entry = summary[name]
+        values = [entry['mean_ms']] + [entry[f'p{percent}_ms'] for percent in PERCENTILES]
+        print(f"{name:<8}{entry['calls']:>9,}" + ''.join(f"{value:>9.2f}" if value is not None else f"{'-':>9}" for value in values))
+
+def advance_orders(collection, queue, next_queue, count, to_status, stats, accumulator=None):
+    """
+    Move the count oldest orders of queue to to_status with one update_many, and
+    append them to next_queue; queues hold the (id, day, total) of streamed orders
+    """
+    moved = [queue.popleft() for _ in range(min(count, len(queue)))]
+    if not moved:
+        return 0
+    from_status = ORDER_STATUSES[ORDER_STATUSES.index(to_status) - 1]
+    
+    request_start = time.perf_counter()
+    collection.update_many(
+        {'_id': {'$in': [order_id for order_id, _, _ in moved]}, 'status': from_status},
+        {'$set': {'status': to_status}, '$currentDate': {'updatedAt': True}}
+    )
+    stats.record_update(to_status, len(moved), (time.perf_counter() - request_start) * 1000)
+    
+    if accumulator is not None:
+        for _, day, total in moved:
+            accumulator.move(day, from_status, to_status, total)
+    if next_queue is not None:
+        next_queue.extend(moved)
+    return len(moved)
+
+def stream_orders(rate=DEFAULT_RATE, duration=DEFAULT_DURATION, batch_size=DEFAULT_BATCH_SIZE, schedule=None,
+                  advance_ratio=DEFAULT_ADVANCE_RATIO, backend='auto', encoding='raw', seed=0, rollups=True,
+                  basket_sizes=None, zipf_exponent=DEFAULT_ZIPF_EXPONENT, catalog_cache=False,
+                  catalog_batch_size=CATALOG_BATCH_SIZE, report_interval=DEFAULT_REPORT_INTERVAL, output=None, client=None,
+                  customers=True, customer_zipf_exponent=DEFAULT_CUSTOMER_ZIPF_EXPONENT, date_type=None):
+    """
+    Simulate live traffic on the orders collection: insert new Pending orders dated
+    today at the schedule's target rate (rate per second when no schedule is given),
+    paced by a token bucket, and move the orders already streamed through Processing
+    to Completed with batched updates. With customers, orders are placed by the seeded
+    customers when there are any. New orders are dated like the newest order
+    already there unless date_type says otherwise. Runs for duration seconds, or until Ctrl+C
+    without one. Prints the target and achieved rate and the write latency as it
+    goes, and returns the summary of the run.
+    """
+    try:
+        backend = resolve_backend(backend)
+        
+        client = client or get_client(MONGO_URI)
+        db = client[DB_NAME]
+        orders_collection = db[ORDERS_COLLECTION]
+        
+        # The stream updates orders by _id, which a time-series collection neither indexes nor keeps unique
+        if collection_type(db, ORDERS_COLLECTION) == 'timeseries':
+            print("The orders are in a time-series collection; the stream only runs on a regular orders collection")
+            return None
+        
+        catalog = fetch_catalog(client, catalog_cache, catalog_batch_size)
+        if not catalog:
+            print("No products available to generate orders.")
+            return None
+        
+        baskets = BasketSampler(catalog, basket_sizes, zipf_exponent)
+        directory = fetch_customers(client, catalog_batch_size) if customers else None
+        customer_sampler = CustomerSampler(directory, customer_zipf_exponent) if directory else None
+        date_type = date_type or orders_date_type(orders_collection) or 'string'
+        encoder = OrderEncoder(catalog, date_type) if encoding == 'raw' else None
+        if backend == 'numpy':
+            rng = np.random.default_rng(seed)
+            generate = generate_order_rows_vectorized
+        else:
+            rng = random.Random(seed)
+            generate = generate_order_rows
+        
+        schedule = schedule or RateSchedule(rate, daily_amplitude=0, burst_probability=0)
+        # Up to a second of orders may be caught up after a slow write
+        bucket = TokenBucket(schedule.rate_at(0), capacity=max(schedule.base_rate, batch_size))
+        accumulator = RollupAccumulator(catalog=catalog) if rollups else None
+        pending, processing = deque(maxlen=MAX_TRACKED_ORDERS), deque(maxlen=MAX_TRACKED_ORDERS)
+        stats = StreamStats()
+        
+        # One generator serves the whole stream, each step taking the orders it needs;
+        # their dates are replaced by today's, so no month minimum is kept
+        order_rows = chain.from_iterable(generate(num_orders=sys.maxsize, catalog=catalog, batch_size=batch_size, rng=rng,
+                                                  min_per_month=0, baskets=baskets, customers=customer_sampler))
+        
+        print(f"Streaming orders at {schedule.base_rate:,.0f}/s "
+              f"({f'{duration:g}s' if duration else 'until interrupted'}, {backend} backend)")
+        
+        last_tick = stats.started
+        next_report = stats.started + report_interval
+        deadline = stats.started + duration if duration else None
+        try:
+            while deadline is None or time.perf_counter() < deadline:
+                now = time.perf_counter()
+                current_rate = schedule.rate_at(now - stats.started)
+                bucket.set_rate(current_rate)
+                stats.record_target(current_rate * (now - last_tick))
+                last_tick = now
+                
+                # Small batches at low rates, so orders still trickle in rather than arrive in bursts
+                size = max(1, min(batch_size, int(current_rate * MAX_BATCH_DELAY)))
+                if current_rate > 0:
+                    bucket.take(size)
+                else:
+                    time.sleep(MAX_BATCH_DELAY)
+                    continue
+                
+                today = datetime.now(timezone.utc).date().isoformat()
+                rows = [row._replace(date=today, status=ORDER_STATUSES[0]) for row in islice(order_rows, size)]
+                if accumulator is not None:
+                    accumulate_order_rows(accumulator, rows, catalog)
+                documents = encode_order_rows(rows, catalog, encoder, date_type)
+                
+                request_start = time.perf_counter()
+                orders_collection.insert_many(documents, ordered=False)
+                stats.record_insert(len(documents), (time.perf_counter() - request_start) * 1000)
+                pending.extend((row.id, row.date, row.total) for row in rows)
+                
+                # Orders flow on at the rate they arrive, the oldest first
+                advance = int(round(size * advance_ratio))
+                advance_orders(orders_collection, processing, None, advance, ORDER_STATUSES[2], stats, accumulator)
+                advance_orders(orders_collection, pending, processing, advance, ORDER_STATUSES[1], stats, accumulator)
+                
+                if time.perf_counter() >= next_report:
+                    if accumulator is not None:
+                        write_rollups(db, accumulator)
+                        accumulator = RollupAccumulator(catalog=catalog)
+                    stats.print_interval(current_rate)
+                    next_report += report_interval
+        except KeyboardInterrupt:
+            print("\nStopping the stream")
+        
+        if accumulator is not None:
+            write_rollups(db, accumulator)
+        
+        summary = stats.summary()
+        print_stream_summary(summary)
+        
+        if output:
+            with open(output, 'w') as f:
+                json.dump({
+                    'created': datetime.now(timezone.utc).isoformat(),
+                    'database': DB_NAME,
+                    'rate': schedule.base_rate,
+                    'batch_size': batch_size,
+                    'backend': backend,
+                    **summary,
+                }, f, indent=2)
+            print(f"Results saved to {output}")
+        
+        return summary
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def add_stream_args(parser):
+    """
+    Add the order stream options to an argument parser
+    """
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"Target new orders per second, before the daily cycle and bursts (default: {DEFAULT_RATE})")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help=f"Seconds to stream for, 0 to run until interrupted (default: {DEFAULT_DURATION})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Most orders per insert_many call (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--advance-ratio', type=float, default=DEFAULT_ADVANCE_RATIO,
+                        help="Orders moved on from Pending and from Processing per order inserted "
+                             f"(default: {DEFAULT_ADVANCE_RATIO})")
+    parser.add_argument('--backend', choices=ORDER_BACKENDS, default='auto',
+                        help="Order generation backend (default: auto)")
+    parser.add_argument('--encoding', choices=ORDER_ENCODINGS, default='raw',
+                        help="How orders are encoded for the driver (default: raw)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed of the generated orders and bursts (default: 0)")
+    parser.add_argument('--skip-rollups', action='store_true',
+                        help="Do not keep the daily and monthly order rollups in step with the stream")
+    parser.add_argument('--report-interval', type=float, default=DEFAULT_REPORT_INTERVAL,
+                        help=f"Seconds between progress lines and rollup writes (default: {DEFAULT_REPORT_INTERVAL})")
+    parser.add_argument('--output', default=None,
+                        help="Save the rates and write latencies as JSON to this file")
+    add_pacing_args(parser)
+    parser.add_argument('--skip-customers', action='store_true',
+                        help="Give orders a random customer name even when the customers collection is seeded")
+    add_basket_args(parser)
+    add_customer_args(parser)
+    add_catalog_args(parser)
+    add_date_type_args(parser)
+    return parser
+
+def stream_from_args(args):
+    """Stream orders with the options added by add_stream_args"""
+    return stream_orders(rate=args.rate, duration=args.duration, batch_size=args.batch_size,
+                         schedule=schedule_from_args(args, args.rate, random.Random(args.seed)),
+                         advance_ratio=args.advance_ratio, backend=args.backend, encoding=args.encoding, seed=args.seed,
+                         rollups=not args.skip_rollups, basket_sizes=args.basket_sizes, zipf_exponent=args.zipf_exponent,
+                         catalog_cache=args.catalog_cache, catalog_batch_size=args.catalog_batch_size,
+                         report_interval=args.report_interval, output=args.output,
+                         customers=not args.skip_customers, customer_zipf_exponent=args.customer_zipf_exponent,
+                         date_type=args.date_type)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stream new orders into the database at a target rate and move them through their statuses")
+    add_stream_args(parser)
+    add_connection_args(parser)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    connection_from_args(args)
+    summary = stream_from_args(args)
+    print_connection_stats()
+    sys.exit(0 if summary is not None else 1)
@@ -0,0 +1 @@
+# Products seeding package
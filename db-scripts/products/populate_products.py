@@ -4,14 +4,19 @@ import sys
 # Add the parent directory to Python path BEFORE any local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import uuid
 import random
-import requests
-import base64
-from pymongo import MongoClient
+import argparse
 from dotenv import load_dotenv
 from datetime import datetime, timezone
 from reference.product_types import PRODUCT_TYPES
+from common.parallel import add_parallel_args, random_uuid, resolve_seed
+from common.incremental import batches_done, documents_to_write, add_incremental_args
+from common.connection import get_client, add_connection_args, connection_from_args, print_connection_stats
+from common.pipeline import write_batches, add_pipeline_args, pipeline_from_args
+from common.populate import run_populate
+from common.snapshots import record_batches, fingerprint, add_snapshot_args
+from common.instrumentation import stage, add_instrumentation_args, instrumentation_from_args, write_report
+from common.assets import fetch_url_asset, image_field_value, add_image_storage_args
 
 # Get project root directory in a device-agnostic way
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,53 +33,65 @@ PRODUCTS_COLLECTION = 'products'
 # Default "No Image" URL
 NO_IMAGE_URL = 'https://upload.wikimedia.org/wikipedia/commons/1/14/No_Image_Available.jpg'
 
-def fetch_default_image():
+# Bundled copies of the "No Image" picture, used offline or when the download fails
+BUNDLED_NO_IMAGE_PATHS = [
+    os.path.join(PROJECT_ROOT, 'frontend', 'public', 'No_Image_Available.jpg'),
+    os.path.join(PROJECT_ROOT, 'backend', 'public', 'No_Image_Available.jpg'),
+]
+
+# Default number of products to generate and how many to send per write
+DEFAULT_NUM_PRODUCTS = 500
+DEFAULT_BATCH_SIZE = 1000
+
+def fetch_default_image_asset(offline=False):
     """
-    Fetch the default 'No Image Available' image
+    Fetch the default 'No Image Available' image as an asset,
+    from the local asset cache or the bundled copies whenever possible
     """
     try:
-        # Download the image
-        img_response = requests.get(NO_IMAGE_URL)
-        
-        # Convert to base64
-        if img_response.status_code == 200:
-            return base64.b64encode(img_response.content).decode('utf-8')
-        
-        return None
+        return fetch_url_asset(NO_IMAGE_URL, BUNDLED_NO_IMAGE_PATHS, offline=offline)
     
     except Exception as e:
         print(f"Error fetching default image: {e}")
         return None
 
+def fetch_default_image(offline=False):
+    """
+    Fetch the default 'No Image Available' image as base64
+    """
+    asset = fetch_default_image_asset(offline)
+    return asset.base64 if asset else None
+
 # Function to generate product data
-def generate_products(num_products=500):
+def generate_products(num_products=DEFAULT_NUM_PRODUCTS, rng=random, default_image=None):
     products = []
     
     # Fetch default image once to avoid repeated downloads
-    default_image = fetch_default_image()
+    if default_image is None:
+        default_image = fetch_default_image()
     
     for _ in range(num_products):
         # Randomly select category and product type
-        category = random.choice(list(PRODUCT_TYPES.keys()))
-        product_type, description = random.choice(PRODUCT_TYPES[category])
+        category = rng.choice(list(PRODUCT_TYPES.keys()))
+        product_type, description = rng.choice(PRODUCT_TYPES[category])
         
         # Weighted stock generation
         # 20% chance of low stock (0-20)
         # 60% chance of moderate stock (21-100)
         # 20% chance of high stock (101-250)
-        stock_choice = random.choices(
+        stock_choice = rng.choices(
             ['low', 'moderate', 'high'], 
             weights=[0.2, 0.6, 0.2]
         )[0]
         
         if stock_choice == 'low':
-            stock = random.randint(0, 20)
+            stock = rng.randint(0, 20)
         elif stock_choice == 'moderate':
-            stock = random.randint(21, 100)
+            stock = rng.randint(21, 100)
         else:
-            stock = random.randint(101, 250)
+            stock = rng.randint(101, 250)
         
-        product_id = "PRODUCT-" + str(uuid.uuid4())
+        product_id = "PRODUCT-" + random_uuid(rng)
         current_time = datetime.now(timezone.utc)
         
         product = {
@@ -82,7 +99,7 @@ def generate_products(num_products=500):
             'id': product_id,
             'name': product_type,
             'category': category,
-            'price': round(random.betavariate(2, 5) * 50, 2),
+            'price': round(rng.betavariate(2, 5) * 50, 2),
             'stock': stock,
             'description': description,
             'image': default_image or NO_IMAGE_URL,
@@ -94,30 +111,109 @@ def generate_products(num_products=500):
     
     return products
 
-def populate_products():
+def insert_product_shard(shard, default_image=None, client=None, batch_size=DEFAULT_BATCH_SIZE,
+                         upsert=False, checkpoint=None, pipeline=None, snapshot_dir=None):
+    """
+    Generate and insert one shard of products in batches,
+    over the given client or the shared client of the process.
+    With a checkpoint, batches already written are skipped and progress is recorded after every batch.
+    With pipeline options, generation overlaps with up to pipeline.in_flight concurrent writes.
+    With a snapshot_dir, every batch is also recorded there.
+    """
+    client = client or get_client(MONGO_URI)
+    db = client[DB_NAME]
+    collection = db[PRODUCTS_COLLECTION]
+    
+    # Each shard draws from its own RNG so the dataset is reproducible
+    rng = random.Random(shard.seed)
+    start_batch = batches_done(checkpoint, shard.index)
+    
+    def batches():
+        for batch_number, batch_start in enumerate(range(0, shard.count, batch_size)):
+            products = generate_products(min(batch_size, shard.count - batch_start), rng=rng, default_image=default_image)
+            
+            # Batches written before an interruption only advance the RNG
+            if batch_number >= start_batch:
+                yield batch_number, products
+    
+    numbered_batches = batches()
+    if snapshot_dir:
+        numbered_batches = record_batches(numbered_batches, snapshot_dir, shard.index)
+    
+    return write_batches(collection, numbered_batches, upsert=upsert, checkpoint=checkpoint,
+                         shard_index=shard.index, pipeline=pipeline, uri=MONGO_URI)
+
+def populate_products(num_products=DEFAULT_NUM_PRODUCTS, workers=1, seed=None, image_storage='inline', offline=False,
+                      client=None, batch_size=DEFAULT_BATCH_SIZE, mode='replace', resume=False, fast_reset=False, pipeline=None,
+                      snapshot=False):
+    """
+    Write generated products to the products collection and return how many were written,
+    or None when the run failed.
+    mode replaces the collection, appends num_products products or tops it up to num_products;
+    resume continues an interrupted run from its checkpoint.
+    With snapshot, a fresh replace loads a saved copy of the same dataset, or saves one.
+    One client is shared by every in-process write; each worker process has its own.
+    """
     try:
         # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
+        client = client or get_client(MONGO_URI)
         db = client[DB_NAME]
         collection = db[PRODUCTS_COLLECTION]
         
-        # Generate products
-        products = generate_products()
+        # Fetch default image once and share it with every worker,
+        # either inline or as a reference to its single stored copy
+        with stage('products.encode_image'):
+            default_image = fetch_default_image_asset(offline)
+            if default_image:
+                default_image = image_field_value(db, default_image, image_storage)
+            else:
+                default_image = NO_IMAGE_URL
         
-        # Insert products
-        if products:
-            # Delete existing products before inserting new ones
-            collection.delete_many({})
-            
-            # Insert new products
-            result = collection.insert_many(products)
-            
-            print(f"Successfully inserted {len(result.inserted_ids)} products")
+        # A resumed run regenerates the same products from the settings it was started with
+        settings = {
+            'mode': mode,
+            'count': documents_to_write(collection, num_products, mode),
+            'seed': resolve_seed(seed),
+            'workers': workers,
+            'batch_size': batch_size,
+        }
         
-        client.close()
+        # Snapshots are keyed by everything the products depend on, the image included
+        return run_populate(db, PRODUCTS_COLLECTION, settings, insert_product_shard,
+                            lambda settings: {'default_image': default_image},
+                            client=client, uri=MONGO_URI, resume=resume, fast_reset=fast_reset,
+                            pipeline=pipeline, snapshot=snapshot, snapshot_key={'image': fingerprint(default_image)})
     
     except Exception as e:
         print(f"An error occurred: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the products collection with sample products")
+    parser.add_argument('--count', type=int, default=DEFAULT_NUM_PRODUCTS,
+                        help=f"Number of products to generate (default: {DEFAULT_NUM_PRODUCTS})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Number of products per write (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--offline', action='store_true',
+                        help="Never download the default image; use the bundled copy or the local asset cache")
+    add_image_storage_args(parser)
+    add_incremental_args(parser)
+    add_connection_args(parser)
+    add_pipeline_args(parser)
+    add_snapshot_args(parser)
+    add_instrumentation_args(parser)
+    add_parallel_args(parser)
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    populate_products()
\ No newline at end of file
+    args = parse_args()
+    instrumentation_from_args(args)
+    connection_from_args(args)
+    inserted = populate_products(num_products=args.count, workers=args.workers, seed=args.seed,
+                                 image_storage=args.image_storage, offline=args.offline, batch_size=args.batch_size,
+                                 mode=args.mode, resume=args.resume, fast_reset=args.fast_reset,
+                                 pipeline=pipeline_from_args(args), snapshot=args.snapshot)
+    print_connection_stats()
+    if args.report:
+        write_report(args.report)
+    sys.exit(0 if inserted is not None else 1)
@@ -0,0 +1 @@
+# Order rollup package
@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Add the parent directory to Python path BEFORE any local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+from dotenv import load_dotenv
+from common.connection import get_client
+from common.rollups import rebuild_rollups, month_range
+from common.dates import day_key
+
+# Get project root directory in a device-agnostic way
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+dotenv_path = os.path.join(PROJECT_ROOT, '.env')
+
+# Load environment variables from the specific path
+load_dotenv(dotenv_path)
+
+# MongoDB connection details
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+DB_NAME = os.getenv('MONGO_DB_NAME', 'ecommerce_admin_dashboard')
+ORDERS_COLLECTION = 'orders'
+
+def latest_order_month(db):
+    """Month of the most recent order, or None when there are no orders"""
+    latest = db[ORDERS_COLLECTION].find_one({}, {'date': 1}, sort=[('date', -1)])
+    return day_key(latest['date'])[:7] if latest else None
+
+def rebuild_order_rollups(since=None, until=None):
+    """
+    Rebuild the daily and monthly rollups from the orders collection,
+    for every month or only for the months from since to until
+    """
+    try:
+        # Connect to MongoDB
+        client = get_client(MONGO_URI)
+        db = client[DB_NAME]
+        
+        months = None
+        if since:
+            months = month_range(since, until or latest_order_month(db) or since)
+        
+        start_time = time.perf_counter()
+        documents = rebuild_rollups(db, months, ORDERS_COLLECTION)
+        elapsed = time.perf_counter() - start_time
+        scope = f"{len(months)} months" if months is not None else "all months"
+        print(f"Rebuilt rollups for {scope} in {elapsed:.2f}s ({documents} rollup documents in total)")
+    
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the daily and monthly order rollups from the orders collection")
+    parser.add_argument('--since', default=None,
+                        help="First month to rebuild, YYYY-MM (default: rebuild every month)")
+    parser.add_argument('--until', default=None,
+                        help="Last month to rebuild, YYYY-MM (default: the month of the latest order)")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    rebuild_order_rollups(since=args.since, until=args.until)
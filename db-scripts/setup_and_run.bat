@@ -1,8 +1,8 @@
 @echo off
 setlocal enabledelayedexpansion
 
-:: Set project root directory
-set PROJECT_ROOT=C:\Projects\Admin-Dashboard-ECommerce
+:: Run from the db-scripts directory, wherever the project was cloned
+cd /d "%~dp0"
 
 :: Create virtual environment
 if not exist .venv (
@@ -15,13 +15,12 @@ call .venv\Scripts\activate
 :: Upgrade pip
 python -m pip install --upgrade pip
 
-:: Install requirements
-pip install -r "%PROJECT_ROOT%\db-scripts\requirements.txt"
+:: Install requirements, then the optional speed-ups (NumPy, motor, zstandard); seeding works without them
+pip install -r requirements.txt
+pip install -r requirements-optional.txt || echo Optional requirements could not be installed, continuing without them
 
-:: Run the populate products script
-python "%PROJECT_ROOT%\db-scripts\products\populate_products.py"
-python "%PROJECT_ROOT%\db-scripts\orders\populate_orders.py"
-python "%PROJECT_ROOT%\db-scripts\admins\populate_admins.py"
+:: Seed products, admins and orders (admins and products run concurrently)
+python -m db_scripts seed %*
 
 :: Deactivate virtual environment
-deactivate
\ No newline at end of file
+deactivate
@@ -0,0 +1,40 @@
+import os
+import sys
+import random
+import uuid
+
+import pytest
+
+# Import the db-scripts packages (common, orders, ...) the way the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.catalog import ProductCatalog
+
+CATEGORIES = ['Electronics', 'Books', 'Home']
+
+def make_products(count, seed=0, stock=50):
+    """Product documents shaped like the ones populate_products writes"""
+    rng = random.Random(seed)
+    return [
+        {
+            '_id': f"PRODUCT-{uuid.UUID(int=rng.getrandbits(128), version=4)}",
+            'name': f"Product {index}",
+            'price': round(rng.uniform(1, 500), 2),
+            'category': CATEGORIES[index % len(CATEGORIES)],
+            'stock': stock,
+        }
+        for index in range(count)
+    ]
+
+@pytest.fixture
+def products():
+    return make_products(20)
+
+@pytest.fixture
+def catalog(products):
+    return ProductCatalog.from_products(products)
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip('mongomock')
+    return mongomock.MongoClient()['ecommerce_admin_dashboard_test']
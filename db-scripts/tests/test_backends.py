@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+import orders.populate_orders as populate_orders
+from orders.populate_orders import compare_backends
+
+ORDERS = 20000
+
+def test_python_and_numpy_backends_draw_the_same_distributions(catalog, capsys):
+    assert compare_backends(ORDERS, catalog, seed=0)
+    assert 'MISMATCH' not in capsys.readouterr().out
+
+def test_compare_backends_reports_a_skewed_field(catalog, monkeypatch, capsys):
+    vectorized = populate_orders.generate_orders_vectorized
+    
+    def pending_only(*args, **kwargs):
+        for batch in vectorized(*args, **kwargs):
+            yield [{**order, 'status': 'Pending'} for order in batch]
+    
+    monkeypatch.setattr(populate_orders, 'generate_orders_vectorized', pending_only)
+    
+    assert not compare_backends(ORDERS, catalog, seed=0)
+    mismatched = [line.split()[0] for line in capsys.readouterr().out.splitlines() if 'MISMATCH' in line]
+    assert mismatched == ['status']
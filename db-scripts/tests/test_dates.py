@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from common.dates import CalendarSampler
+from common.parallel import split_shards
+
+# Nearly every order falls in January unless the stream keeps the other months at their minimum
+SKEWED_SEASONALITY = [100.0] + [0.01] * 11
+MIN_PER_MONTH = 10
+ORDERS = 600
+
+def make_rng(backend, seed):
+    if backend == 'numpy':
+        np = pytest.importorskip('numpy')
+        return np.random.default_rng(seed)
+    return random.Random(seed)
+
+def draw(calendar, rng, total, batch_size, min_per_month=MIN_PER_MONTH):
+    stream = calendar.stream(total, rng, min_per_month)
+    days = []
+    for batch_start in range(0, total, batch_size):
+        days.extend(stream.take(min(batch_size, total - batch_start)))
+    return days
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+@pytest.mark.parametrize('workers', [1, 2, 3])
+def test_every_month_keeps_its_minimum_whatever_the_shard_count(backend, workers):
+    calendar = CalendarSampler(date(2024, 1, 1), date(2025, 1, 1), seasonality=SKEWED_SEASONALITY)
+    months = Counter()
+    for shard in split_shards(ORDERS, workers, 42, 'orders'):
+        months.update(day[:7] for day in draw(calendar, make_rng(backend, shard.seed), shard.count, 64))
+    
+    assert sum(months.values()) == ORDERS
+    assert set(months) == set(calendar.month_keys)
+    # Each shard keeps the minimum on its own, so the whole run holds it once per shard
+    assert min(months.values()) >= MIN_PER_MONTH * workers
+    assert months.most_common(1)[0][0] == '2024-01'
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+@pytest.mark.parametrize('workers', [1, 3])
+def test_a_seed_and_shard_count_always_draw_the_same_dates(backend, workers):
+    calendar = CalendarSampler(date(2024, 1, 1), date(2025, 1, 1), seasonality=SKEWED_SEASONALITY)
+    
+    def run():
+        return [
+            draw(calendar, make_rng(backend, shard.seed), shard.count, 64)
+            for shard in split_shards(ORDERS, workers, 42, 'orders')
+        ]
+    
+    assert run() == run()
+
+def test_batch_size_does_not_change_the_dates():
+    calendar = CalendarSampler(date(2024, 1, 1), date(2025, 1, 1), seasonality=SKEWED_SEASONALITY)
+    
+    assert draw(calendar, random.Random(7), ORDERS, 1) == draw(calendar, random.Random(7), ORDERS, ORDERS)
+
+def test_minimum_is_capped_when_there_are_too_few_orders():
+    calendar = CalendarSampler(date(2024, 1, 1), date(2025, 1, 1), seasonality=SKEWED_SEASONALITY)
+    
+    months = Counter(day[:7] for day in draw(calendar, random.Random(3), 36, 10))
+    
+    # 36 orders over 12 months can only guarantee 3 per month
+    assert sum(months.values()) == 36
+    assert all(months[month] >= 3 for month in calendar.month_keys)
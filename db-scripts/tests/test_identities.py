@@ -0,0 +1,45 @@
+import pytest
+
+from common.identities import IdentityGenerator, first_free_round
+
+FIRST_NAMES = ['Ali', 'Siti', 'Mei Ling']
+LAST_NAMES = ['Tan', 'Lim', 'Wong', 'bin Ahmad']
+
+def identities(generator, positions):
+    return [generator.identity(position) for position in positions]
+
+@pytest.mark.parametrize('vocabularies', [None, ['districts']])
+def test_identities_are_unique_past_every_combination(vocabularies):
+    generator = IdentityGenerator(7, vocabularies, FIRST_NAMES, LAST_NAMES)
+    
+    drawn = identities(generator, range(3 * generator.combinations + 5))
+    
+    assert len({username for _, _, username, _ in drawn}) == len(drawn)
+    assert len({email for _, _, _, email in drawn}) == len(drawn)
+    # The first round uses every combination once without a numbered suffix
+    assert not any(username[-1].isdigit() for _, _, username, _ in drawn[:generator.combinations])
+
+def test_identities_are_unique_over_the_default_names():
+    generator = IdentityGenerator(3)
+    
+    drawn = identities(generator, range(100000))
+    
+    assert len({username for _, _, username, _ in drawn}) == len(drawn)
+
+def test_shards_over_distinct_positions_never_collide():
+    # Each worker process builds its own generator from the run's seed
+    shards = [IdentityGenerator(11, None, FIRST_NAMES, LAST_NAMES) for _ in range(3)]
+    
+    drawn = [identity for index, generator in enumerate(shards) for identity in identities(generator, range(index * 10, index * 10 + 10))]
+    
+    assert drawn == identities(IdentityGenerator(11, None, FIRST_NAMES, LAST_NAMES), range(30))
+    assert len({email for _, _, _, email in drawn}) == 30
+
+def test_appended_identities_skip_the_rounds_already_used():
+    existing = identities(IdentityGenerator(1, None, FIRST_NAMES, LAST_NAMES), range(15))
+    generator = IdentityGenerator(2, None, FIRST_NAMES, LAST_NAMES)
+    
+    start = generator.first_position(first_free_round(username for _, _, username, _ in existing))
+    appended = identities(generator, range(start, start + 15))
+    
+    assert not {username for _, _, username, _ in existing} & {username for _, _, username, _ in appended}
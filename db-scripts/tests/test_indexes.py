@@ -0,0 +1,78 @@
+import pytest
+from pymongo import DESCENDING
+
+from common.indexes import (
+    DASHBOARD_INDEXES, DASHBOARD_QUERIES, REFERENCE_QUERIES, MONTH_QUERIES, build_indexes, dashboard_queries, plan_stages
+)
+
+mongomock = pytest.importorskip('mongomock')
+
+def leading_fields(collection_name):
+    """The first key of every dashboard index of a collection"""
+    return {next(iter(index.model.document['key'])) for index in DASHBOARD_INDEXES[collection_name]}
+
+def test_every_controller_sort_and_search_field_is_indexed():
+    for collection_name, spec in DASHBOARD_QUERIES.items():
+        missing = set(spec['sort_fields'] + spec['search_fields']) - leading_fields(collection_name)
+        assert not missing, f"{collection_name} has no index on {missing}"
+
+def test_reference_and_month_queries_have_an_index():
+    for collection_name, description, field, sort in REFERENCE_QUERIES + MONTH_QUERIES:
+        leading = field or sort[0][0]
+        assert leading in leading_fields(collection_name), description
+
+def test_index_names_are_unique_per_collection():
+    for collection_name, indexes in DASHBOARD_INDEXES.items():
+        names = [index.model.document['name'] for index in indexes]
+        assert len(names) == len(set(names)), collection_name
+
+def test_build_indexes_creates_every_dashboard_index():
+    db = mongomock.MongoClient()['test']
+    
+    builds = build_indexes(db)
+    
+    assert {build.status for build in builds} == {'built'}
+    for collection_name, indexes in DASHBOARD_INDEXES.items():
+        assert {index.model.document['name'] for index in indexes} <= set(db[collection_name].index_information())
+    assert 'updatedAt_-1' in db['products'].index_information()
+    # mongomock reports no collStats, so sizes are left unknown
+    assert {build.size_bytes for build in builds} == {None}
+
+def test_rebuilding_indexes_is_a_no_op():
+    db = mongomock.MongoClient()['test']
+    build_indexes(db, ['orders'])
+    before = db['orders'].index_information()
+    
+    builds = build_indexes(db, ['orders'])
+    
+    assert [build.status for build in builds] == ['built'] * len(DASHBOARD_INDEXES['orders'])
+    assert db['orders'].index_information() == before
+
+def test_unique_index_over_duplicate_values_is_skipped():
+    db = mongomock.MongoClient()['test']
+    db['customers'].insert_many([{'id': 'CUS-1', 'email': 'same@example.com'}, {'id': 'CUS-2', 'email': 'same@example.com'}])
+    
+    statuses = {build.name: build.status for build in build_indexes(db, ['customers'])}
+    
+    assert statuses.pop('email_1') == 'skipped (duplicate values)'
+    assert set(statuses.values()) == {'built'}
+    assert 'email_1' not in db['customers'].index_information()
+
+def test_dashboard_queries_cover_every_sort_and_search():
+    queries = dashboard_queries('orders', search='pend')
+    
+    assert queries[0] == ('list by date', {}, [('date', DESCENDING)])
+    assert [description for description, _, _ in queries[1:-1]] == [
+        f"sort by {field}" for field in DASHBOARD_QUERIES['orders']['sort_fields'] if field != 'date'
+    ]
+    description, search_filter, sort = queries[-1]
+    assert description == "search 'pend'"
+    assert [next(iter(clause)) for clause in search_filter['$or']] == DASHBOARD_QUERIES['orders']['search_fields']
+    assert search_filter['$or'][0]['id']['$regex'].search('PENDING')
+
+def test_plan_stages_walk_nested_plans():
+    plan = {'stage': 'LIMIT', 'inputStage': {'stage': 'FETCH', 'inputStages': [
+        {'stage': 'IXSCAN'}, {'stage': 'IXSCAN'}
+    ]}}
+    
+    assert plan_stages(plan) == ['LIMIT', 'FETCH', 'IXSCAN', 'IXSCAN']
@@ -0,0 +1,57 @@
+import random
+from datetime import datetime, timezone
+
+import bson
+import pytest
+
+from orders.populate_orders import OrderEncoder, generate_order_rows, order_document
+from common.rawbson import BoundedCache
+
+def order_rows(catalog, count=300, seed=1):
+    return [row for batch in generate_order_rows(count, catalog, batch_size=100, rng=random.Random(seed)) for row in batch]
+
+@pytest.mark.parametrize('date_type', ['string', 'datetime'])
+def test_encoder_matches_bson_encode(catalog, date_type):
+    current_time = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    rows = order_rows(catalog)
+    encoder = OrderEncoder(catalog, date_type)
+    
+    encoded = encoder.encode(rows, current_time)
+    
+    assert [document.raw for document in encoded] == [
+        bson.encode(order_document(row, current_time, catalog, date_type)) for row in rows
+    ]
+
+def test_encoder_matches_bson_encode_with_customer_ids(catalog):
+    current_time = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    rows = [row._replace(customer_id=f"CUSTOMER-{index}") for index, row in enumerate(order_rows(catalog, 50))]
+    
+    encoded = OrderEncoder(catalog).encode(rows, current_time)
+    
+    assert [document.raw for document in encoded] == [
+        bson.encode(order_document(row, current_time, catalog)) for row in rows
+    ]
+
+def test_encoder_caches_stay_bounded(catalog):
+    current_time = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    rows = order_rows(catalog)
+    encoder = OrderEncoder(catalog)
+    caches = [encoder.lines, encoder.items, encoder.single_lines, encoder.customers, encoder.customer_ids]
+    for cache in caches:
+        cache.maxsize = 5
+    rows = [row._replace(customer_id=f"CUSTOMER-{index % 20}") if index % 2 else row for index, row in enumerate(rows)]
+    
+    encoded = encoder.encode(rows, current_time)
+    
+    assert all(len(cache) <= 5 for cache in caches)
+    assert [document.raw for document in encoded] == [
+        bson.encode(order_document(row, current_time, catalog)) for row in rows
+    ]
+
+def test_bounded_cache_drops_the_oldest_value():
+    computed = []
+    cache = BoundedCache(lambda key: computed.append(key) or key * 2, maxsize=2)
+    
+    assert [cache[1], cache[2], cache[1], cache[3]] == [2, 4, 2, 6]
+    assert list(cache) == [2, 3]
+    assert computed == [1, 2, 3]
@@ -0,0 +1,53 @@
+import pytest
+
+from common.pacing import TokenBucket
+
+# Rates and times are powers of two so the fake clock adds up without rounding
+RATE = 64
+
+class FakeClock:
+    """A clock that only moves when the bucket sleeps"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.mark.parametrize('batch', [1, 8, 32, 256])
+def test_bucket_holds_the_average_rate(batch):
+    clock = FakeClock()
+    bucket = TokenBucket(RATE, clock=clock, sleep=clock.sleep)
+    
+    for _ in range(40):
+        bucket.take(batch)
+    
+    # Batches above the capacity leave a debt, so the first take only waits for a full bucket
+    assert clock.now == pytest.approx((40 * batch - max(batch - RATE, 0)) / RATE)
+
+def test_bucket_lets_work_catch_up_to_its_capacity_after_a_stall():
+    clock = FakeClock()
+    bucket = TokenBucket(RATE, capacity=32, clock=clock, sleep=clock.sleep)
+    
+    clock.now += 10
+    assert bucket.take(32) == 0
+    assert bucket.take(32) == 0.5
+
+def test_set_rate_keeps_the_gathered_tokens():
+    clock = FakeClock()
+    bucket = TokenBucket(16, clock=clock, sleep=clock.sleep)
+    
+    clock.now += 0.5
+    bucket.set_rate(RATE)
+    assert bucket.take(8) == 0
+    assert bucket.take(16) == 0.25
+
+def test_bucket_without_rate_refuses_to_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(0, clock=clock, sleep=clock.sleep)
+    
+    with pytest.raises(ValueError):
+        bucket.take(1)
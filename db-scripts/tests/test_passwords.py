@@ -0,0 +1,20 @@
+import argparse
+
+import pytest
+
+from common.passwords import DEFAULT_BCRYPT_ROUNDS, add_hashing_args
+
+def hashing_parser():
+    return add_hashing_args(argparse.ArgumentParser())
+
+def test_bcrypt_rounds_default_and_bounds():
+    parser = hashing_parser()
+    assert parser.parse_args([]).bcrypt_rounds == DEFAULT_BCRYPT_ROUNDS
+    assert parser.parse_args(['--bcrypt-rounds', '4']).bcrypt_rounds == 4
+    assert parser.parse_args(['--bcrypt-rounds', '31']).bcrypt_rounds == 31
+
+@pytest.mark.parametrize('rounds', ['3', '32', 'twelve'])
+def test_bcrypt_rounds_outside_bcrypt_range_are_rejected(rounds, capsys):
+    with pytest.raises(SystemExit):
+        hashing_parser().parse_args(['--bcrypt-rounds', rounds])
+    assert '--bcrypt-rounds' in capsys.readouterr().err
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+import common.pipeline
+from common.incremental import CHECKPOINTS_COLLECTION, open_checkpoint
+from common.pipeline import BatchWatermark, PipelineOptions, write_batches
+from customers.populate_customers import CUSTOMERS_COLLECTION, DB_NAME, populate_customers
+
+mongomock = pytest.importorskip('mongomock')
+
+PIPELINE = PipelineOptions(in_flight=3, queue_size=2)
+
+# Fields that depend on when a customer was written, not on the run's settings
+TIMESTAMPS = ('createdAt', 'updatedAt')
+
+def customers(db):
+    return [
+        {key: value for key, value in customer.items() if key not in TIMESTAMPS}
+        for customer in db[CUSTOMERS_COLLECTION].find().sort('_id')
+    ]
+
+@pytest.fixture
+def failing_writes(monkeypatch):
+    """Fail the writes of the batches whose first document is in fail_on, counting the batches written"""
+    write_batch = common.pipeline.write_batch
+    lock = threading.Lock()
+    state = {'written': 0, 'fail_on': set(), 'fail_after': None}
+    
+    def failing(collection, documents, upsert=False):
+        with lock:
+            if documents[0]['_id'] in state['fail_on']:
+                raise RuntimeError("interrupted")
+            if state['fail_after'] is not None and state['written'] >= state['fail_after']:
+                raise RuntimeError("interrupted")
+            state['written'] += 1
+        return write_batch(collection, documents, upsert)
+    
+    monkeypatch.setattr(common.pipeline, 'write_batch', failing)
+    return state
+
+def test_watermark_only_advances_over_contiguous_batches():
+    watermark = BatchWatermark(2)
+    
+    assert watermark.finish(3) == 2
+    assert watermark.finish(5) == 2
+    assert watermark.finish(2) == 4
+    assert watermark.finish(4) == 6
+
+def test_pipelined_write_failure_checkpoints_the_contiguous_batches(failing_writes):
+    db = mongomock.MongoClient()['test']
+    checkpoint = open_checkpoint(db, 'items', {})
+    batches = [(number, [{'_id': number * 10 + offset} for offset in range(10)]) for number in range(8)]
+    failing_writes['fail_on'] = {30}
+    
+    with pytest.raises(RuntimeError, match="interrupted"):
+        write_batches(db['items'], iter(batches), checkpoint=checkpoint, pipeline=PIPELINE)
+    
+    # Batches after the failed one may have been written, but the checkpoint stops before it
+    assert db[CHECKPOINTS_COLLECTION].find_one({'_id': 'items'})['batches_done'] == {'0': 3}
+    assert db['items'].count_documents({'_id': {'$lt': 30}}) == 30
+    assert db['items'].count_documents({'_id': {'$gte': 30, '$lt': 40}}) == 0
+
+def test_pipelined_run_resumes_from_the_watermark(failing_writes):
+    reference = mongomock.MongoClient()
+    assert populate_customers(80, seed=7, batch_size=10, client=reference) == 80
+    expected = customers(reference[DB_NAME])
+    
+    client = mongomock.MongoClient()
+    db = client[DB_NAME]
+    
+    # The pipelined run fails on its fourth write, with other batches possibly in flight
+    failing_writes.update(written=0, fail_after=3)
+    assert populate_customers(80, seed=7, batch_size=10, client=client, pipeline=PIPELINE) is None
+    checkpoint = db[CHECKPOINTS_COLLECTION].find_one({'_id': CUSTOMERS_COLLECTION})
+    assert checkpoint['completed'] is False
+    done = checkpoint['batches_done']['0']
+    assert done <= 3
+    
+    # Resuming rewrites every batch from the watermark on and leaves the same customers
+    failing_writes.update(written=0, fail_after=None)
+    assert populate_customers(80, seed=7, batch_size=10, client=client, resume=True, pipeline=PIPELINE) == 80 - done * 10
+    assert failing_writes['written'] == 8 - done
+    assert customers(db) == expected
+    assert db[CHECKPOINTS_COLLECTION].find_one({'_id': CUSTOMERS_COLLECTION})['completed'] is True
@@ -0,0 +1,50 @@
+import pytest
+
+import common.pipeline
+from common.incremental import CHECKPOINTS_COLLECTION
+from customers.populate_customers import CUSTOMERS_COLLECTION, DB_NAME, populate_customers
+
+# Fields that depend on when a customer was written, not on the run's settings
+TIMESTAMPS = ('createdAt', 'updatedAt')
+
+def customers(db):
+    return [
+        {key: value for key, value in customer.items() if key not in TIMESTAMPS}
+        for customer in db[CUSTOMERS_COLLECTION].find().sort('_id')
+    ]
+
+@pytest.fixture
+def counted_writes(monkeypatch):
+    """Count the batches written, failing the write after fail_after of them when it is set"""
+    write_batch = common.pipeline.write_batch
+    state = {'written': 0, 'fail_after': None}
+    
+    def counted(collection, documents, upsert=False):
+        if state['fail_after'] is not None and state['written'] >= state['fail_after']:
+            raise RuntimeError("interrupted")
+        state['written'] += 1
+        return write_batch(collection, documents, upsert)
+    
+    monkeypatch.setattr(common.pipeline, 'write_batch', counted)
+    return state
+
+def test_resume_skips_written_batches(counted_writes):
+    mongomock = pytest.importorskip('mongomock')
+    reference = mongomock.MongoClient()
+    assert populate_customers(50, seed=7, batch_size=10, client=reference) == 50
+    expected = customers(reference[DB_NAME])
+    
+    client = mongomock.MongoClient()
+    db = client[DB_NAME]
+    
+    # The first run stops after writing three of its five batches
+    counted_writes.update(written=0, fail_after=3)
+    assert populate_customers(50, seed=7, batch_size=10, client=client) is None
+    assert db[CHECKPOINTS_COLLECTION].find_one({'_id': CUSTOMERS_COLLECTION})['completed'] is False
+    
+    # Resuming writes only the two missing batches, even with other settings asked for
+    counted_writes.update(written=0, fail_after=None)
+    assert populate_customers(10, seed=1, batch_size=10, client=client, resume=True) == 20
+    assert counted_writes['written'] == 2
+    assert customers(db) == expected
+    assert db[CHECKPOINTS_COLLECTION].find_one({'_id': CUSTOMERS_COLLECTION})['completed'] is True
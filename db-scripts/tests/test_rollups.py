@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+import pytest
+
+from common.incremental import CHECKPOINTS_COLLECTION
+from common.rollups import ROLLUP_COLLECTIONS, PRODUCT_ROLLUP_COLLECTIONS, escape_key
+from orders.populate_orders import DB_NAME, ORDERS_COLLECTION, PRODUCTS_COLLECTION, populate_orders
+from tests.conftest import make_products
+
+@pytest.fixture(scope='module')
+def seeded_db():
+    mongomock = pytest.importorskip('mongomock')
+    client = mongomock.MongoClient()
+    db = client[DB_NAME]
+    products = make_products(12)
+    # Breakdown keys are parts of $inc paths, so a category holding '.' and '$' must be escaped
+    products[0]['category'] = 'Toys.Games$'
+    db[PRODUCTS_COLLECTION].insert_many(products)
+    
+    # mongomock cannot insert RawBSONDocuments, so the orders go through the dict encoding
+    assert populate_orders(400, batch_size=100, seed=9, client=client, encoding='dict', customers=False,
+                           backend='python', min_per_month=0) == 400
+    return db
+
+def expected_rollups(orders, length):
+    buckets = defaultdict(lambda: {'count': 0, 'revenue': 0.0, 'by_status': defaultdict(int)})
+    products = defaultdict(lambda: [0, 0])
+    for order in orders:
+        bucket = buckets[order['date'][:length]]
+        bucket['count'] += 1
+        bucket['revenue'] += order['total']
+        bucket['by_status'][order['status']] += 1
+        for line in order['products']:
+            entry = products[(order['date'][:length], line['product_id'])]
+            entry[0] += 1
+            entry[1] += line['product_quantity']
+    return buckets, products
+
+@pytest.mark.parametrize('period, length', [('day', 10), ('month', 7)])
+def test_rollup_totals_match_the_orders(seeded_db, period, length):
+    orders = list(seeded_db[ORDERS_COLLECTION].find())
+    buckets, products = expected_rollups(orders, length)
+    
+    rollups = {document['_id']: document for document in seeded_db[ROLLUP_COLLECTIONS[period]].find()}
+    assert set(rollups) == set(buckets)
+    for key, bucket in buckets.items():
+        assert rollups[key]['count'] == bucket['count']
+        assert rollups[key]['revenue'] == pytest.approx(bucket['revenue'], abs=0.01 * bucket['count'])
+        assert {status: entry['count'] for status, entry in rollups[key]['by_status'].items()} == bucket['by_status']
+        assert 'by_product' not in rollups[key]
+    
+    assert {
+        (document['bucket'], document['product_id']): [document['count'], document['quantity']]
+        for document in seeded_db[PRODUCT_ROLLUP_COLLECTIONS[period]].find()
+    } == dict(products)
+
+def test_category_keys_are_escaped(seeded_db):
+    categories = set()
+    for document in seeded_db[ROLLUP_COLLECTIONS['month']].find():
+        categories.update(document['by_category'])
+    
+    assert escape_key('Toys.Games$') in categories
+    assert not any('.' in category or '$' in category for category in categories)
+
+def test_appends_record_the_months_they_wrote():
+    mongomock = pytest.importorskip('mongomock')
+    client = mongomock.MongoClient()
+    db = client[DB_NAME]
+    db[PRODUCTS_COLLECTION].insert_many(make_products(12))
+    
+    # Twelve orders cannot reach every month, so only some of them are rebuilt
+    assert populate_orders(12, batch_size=5, seed=3, client=client, encoding='dict', customers=False,
+                           backend='python', min_per_month=0, mode='append') == 12
+    
+    months = {order['date'][:7] for order in db[ORDERS_COLLECTION].find()}
+    assert db[CHECKPOINTS_COLLECTION].find_one({'_id': ORDERS_COLLECTION})['months'] == sorted(months)
@@ -0,0 +1,85 @@
+import random
+from collections import Counter
+
+import pytest
+
+from common.baskets import BasketSampler, popularity_ranks
+from common.sampling import AliasSampler
+from common.catalog import ProductCatalog
+from tests.conftest import make_products
+
+WEIGHTS = [1.0, 2.0, 3.0, 4.0, 0.0, 10.0]
+DRAWS = 200000
+# Absolute tolerance on a drawn share; DRAWS keeps sampling noise well below it
+TOLERANCE = 0.01
+
+def make_rng(backend, seed=0):
+    if backend == 'numpy':
+        np = pytest.importorskip('numpy')
+        return np.random.default_rng(seed)
+    return random.Random(seed)
+
+def shares(values, count):
+    counts = Counter(int(value) for value in values)
+    total = sum(counts.values())
+    return [counts[index] / total for index in range(count)]
+
+def test_alias_table_holds_the_exact_distribution():
+    sampler = AliasSampler(WEIGHTS)
+    mass = [0.0] * len(WEIGHTS)
+    for slot in range(sampler.size):
+        mass[slot] += sampler.probability[slot] / sampler.size
+        mass[sampler.alias[slot]] += (1.0 - sampler.probability[slot]) / sampler.size
+    
+    total = sum(WEIGHTS)
+    assert mass == pytest.approx([weight / total for weight in WEIGHTS], abs=1e-12)
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_alias_draws_follow_the_weights(backend):
+    sampler = AliasSampler(WEIGHTS)
+    
+    drawn = shares(sampler.sample_many(DRAWS, make_rng(backend)), len(WEIGHTS))
+    
+    total = sum(WEIGHTS)
+    assert drawn == pytest.approx([weight / total for weight in WEIGHTS], abs=TOLERANCE)
+    assert drawn[WEIGHTS.index(0.0)] == 0
+
+@pytest.mark.parametrize('weights', [[], [0.0, 0.0]])
+def test_alias_sampler_needs_a_positive_weight(weights):
+    with pytest.raises(ValueError):
+        AliasSampler(weights)
+
+def basket_draws(sampler, backend, count):
+    """The baskets of count orders, as lists of catalog indices"""
+    rng = make_rng(backend, 1)
+    if backend == 'python':
+        return [sampler.sample(rng) for _ in range(count)]
+    sizes, lines = sampler.sample_many(count, rng)
+    baskets, start = [], 0
+    for size in sizes:
+        baskets.append([int(index) for index in lines[start:start + size]])
+        start += size
+    return baskets
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_basket_sizes_follow_the_size_weights(backend):
+    catalog = ProductCatalog.from_products(make_products(200))
+    size_weights = [0.5, 0.3, 0.2]
+    
+    baskets = basket_draws(BasketSampler(catalog, size_weights, zipf_exponent=0), backend, DRAWS // 4)
+    
+    assert all(len(set(basket)) == len(basket) for basket in baskets)
+    assert shares([len(basket) - 1 for basket in baskets], len(size_weights)) == pytest.approx(size_weights, abs=TOLERANCE)
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_products_follow_the_zipf_popularity(backend):
+    products = make_products(20)
+    catalog = ProductCatalog.from_products(products)
+    
+    # Single-product baskets draw straight from the popularity table
+    baskets = basket_draws(BasketSampler(catalog, [1.0], zipf_exponent=1.0), backend, DRAWS)
+    
+    ranks = popularity_ranks(catalog.ids)
+    harmonic = sum(1.0 / (rank + 1) for rank in range(len(products)))
+    expected = [1.0 / (ranks[index] + 1) / harmonic for index in range(len(products))]
+    assert shares([basket[0] for basket in baskets], len(products)) == pytest.approx(expected, abs=TOLERANCE)
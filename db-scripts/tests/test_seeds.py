@@ -0,0 +1,27 @@
+import pytest
+
+from common.parallel import derive_seed, split_shards
+from admins.populate_admins import ADMINS_COLLECTION, DB_NAME, MASTER_ADMIN_ID, populate_admins
+from customers.populate_customers import CUSTOMERS_COLLECTION, populate_customers
+
+def test_derive_seed_mixes_in_the_collection():
+    assert derive_seed(42, 0, 'admins') == derive_seed(42, 0, 'admins')
+    assert derive_seed(42, 0, 'admins') != derive_seed(42, 0, 'customers')
+    assert [shard.seed for shard in split_shards(10, 2, 42, 'orders')] == [
+        derive_seed(42, 0, 'orders'), derive_seed(42, 1, 'orders')
+    ]
+
+def test_stages_sharing_a_seed_draw_different_values():
+    mongomock = pytest.importorskip('mongomock')
+    client = mongomock.MongoClient()
+    db = client[DB_NAME]
+    
+    populate_admins(5, seed=42, client=client, hash_strategy='shared', bcrypt_rounds=4)
+    populate_customers(5, seed=42, client=client)
+    
+    admins = list(db[ADMINS_COLLECTION].find({'_id': {'$ne': MASTER_ADMIN_ID}}))
+    customers = list(db[CUSTOMERS_COLLECTION].find())
+    assert len(admins) == len(customers) == 5
+    assert not {admin['_id'].split('-', 1)[1] for admin in admins} & {customer['_id'].split('-', 1)[1] for customer in customers}
+    assert not {admin['phone_number'] for admin in admins} & {customer['phone_number'] for customer in customers}
+    assert not {admin['email'] for admin in admins} & {customer['email'] for customer in customers}
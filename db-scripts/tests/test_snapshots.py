@@ -0,0 +1,84 @@
+import os
+
+import bson
+import pytest
+
+import common.snapshots as snapshots
+from common.snapshots import (
+    prepare_snapshot, record_batches, complete_snapshot, abandon_snapshot, find_snapshot, snapshot_batches, snapshot_key
+)
+from common.rawbson import raw_document, encode_element
+
+CONFIG = {'mode': 'replace', 'count': 7, 'seed': 42, 'workers': 2, 'batch_size': 3}
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    return tmp_path
+
+def shard_batches(shard_index, count, batch_size):
+    """Numbered batches of dicts, the shape populate shards pass to record_batches"""
+    documents = [{'_id': f"DOC-{shard_index}-{number}", 'shard': shard_index, 'number': number} for number in range(count)]
+    return list(enumerate(documents[start:start + batch_size] for start in range(0, count, batch_size)))
+
+def record(run, shards):
+    """Record every shard as a populate run would, returning the documents passed through"""
+    written = []
+    for shard_index, batches in shards.items():
+        for _, batch in record_batches(iter(batches), run.directory, shard_index):
+            written.extend(batch)
+    return written
+
+def test_recorded_snapshot_loads_back_the_same_documents():
+    run = prepare_snapshot('customers', CONFIG)
+    assert run.manifest is None
+    written = record(run, {0: shard_batches(0, 4, 3), 1: shard_batches(1, 3, 3)})
+    complete_snapshot(run, len(written))
+    
+    manifest = prepare_snapshot('customers', CONFIG).manifest
+    assert manifest['documents'] == 7
+    assert manifest['shards'] == ['shard-0000.bson', 'shard-0001.bson']
+    
+    batches = list(snapshot_batches(manifest, 2))
+    assert [len(batch) for batch in batches] == [2, 2, 2, 1]
+    assert [bson.decode(document.raw) for batch in batches for document in batch] == written
+
+def test_raw_documents_are_saved_byte_for_byte():
+    run = prepare_snapshot('orders', CONFIG)
+    documents = [raw_document([encode_element('_id', f"ORDER-{number}"), encode_element('total', number * 1.5)])
+                 for number in range(3)]
+    list(record_batches(iter([(0, documents)]), run.directory, 0))
+    complete_snapshot(run, len(documents))
+    
+    loaded = [document.raw for batch in snapshot_batches(find_snapshot('orders', run.key), 10) for document in batch]
+    assert loaded == [document.raw for document in documents]
+
+def test_snapshot_is_keyed_by_its_config():
+    run = prepare_snapshot('customers', CONFIG)
+    record(run, {0: shard_batches(0, 2, 2)})
+    complete_snapshot(run, 2)
+    
+    assert snapshot_key('customers', CONFIG) != snapshot_key('customers', {**CONFIG, 'seed': 43})
+    assert snapshot_key('customers', CONFIG) != snapshot_key('admins', CONFIG)
+    assert prepare_snapshot('customers', {**CONFIG, 'seed': 43}).manifest is None
+
+def test_abandoned_recording_is_not_published(snapshot_dir):
+    run = prepare_snapshot('customers', CONFIG)
+    record(run, {0: shard_batches(0, 2, 2)})
+    abandon_snapshot(run)
+    
+    assert not os.path.exists(run.directory)
+    assert find_snapshot('customers', run.key) is None
+    assert os.listdir(snapshot_dir) == []
+
+def test_abandoning_after_completion_keeps_the_snapshot():
+    run = prepare_snapshot('customers', CONFIG)
+    record(run, {0: shard_batches(0, 2, 2), 1: []})
+    complete_snapshot(run, 2)
+    abandon_snapshot(run)
+    
+    manifest = find_snapshot('customers', run.key)
+    # A shard that wrote nothing leaves an empty file, which loading skips
+    assert [bson.decode(document.raw)['_id'] for batch in snapshot_batches(manifest, 5) for document in batch] == [
+        'DOC-0-0', 'DOC-0-1'
+    ]
@@ -0,0 +1,26 @@
+import db_scripts.__main__ as cli
+from db_scripts.stages import Stage, run_stages
+
+def failed_populate(*args, **kwargs):
+    print("An error occurred: connection refused")
+    return None
+
+def test_failed_stage_skips_its_dependents():
+    results = {result.name: result for result in run_stages([
+        Stage('products', lambda: cli.stage_result('products', 10), []),
+        Stage('customers', lambda: cli.stage_result('customers', failed_populate()), []),
+        Stage('orders', lambda: cli.stage_result('orders', 10), ['products', 'customers']),
+    ])}
+    
+    assert results['products'].status == 'ok'
+    assert results['products'].result == 10
+    assert results['customers'].status == 'failed'
+    assert isinstance(results['customers'].error, RuntimeError)
+    assert results['orders'].status == 'skipped'
+
+def test_seed_exits_non_zero_when_a_populate_step_fails(monkeypatch):
+    for name in ['populate_products', 'populate_admins', 'populate_customers', 'populate_orders', 'build_dashboard_indexes']:
+        monkeypatch.setattr(cli, name, failed_populate)
+    monkeypatch.setattr(cli, 'get_client', lambda uri: None)
+    
+    assert cli.main(['seed', '--stages', 'products', 'orders', 'indexes']) == 1
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from common.catalog import ProductCatalog
+from common.inventory import StockLedger, stock_share
+from common.parallel import split_shards
+from orders.populate_orders import generate_order_rows, months_below_minimum
+from tests.conftest import make_products
+
+def order_batches(catalog, count=2000, seed=3):
+    return generate_order_rows(count, catalog, batch_size=250, rng=random.Random(seed))
+
+@pytest.mark.parametrize('policy', ['cap', 'reject'])
+def test_ledger_never_oversells(policy):
+    catalog = ProductCatalog.from_products(make_products(10, stock=40))
+    ledger = StockLedger(catalog, policy)
+    
+    filled = [row for batch in order_batches(catalog) for row in ledger.fill(batch)]
+    
+    sold = [0] * len(catalog)
+    for row in filled:
+        for index, quantity in row.lines:
+            sold[index] += quantity
+        assert row.total == round(sum(catalog.prices[index] * quantity for index, quantity in row.lines), 2)
+    assert sold == list(ledger.sold)
+    assert all(0 <= sold[index] <= catalog.stock[index] for index in range(len(catalog)))
+    assert [remaining + quantity for remaining, quantity in zip(ledger.remaining, ledger.sold)] == list(catalog.stock)
+    assert len(filled) + ledger.rejected == 2000
+
+def test_reject_keeps_orders_whole():
+    catalog = ProductCatalog.from_products(make_products(10, stock=40))
+    rows = [row for batch in order_batches(catalog) for row in batch]
+    ledger = StockLedger(catalog, 'reject')
+    
+    filled = [row for batch in order_batches(catalog) for row in ledger.fill(batch)]
+    
+    assert ledger.capped == 0
+    assert set(filled) <= set(rows)
+
+def test_shard_shares_add_up_to_the_stock():
+    for stock in (0, 1, 7, 1000):
+        shards = split_shards(1003, 4, 5)
+        assert sum(stock_share(stock, shard.start, shard.count, 1003) for shard in shards) == stock
+
+def test_months_below_minimum(db):
+    db.orders.insert_many([{'date': '2024-01-05'} for _ in range(3)] + [{'date': '2024-02-10'}])
+    
+    assert months_below_minimum(db.orders, ['2024-01', '2024-02', '2024-03'], 2) == {'2024-02': 1, '2024-03': 0}
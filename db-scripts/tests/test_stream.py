@@ -0,0 +1,30 @@
+import pytest
+
+from tests.conftest import make_products
+from orders.stream_orders import DB_NAME, ORDERS_COLLECTION, LatencySample, stream_orders
+
+def test_latency_sample_keeps_a_bounded_uniform_sample():
+    sample = LatencySample(size=1000)
+    for value in range(100000):
+        sample.add(value % 100)
+    
+    summary = sample.summary()
+    assert len(sample.values) == 1000
+    assert summary['calls'] == 100000
+    assert summary['mean_ms'] == 49.5
+    assert 40 <= summary['p50_ms'] <= 60
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_stream_draws_every_step_from_one_generator(backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    mongomock = pytest.importorskip('mongomock')
+    client = mongomock.MongoClient()
+    client[DB_NAME]['products'].insert_many(make_products(20))
+    
+    summary = stream_orders(rate=512, duration=0.5, backend=backend, encoding='dict', client=client,
+                            customers=False, rollups=False)
+    
+    orders = client[DB_NAME][ORDERS_COLLECTION]
+    assert summary['inserted'] == orders.count_documents({}) > 0
+    assert len(orders.distinct('_id')) == summary['inserted']
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+
+from common.connection import write_count
+
+def test_acknowledged_writes_report_their_counts():
+    result = SimpleNamespace(acknowledged=True, upserted_count=3, matched_count=2, modified_count=1)
+    assert write_count(result, 10, 'upserted_count', 'matched_count') == 5
+    assert write_count(result, 10, 'modified_count') == 1
+
+def test_unacknowledged_writes_count_what_was_sent():
+    class Unacknowledged:
+        acknowledged = False
+        
+        def __getattr__(self, name):
+            raise AssertionError(f"{name} read from an unacknowledged result")
+    
+    assert write_count(Unacknowledged(), 10, 'upserted_count', 'matched_count') == 10
@@ -6,6 +6,7 @@ import { useState, useEffect, useCallback } from 'react';
 import { useSidebar } from '@/app/contexts/SidebarContext';
 import api from '@/lib/axios';
 import { PROFILE_UPDATED_EVENT } from '@/utils/eventUtils';
+import { resolveAssetUrl } from '@/utils/imageUtils';
 import { useAuth } from '@/contexts/AuthContext';
 
 interface AdminUser {
@@ -81,10 +82,14 @@ export default function SidebarVertical({ className = '' }: { className?: string
 
   // Convert base64 to data URL for the profile picture
   const convertBase64ToImage = (base64String: string) => {
-    // Check if it's already a data URL
-    if (base64String.startsWith('data:')) {
+    // Check if it's already a URL or data URL
+    if (base64String.startsWith('http') || base64String.startsWith('data:')) {
       return base64String;
     }
+    // Images stored in the assets collection are served by the backend
+    if (base64String.startsWith('/api/assets/')) {
+      return resolveAssetUrl(base64String);
+    }
     // Convert base64 to data URL
     return `data:image/jpeg;base64,${base64String}`;
   };
@@ -126,6 +131,7 @@ export default function SidebarVertical({ className = '' }: { className?: string
             <Image
               src={avatarUrl}
               alt="Profile"
+              unoptimized
               fill
               sizes="80px"
               className="rounded-full object-cover"
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { resolveAssetUrl } from '@/utils/imageUtils';
 
 // Interface for a product
 interface Product {
@@ -40,6 +41,11 @@ const EditProductModal: React.FC<EditProductModalProps> = ({
       return base64String;
     }
 
+    // Images stored in the assets collection are served by the backend
+    if (base64String.startsWith('/api/assets/')) {
+      return resolveAssetUrl(base64String);
+    }
+
     // If it's a base64 string without a prefix, add the data URL prefix
     return `data:image/jpeg;base64,${base64String}`;
   };
@@ -1,4 +1,5 @@
 import React, { useState } from 'react';
+import { resolveAssetUrl } from '@/utils/imageUtils';
 
 // Interface of product
 interface Product {
@@ -26,6 +27,11 @@ const ProductDetailsModal: React.FC<ProductDetailsModalProps> = ({ product, onCl
       return base64String;
     }
 
+    // Images stored in the assets collection are served by the backend
+    if (base64String.startsWith('/api/assets/')) {
+      return resolveAssetUrl(base64String);
+    }
+
     // If it's a base64 string without a prefix, add the data URL prefix
     return `data:image/jpeg;base64,${base64String}`;
   };
@@ -5,6 +5,7 @@ import { useAuth } from '@/contexts/AuthContext';
 import api from '@/lib/axios';
 import { useRouter } from 'next/navigation';
 import { notifyProfileUpdated } from '@/utils/eventUtils';
+import { resolveAssetUrl } from '@/utils/imageUtils';
 
 // Interface for user profile
 interface UserProfile {
@@ -98,6 +99,11 @@ export default function ProfilePage() {
       return base64String;
     }
 
+    // Images stored in the assets collection are served by the backend
+    if (base64String.startsWith('/api/assets/')) {
+      return resolveAssetUrl(base64String);
+    }
+
     // If it's a base64 string without a prefix, add the data URL prefix
     return `data:image/jpeg;base64,${base64String}`;
   };
@@ -0,0 +1,19 @@
+/**
+ * Utility functions for image fields
+ */
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000/api';
+
+// Path the backend serves images stored in the assets collection from
+const ASSET_PATH_PREFIX = '/api/assets/';
+
+/**
+ * Resolves an "/api/assets/<sha256>" path sent by the backend against the API origin,
+ * leaving any other value untouched
+ */
+export function resolveAssetUrl(value: string): string {
+  if (!value.startsWith(ASSET_PATH_PREFIX)) {
+    return value;
+  }
+  return new URL(value, API_BASE_URL).toString();
+}